@@ -4,10 +4,28 @@
 # If you want to add an additional command, duplicate one of the existing directories and import it here.
 # You need to use aliases (import "entry" as "my_module") assuming you have the default module named "entry".
 from .spurGearCreate import entry as spurGearCreate
+from .spurGearDetail import entry as spurGearDetail
+from .spurGearMesh import entry as spurGearMesh
+from .spurGearFamily import entry as spurGearFamily
+from .spurGearInventory import entry as spurGearInventory
+from .spurGearBenchmark import entry as spurGearBenchmark
+from .spurGearBatch import entry as spurGearBatch
+from .spurGearExport import entry as spurGearExport
+from .spurGearHistory import entry as spurGearHistory
+from .spurGearNest import entry as spurGearNest
 
-# Add the spur gear create module to list so it will be started and stopped.
+# Add the spur gear modules to list so they will be started and stopped.
 commands = [
-    spurGearCreate
+    spurGearCreate,
+    spurGearDetail,
+    spurGearMesh,
+    spurGearFamily,
+    spurGearInventory,
+    spurGearBenchmark,
+    spurGearBatch,
+    spurGearExport,
+    spurGearHistory,
+    spurGearNest
 ]
 
 
@@ -0,0 +1,194 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from . import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearBatch'
+CMD_NAME = '批量创建齿轮'
+CMD_Description = ('按目录文件批量创建齿轮,中断后再次运行会跳过已创建的齿轮并继续')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    inputs = args.command.commandInputs
+
+    # The catalog of the last unfinished batch is selected so it can be continued.
+    catalog = ''
+    unfinished = ''
+    state = logic.BatchJournal(logic.JOURNAL_FILENAME).load()
+    if state is not None and not state.finished:
+        catalog = state.catalog
+        unfinished = logic.describeUnfinishedBatch(state)
+
+    catalogInput = inputs.addTextBoxCommandInput('catalog', '目录文件', catalog, 1, True)
+    catalogInput.tooltip = 'CSV 格式与预设目录相同,profileShift 列是变位系数'
+    inputs.addBoolValueInput('selectCatalog', '选择目录文件...', False, '', False)
+
+    detailInput = inputs.addDropDownCommandInput('detail', '细节级别', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for detail, detailName in logic.gearLogic.detailNames.items():
+        detailInput.listItems.add(detailName, detail == logic.gearLogic.DETAIL_FULL)
+
+    structureInput = inputs.addDropDownCommandInput('structure', '装配结构', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for structure, structureName in logic.structureNames.items():
+        structureInput.listItems.add(structureName, structure == logic.STRUCTURE_COMPONENTS)
+
+    inputs.addBoolValueInput('groupTimeline', '在时间线中为每个齿轮编组', True, '', True)
+
+    journalInput = inputs.addTextBoxCommandInput('journal', '', unfinished, 1, True)
+    journalInput.isFullWidth = True
+    journalInput.isVisible = unfinished != ''
+
+    errorMessageInput = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
+    errorMessageInput.isFullWidth = True
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.validateInputs, command_validate_inputs, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+# Failures don't stop the batch, they're all reported together when it's done.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    catalogInput: adsk.core.TextBoxCommandInput = inputs.itemById('catalog')
+    detailInput: adsk.core.DropDownCommandInput = inputs.itemById('detail')
+    structureInput: adsk.core.DropDownCommandInput = inputs.itemById('structure')
+    groupTimelineInput: adsk.core.BoolValueInput = inputs.itemById('groupTimeline')
+
+    detail = logic.gearLogic.DETAIL_FULL
+    for key, detailName in logic.gearLogic.detailNames.items():
+        if detailName == detailInput.selectedItem.name:
+            detail = key
+
+    structure = logic.STRUCTURE_COMPONENTS
+    for key, structureName in logic.structureNames.items():
+        if structureName == structureInput.selectedItem.name:
+            structure = key
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+
+    progressDialog = ui.createProgressDialog()
+    progressDialog.isCancelButtonShown = True
+
+    start = time.time()
+    (created, skipped, errors, cancelled) = logic.runBatch(des, catalogInput.text, detail, structure, groupTimelineInput.value, progressDialog)
+    end = time.time()
+    app.log(f'Time to create {created} spur gears in a batch as {structure}: {end - start} seconds.')
+
+    report = logic.formatBatchReport(created, skipped, errors, cancelled)
+    app.log(report)
+    ui.messageBox(report)
+
+
+# This event handler is called when the user changes one of the inputs.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+    if changed_input.id != 'selectCatalog':
+        return
+
+    fileDialog = ui.createFileDialog()
+    fileDialog.title = '选择齿轮目录文件'
+    fileDialog.filter = 'CSV (*.csv)'
+    if fileDialog.showOpen() != adsk.core.DialogResults.DialogOK:
+        return
+
+    catalogInput: adsk.core.TextBoxCommandInput = args.inputs.itemById('catalog')
+    catalogInput.text = fileDialog.filename
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_inputs(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    errorMessageInput: adsk.core.TextBoxCommandInput = inputs.itemById('errMessage')
+    errorMessageInput.text = ''
+
+    catalogInput: adsk.core.TextBoxCommandInput = inputs.itemById('catalog')
+    if not os.path.isfile(catalogInput.text):
+        errorMessageInput.text = '警告!!!:请选择目录文件。'
+        args.areInputsValid = False
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
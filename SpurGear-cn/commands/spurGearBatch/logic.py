@@ -0,0 +1,330 @@
+import adsk.core
+import adsk.fusion
+import os
+import csv
+import json
+import time
+import hashlib
+import collections
+from ... import config
+from ..spurGearCreate import logic as gearLogic
+from ..spurGearCreate import presets
+from ...lib.gearMath import quantities
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# The journal of the last batch.  Every row is recorded as soon as it's done
+# so the journal shows how far a batch got even if Fusion was closed.
+JOURNAL_FILENAME = os.path.join(config.USER_DATA_FOLDER, 'batchJournal.jsonl')
+
+# The ways the gears of a batch can be added to the assembly.  Each gear can
+# be its own component, which is how the spur gear command creates gears,
+# the gears with the same specification can be occurrences of one component,
+# or all of the gears can be bodies of a single shared component.
+STRUCTURE_COMPONENTS = 'Components'
+STRUCTURE_OCCURRENCES = 'Occurrences'
+STRUCTURE_BODIES = 'Bodies'
+
+# The names shown in the dialog for each structure.
+structureNames = {STRUCTURE_COMPONENTS: '每个齿轮一个组件',
+                  STRUCTURE_OCCURRENCES: '相同齿轮共用组件',
+                  STRUCTURE_BODIES: '全部齿轮作为实体放在一个组件中'}
+
+
+# A gear read from a row of a batch catalog.
+class BatchGear():
+    def __init__(self, row, name, gearValues):
+        self.row = row
+        self.name = name
+        self.gearValues = gearValues
+        self.specHash = gearLogic.getSpecHash(gearValues)
+
+
+# What the journal says about the last batch.
+class BatchState():
+    def __init__(self, catalog, catalogHash, count):
+        self.catalog = catalog
+        self.catalogHash = catalogHash
+        self.count = count
+        self.lastGoodRow = 0
+        self.finished = False
+        self.errors = {}
+
+
+# Reads the gears of a batch from a file in the shop catalog format used by
+# the presets.  Rows are numbered from 1 after the header.  Returns a list of
+# BatchGear and a list of (row, error) for the rows that couldn't be read.
+def readBatchCatalog(filename):
+    gears = []
+    errors = []
+    with open(filename, newline='', encoding='utf-8-sig') as catalogFile:
+        for row, catalogRow in enumerate(csv.DictReader(catalogFile), 1):
+            try:
+                preset = presets.catalogRowToPreset(catalogRow)
+            except (KeyError, ValueError, TypeError, ZeroDivisionError) as error:
+                errors.append((row, '无法读取: ' + str(error)))
+                continue
+
+            gearValues = {}
+            gearValues['diametralPitch'] = preset['diaPitch']
+            gearValues['numTeeth'] = preset['numTeeth']
+            gearValues['thickness'] = preset['thickness']
+            gearValues['rootFilletRad'] = preset['rootFilletRad']
+            gearValues['pressureAngle'] = preset['pressureAngle']
+            gearValues['holeDiam'] = preset['holeDiam']
+            gearValues['backlash'] = preset['backlash']
+            gearValues['profileShift'] = preset['profileShift']
+            gears.append(BatchGear(row, preset['name'], gearValues))
+
+    return (gears, errors)
+
+
+# Returns a hash of the contents of a catalog file, which is used to check a
+# journal belongs to the same catalog.
+def getCatalogHash(filename):
+    with open(filename, 'rb') as catalogFile:
+        return hashlib.sha256(catalogFile.read()).hexdigest()
+
+
+# Adds the gears of a batch to a design using one of the structures.  The
+# gears are added to the history unless recordHistory is False.
+class GearBuilder():
+    def __init__(self, design: adsk.fusion.Design, structure, detail, groupTimeline, recordHistory = True):
+        self.design = design
+        self.structure = structure
+        self.detail = detail
+        self.groupTimeline = groupTimeline
+        self.recordHistory = recordHistory
+        self.bodiesComponent = None
+
+        # Find the gears already in the design.  A gear component counts once
+        # for each of its occurrences and a gear body counts once.
+        self.existing = collections.Counter()
+        self.components = {}
+        for attrib in design.findAttributes('SpurGear', 'SpecHash'):
+            comp = adsk.fusion.Component.cast(attrib.parent)
+            if comp is not None:
+                self.existing[attrib.value] += design.rootComponent.allOccurrencesByComponent(comp).count
+                self.components[attrib.value] = comp
+            else:
+                self.existing[attrib.value] += 1
+
+
+    # Returns True and counts the gear as used if the design already has a
+    # gear with the specification that hasn't been counted.
+    def useExisting(self, specHash):
+        if self.existing[specHash] > 0:
+            self.existing[specHash] -= 1
+            return True
+
+        return False
+
+
+    # Adds a gear to the design.
+    def build(self, gearValues, specHash, name = ''):
+        if self.structure == STRUCTURE_OCCURRENCES and specHash in self.components:
+            occs = self.design.rootComponent.occurrences
+            occs.addExistingComponent(self.components[specHash], adsk.core.Matrix3D.create())
+            return
+
+        if self.structure == STRUCTURE_BODIES:
+            body = gearLogic.createGearBody(self.design, self.getBodiesComponent(), gearValues['diametralPitch'], gearValues['numTeeth'],
+                                            gearValues['thickness'], gearValues['rootFilletRad'], gearValues['pressureAngle'],
+                                            gearValues['backlash'], gearValues['holeDiam'], self.detail, self.groupTimeline,
+                                            gearValues['profileShift'], self.recordHistory)
+            if name:
+                body.name = name
+            return
+
+        gearComp = gearLogic.createGear(self.design, gearValues['diametralPitch'], gearValues['numTeeth'], gearValues['thickness'],
+                                        gearValues['rootFilletRad'], gearValues['pressureAngle'], gearValues['backlash'],
+                                        gearValues['holeDiam'], self.detail, False, self.groupTimeline, gearValues['profileShift'],
+                                        self.recordHistory)
+        if name:
+            gearComp.description = name
+        self.components[specHash] = gearComp
+
+
+    # Returns the component the gear bodies are added to, which is created the
+    # first time it's needed.  It's marked with an attribute so later batches
+    # add their bodies to the same component.
+    def getBodiesComponent(self):
+        if self.bodiesComponent is None:
+            attribs = self.design.findAttributes('SpurGear', 'BodiesComponent')
+            if len(attribs) > 0:
+                self.bodiesComponent = adsk.fusion.Component.cast(attribs[0].parent)
+            else:
+                occ = self.design.rootComponent.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+                self.bodiesComponent = occ.component
+                self.bodiesComponent.name = 'Spur Gears'
+                self.bodiesComponent.attributes.add('SpurGear', 'BodiesComponent', '')
+
+        return self.bodiesComponent
+
+
+# A journal of a batch written as one JSON object per line.  Each entry is 
+# flushed to disk before the next gear is started.
+class BatchJournal():
+    def __init__(self, filename):
+        self.filename = filename
+        self.journalFile = None
+
+
+    # Starts the journal of a new batch, replacing the previous one.
+    def start(self, catalog, catalogHash, count):
+        folder = os.path.dirname(self.filename)
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.journalFile = open(self.filename, 'w', encoding='utf-8')
+        self.write({'event': 'start', 'catalog': catalog, 'catalogHash': catalogHash, 'count': count, 'time': time.time()})
+
+
+    # Continues the journal of an unfinished batch.
+    def resume(self):
+        self.journalFile = open(self.filename, 'a', encoding='utf-8')
+        self.write({'event': 'resume', 'time': time.time()})
+
+
+    def write(self, entry):
+        self.journalFile.write(json.dumps(entry) + '\n')
+        self.journalFile.flush()
+        os.fsync(self.journalFile.fileno())
+
+
+    def close(self):
+        if self.journalFile is not None:
+            self.journalFile.close()
+            self.journalFile = None
+
+
+    # Reads the state of the batch in the journal.  Returns None if there
+    # isn't a journal.  A line cut short by Fusion closing is ignored.
+    def load(self):
+        if not os.path.exists(self.filename):
+            return None
+
+        state = None
+        with open(self.filename, encoding='utf-8') as journalFile:
+            for line in journalFile:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                event = entry.get('event')
+                if event == 'start':
+                    state = BatchState(entry['catalog'], entry['catalogHash'], entry['count'])
+                elif state is None:
+                    continue
+                elif event in ('created', 'skipped'):
+                    state.lastGoodRow = max(state.lastGoodRow, entry['row'])
+                    state.errors.pop(entry['row'], None)
+                elif event == 'failed':
+                    state.errors[entry['row']] = entry['error']
+                elif event == 'finished':
+                    state.finished = True
+
+        return state
+
+
+# Creates the gears of a catalog file in the design using one of the 
+# structures, grouping the features of each gear in the timeline if 
+# groupTimeline is True.  A gear is skipped if the
+# design already has a gear with the same specification, counting repeated 
+# rows, so running the same catalog again only creates what's missing.  If
+# the journal has an unfinished batch of the same catalog the journal is 
+# continued from the last row that was done, otherwise a new one is started.
+# A row the journal has as done whose gear isn't in the design, because the
+# design wasn't saved, and a row that failed are tried again.  A row that
+# can't be read, or has values the spur gear dialog wouldn't accept, isn't
+# built and is journaled as failed.  Errors don't stop the batch, they're
+# returned as a list of (row, error) tuples along with the number of gears
+# created and skipped and whether it was cancelled.
+def runBatch(design: adsk.fusion.Design, catalog, detail, structure = STRUCTURE_COMPONENTS, groupTimeline = True, progressDialog = None):
+    (gears, errors) = readBatchCatalog(catalog)
+    catalogHash = getCatalogHash(catalog)
+
+    journal = BatchJournal(JOURNAL_FILENAME)
+    state = journal.load()
+    if state is not None and not state.finished and state.catalogHash == catalogHash:
+        journal.resume()
+        resumeRow = state.lastGoodRow
+    else:
+        journal.start(catalog, catalogHash, len(gears))
+        resumeRow = 0
+
+    for (row, error) in errors:
+        journal.write({'event': 'failed', 'row': row, 'error': error})
+
+    unitsCache = quantities.UnitsCache(design.unitsManager)
+    def formatLength(length):
+        return unitsCache.format(length, unitsCache.defaultLengthUnits)
+
+    builder = GearBuilder(design, structure, detail, groupTimeline)
+    created = 0
+    skipped = 0
+    cancelled = False
+    try:
+        if progressDialog:
+            progressDialog.show('批量创建齿轮', '%v / %m', 0, len(gears))
+
+        for index, gear in enumerate(gears):
+            if progressDialog:
+                progressDialog.progressValue = index
+                adsk.doEvents()
+                if progressDialog.wasCancelled:
+                    cancelled = True
+                    break
+
+            problem = gearLogic.checkGearValues(gear.gearValues, formatLength)
+            if problem is not None:
+                errors.append((gear.row, gear.name + ': ' + problem))
+                journal.write({'event': 'failed', 'row': gear.row, 'error': problem})
+                continue
+
+            # Each gear that's already in the design uses up one of the 
+            # rows with its specification.
+            if builder.useExisting(gear.specHash):
+                if gear.row > resumeRow:
+                    journal.write({'event': 'skipped', 'row': gear.row, 'specHash': gear.specHash})
+                skipped += 1
+                continue
+
+            try:
+                builder.build(gear.gearValues, gear.specHash, gear.name)
+            except Exception as error:
+                errors.append((gear.row, gear.name + ': ' + str(error)))
+                journal.write({'event': 'failed', 'row': gear.row, 'error': str(error)})
+                continue
+
+            journal.write({'event': 'created', 'row': gear.row, 'specHash': gear.specHash})
+            created += 1
+
+        if not cancelled:
+            journal.write({'event': 'finished', 'created': created, 'skipped': skipped, 'failed': len(errors), 'time': time.time()})
+    finally:
+        journal.close()
+        if progressDialog:
+            progressDialog.hide()
+
+    return (created, skipped, sorted(errors), cancelled)
+
+
+# Formats the result of a batch as the report shown when it's done.
+def formatBatchReport(created, skipped, errors, cancelled):
+    report = f'已创建 {created} 个齿轮, 跳过已存在的 {skipped} 个'
+    if cancelled:
+        report += '\n批量创建已取消, 再次运行同一目录将从中断处继续。'
+    if errors:
+        report += f'\n{len(errors)} 行失败:'
+        for (row, error) in errors:
+            report += f'\n第 {row} 行: {error}'
+
+    return report
+
+
+# Describes a batch in the journal that didn't finish.
+def describeUnfinishedBatch(state):
+    return f'上次批量创建未完成 ({os.path.basename(state.catalog)}, 第 {state.lastGoodRow} / {state.count} 行)'
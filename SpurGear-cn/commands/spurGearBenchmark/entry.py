@@ -0,0 +1,142 @@
+import adsk.core
+import adsk.fusion
+import os
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from . import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearBenchmark'
+CMD_NAME = '齿轮性能基准'
+CMD_Description = ('在临时文档中运行齿轮创建的性能基准测试')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    inputs = args.command.commandInputs
+
+    inputs.addBoolValueInput('apiBudget', 'API 调用预算', True, '', True)
+    inputs.addBoolValueInput('updateBudget', '记录当前调用次数为新预算', True, '', False)
+    inputs.addBoolValueInput('dialogEvents', '对话框事件计数', True, '', True)
+    inputs.addBoolValueInput('structure', '装配结构 (创建, 重新计算, 文件大小)', True, '', False)
+    inputs.addBoolValueInput('groupTimeline', '在时间线中为每个齿轮编组', True, '', True)
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+# The benchmarks are run in a new document that is closed without saving afterwards.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    apiBudgetInput: adsk.core.BoolValueInput = inputs.itemById('apiBudget')
+    updateBudgetInput: adsk.core.BoolValueInput = inputs.itemById('updateBudget')
+    dialogEventsInput: adsk.core.BoolValueInput = inputs.itemById('dialogEvents')
+    structureInput: adsk.core.BoolValueInput = inputs.itemById('structure')
+    groupTimelineInput: adsk.core.BoolValueInput = inputs.itemById('groupTimeline')
+
+    doc = app.documents.add(adsk.core.DocumentTypes.FusionDesignDocumentType)
+    try:
+        des = adsk.fusion.Design.cast(doc.products.itemByProductType('DesignProductType'))
+
+        report = ''
+        failed = False
+        if apiBudgetInput.value:
+            results = logic.runApiBudget(des, updateBudgetInput.value)
+            report += logic.formatApiBudgetReport(results)
+            failed = failed or not all(result[4] for result in results)
+        if dialogEventsInput.value:
+            (counts, passed) = logic.checkDialogEvents()
+            report += logic.formatDialogEventReport(counts, passed)
+            failed = failed or not passed
+    finally:
+        doc.close(False)
+
+    # Each structure is built in a document of its own.
+    if structureInput.value:
+        report += logic.formatStructureReport(logic.runStructureBenchmark(groupTimelineInput.value))
+
+    if failed:
+        report = '基准测试失败\n\n' + report
+    app.log(report)
+    ui.messageBox(report)
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
@@ -0,0 +1,214 @@
+import adsk.core
+import adsk.fusion
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import tempfile
+from ..spurGearCreate import logic as gearLogic
+from ..spurGearBatch import logic as batchLogic
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# The gears built by the API call budget benchmark as (diametral pitch,
+# number of teeth, level of detail).  The other values are the same for all.
+BUDGET_GEARS = [(2.0, 12, gearLogic.DETAIL_FULL),
+                (2.0, 24, gearLogic.DETAIL_FULL),
+                (12.0, 80, gearLogic.DETAIL_FULL),
+                (2.0, 24, gearLogic.DETAIL_POLYGON),
+                (2.0, 24, gearLogic.DETAIL_OUTSIDE_CYLINDER)]
+
+# The gears built for each assembly structure as (diametral pitch, number of
+# teeth, count).  Gears are repeated so sharing components makes a difference.
+STRUCTURE_GEARS = [(2.0, 12, 8),
+                   (2.0, 24, 8),
+                   (4.0, 30, 4),
+                   (12.0, 80, 4)]
+
+# The file with the number of API calls each benchmark gear is allowed.  It's
+# kept with the user's data so updating the add-in doesn't replace it.  A
+# budget is only recorded when it's asked for, so a change that makes more
+# calls, or a computer without a budget, fails the benchmark until the new
+# budget is recorded on purpose.
+BUDGET_FILENAME = os.path.join(config.USER_DATA_FOLDER, 'apiBudget.json')
+
+
+# Counts the calls made into the compiled Fusion API while it's active.  It
+# uses the Python profiler hook, which sees every call of a compiled function
+# made from Python.  Property reads and writes that go straight to the
+# compiled module aren't seen, so the count is a measure of the API methods
+# called rather than an exact total, which is enough to see it go up.
+class ApiCallCounter():
+    def __init__(self):
+        self.count = 0
+
+
+    def __enter__(self):
+        sys.setprofile(self.profile)
+        return self
+
+
+    def __exit__(self, excType, excValue, traceback):
+        sys.setprofile(None)
+
+
+    def profile(self, frame, event, arg):
+        if event == 'c_call':
+            module = getattr(arg, '__module__', None) or ''
+            if module.startswith('adsk') or module in ('_core', '_fusion'):
+                self.count += 1
+
+
+# Returns the name used for a benchmark gear in the budget file and reports.
+def getGearKey(diaPitch, numTeeth, detail):
+    return 'DP ' + format(diaPitch, 'g') + ', ' + str(numTeeth) + ' teeth, ' + detail
+
+
+# Reads the API call budget, which is empty if it hasn't been recorded yet.
+def loadBudget():
+    if not os.path.exists(BUDGET_FILENAME):
+        return {}
+
+    with open(BUDGET_FILENAME) as budgetFile:
+        return json.load(budgetFile)
+
+
+def saveBudget(budget):
+    if not os.path.exists(config.USER_DATA_FOLDER):
+        os.makedirs(config.USER_DATA_FOLDER)
+
+    with open(BUDGET_FILENAME, 'w') as budgetFile:
+        json.dump(budget, budgetFile, indent=4, sort_keys=True)
+
+
+# Builds each of the budget gears in the design and counts the API calls it
+# takes.  A gear fails if it makes more calls than its budget or if it doesn't
+# have a budget.  If updateBudget is True the counts are recorded as the new
+# budget instead.  An error building a gear is raised.  Returns a list of
+# (key, calls, seconds, budget, passed) where budget is None for a gear
+# without one.
+def runApiBudget(design: adsk.fusion.Design, updateBudget):
+    budget = loadBudget()
+    budgetChanged = False
+
+    results = []
+    for (diaPitch, numTeeth, detail) in BUDGET_GEARS:
+        key = getGearKey(diaPitch, numTeeth, detail)
+
+        start = time.perf_counter()
+        with ApiCallCounter() as counter:
+            gearLogic.createGear(design, diaPitch, numTeeth, 2.54, 0.05, 20 * (math.pi/180), 0, 1.0, detail, recordHistory = False)
+        seconds = time.perf_counter() - start
+
+        if updateBudget:
+            budget[key] = counter.count
+            budgetChanged = True
+
+        gearBudget = budget.get(key)
+        results.append((key, counter.count, seconds, gearBudget, gearBudget is not None and counter.count <= gearBudget))
+
+    if budgetChanged:
+        saveBudget(budget)
+
+    return results
+
+
+# Formats the results of the API call budget benchmark as a report.
+def formatApiBudgetReport(results):
+    report = 'API 调用预算 (调用次数 / 预算, 耗时)\n'
+    for (key, calls, seconds, budget, passed) in results:
+        if budget is None:
+            report += f'{key}: {calls} / -, {seconds:.3f} s  没有预算,请勾选"记录当前调用次数为新预算"\n'
+            continue
+
+        status = '通过' if passed else '超出预算'
+        report += f'{key}: {calls} / {budget}, {seconds:.3f} s  {status}\n'
+
+    return report
+
+
+# Checks the event counts of the last spur gear dialog.  Creating the dialog
+# and each change the user makes should compute the derived values once and
+# validate the inputs at most once, however many inputs the change updates,
+# and only a value that wasn't shown before should be formatted by the units
+# manager.  Returns (counts, passed), where counts is empty if the dialog
+# hasn't been shown in this session.
+def checkDialogEvents():
+    counts = dict(gearLogic.lastEventCounts)
+    if not counts:
+        return (counts, True)
+
+    updates = counts['inputChanged'] + 1
+    passed = counts['derivedValueUpdates'] <= updates and counts['validations'] <= updates
+    if 'unitsApiCalls' in counts:
+        # One more call is allowed for the description of the created gear.
+        passed = passed and counts['unitsApiCalls'] <= counts['derivedValueUpdates'] + counts['validations'] + 1
+    return (counts, passed)
+
+
+# Formats the result of checkDialogEvents as a report.
+def formatDialogEventReport(counts, passed):
+    report = '对话框事件 (上次打开的齿轮对话框)\n'
+    if not counts:
+        return report + '本次会话中尚未打开齿轮对话框\n'
+
+    for name in sorted(counts):
+        report += f'{name}: {counts[name]}\n'
+    report += '通过\n' if passed else '重复计算过多\n'
+    return report
+
+
+# Builds the same set of gears with each of the assembly structures of the
+# batch command, each in a new document that's closed without saving, and
+# measures the time to create the gears, the time to recompute the design
+# and the size of the design saved as a Fusion archive.  Returns a list of
+# (structure, createSeconds, computeSeconds, fileSize).
+def runStructureBenchmark(groupTimeline):
+    folder = tempfile.mkdtemp()
+    results = []
+    try:
+        for structure in batchLogic.structureNames:
+            doc = app.documents.add(adsk.core.DocumentTypes.FusionDesignDocumentType)
+            try:
+                des = adsk.fusion.Design.cast(doc.products.itemByProductType('DesignProductType'))
+                builder = batchLogic.GearBuilder(des, structure, gearLogic.DETAIL_FULL, groupTimeline, False)
+
+                start = time.perf_counter()
+                for (diaPitch, numTeeth, count) in STRUCTURE_GEARS:
+                    gearValues = gearLogic.getGearValues(diaPitch, numTeeth, 2.54, 0.05, 20 * (math.pi/180), 0, 1.0, gearLogic.DETAIL_FULL, None)
+                    specHash = gearLogic.getSpecHash(gearValues)
+                    for i in range(0, count):
+                        builder.build(gearValues, specHash)
+                adsk.doEvents()
+                createSeconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                des.computeAll()
+                computeSeconds = time.perf_counter() - start
+
+                filename = os.path.join(folder, structure + '.f3d')
+                exportMgr = des.exportManager
+                exportMgr.execute(exportMgr.createFusionArchiveExportOptions(filename))
+                fileSize = os.path.getsize(filename)
+            finally:
+                doc.close(False)
+
+            results.append((structure, createSeconds, computeSeconds, fileSize))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return results
+
+
+# Formats the results of the assembly structure benchmark as a report.
+def formatStructureReport(results):
+    gearCount = sum(count for (diaPitch, numTeeth, count) in STRUCTURE_GEARS)
+    report = f'装配结构 ({gearCount} 个齿轮: 创建耗时, 重新计算耗时, 文件大小)\n'
+    for (structure, createSeconds, computeSeconds, fileSize) in results:
+        report += f'{batchLogic.structureNames[structure]}: {createSeconds:.3f} s, {computeSeconds:.3f} s, {fileSize / 1024:.0f} KB\n'
+
+    return report
@@ -3,6 +3,7 @@ import os
 from ...lib import fusionAddInUtils as futil
 from ... import config
 from . import logic
+from . import presets
 
 app = adsk.core.Application.get()
 ui = app.userInterface
@@ -88,6 +89,9 @@ def stop():
     if cmdDef:
         cmdDef.deleteMe()
 
+    # Close the preset library so the database isn't left open.
+    presets.presetStore.close()
+
 
 # Function that is called when a user clicks the corresponding button in the UI.
 # This defines the contents of the command dialog and connects to the command related events.
@@ -159,5 +163,12 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
+    # Keep the event counts of the dialog, and the calls it made to the
+    # units manager, for the benchmarks.
+    if spur_gear_logic is not None:
+        logic.lastEventCounts = dict(spur_gear_logic.eventCounts)
+        logic.lastEventCounts['unitsApiCalls'] = spur_gear_logic.unitsCache.apiCalls
+        futil.log(f'{CMD_NAME} dialog events: {logic.lastEventCounts}')
+
     global local_handlers
     local_handlers = []
\ No newline at end of file
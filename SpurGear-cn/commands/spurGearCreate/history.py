@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import platform
+import statistics
+from ... import config
+
+# The history of every gear built, one JSON object per line.  Appending a
+# line is the only work done when a gear is built, the file is only read by
+# the history report.
+HISTORY_FILENAME = os.path.join(config.USER_DATA_FOLDER, 'history.jsonl')
+
+# The computer the add-in is running on, which doesn't change in a session.
+MACHINE = f'{platform.node()} ({platform.system()} {platform.machine()})'
+
+# The version of the add-in from its manifest, read the first time it's needed.
+addinVersion = None
+
+
+# Times the stages of building a gear.  Each call to lap adds the time since
+# the previous call to the named stage.
+class StageTimer():
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.stages = {}
+
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self.last)
+        self.last = now
+
+
+    def total(self):
+        return self.last - self.start
+
+
+# Returns the version in the manifest of the add-in, or an empty string.
+def getAddinVersion():
+    global addinVersion
+    if addinVersion is None:
+        addinVersion = ''
+        manifestFilename = os.path.join(os.path.dirname(config.__file__), config.ADDIN_NAME + '.manifest')
+        try:
+            with open(manifestFilename, encoding='utf-8') as manifestFile:
+                addinVersion = json.load(manifestFile).get('version', '')
+        except (OSError, ValueError):
+            pass
+
+    return addinVersion
+
+
+# Adds the build of a gear to the history.  Lengths are saved in centimeters
+# and the times in milliseconds.  The history is only a record, so any
+# failure to make or write the entry is ignored rather than failing the gear.
+def recordBuild(gearValues, strategy, timer: StageTimer, fusionVersion):
+    try:
+        entry = {'t': round(time.time()),
+                 'dp': gearValues['diametralPitch'],
+                 'z': gearValues['numTeeth'],
+                 'pa': round(gearValues['pressureAngle'], 6),
+                 'th': gearValues['thickness'],
+                 'hole': gearValues['holeDiam'],
+                 'fillet': gearValues['rootFilletRad'],
+                 'bl': gearValues['backlash'],
+                 'x': gearValues.get('profileShift', 0),
+                 'detail': gearValues['detail'],
+                 'strategy': strategy,
+                 'ms': round(timer.total() * 1000, 1),
+                 'stages': {name: round(seconds * 1000, 1) for (name, seconds) in timer.stages.items()},
+                 'fusion': fusionVersion,
+                 'addin': getAddinVersion(),
+                 'machine': MACHINE}
+
+        if not os.path.exists(config.USER_DATA_FOLDER):
+            os.makedirs(config.USER_DATA_FOLDER)
+
+        with open(HISTORY_FILENAME, 'a', encoding='utf-8') as historyFile:
+            historyFile.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    except Exception:
+        pass
+
+
+# Reads the history.  A line that can't be read is skipped.
+def loadHistory(filename = HISTORY_FILENAME):
+    entries = []
+    if not os.path.exists(filename):
+        return entries
+
+    with open(filename, encoding='utf-8') as historyFile:
+        for line in historyFile:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return entries
+
+
+# Returns the median time per tooth, in milliseconds, of the builds of each
+# (detail, strategy) on this computer.  The time of a gear grows with its
+# number of teeth, so this is what builds of different gears are compared by.
+def getTimePerTooth(entries):
+    samples = {}
+    for entry in entries:
+        if entry.get('machine') == MACHINE and entry['z'] > 0:
+            samples.setdefault((entry['detail'], entry['strategy']), []).append(entry['ms'] / entry['z'])
+
+    return {key: statistics.median(values) for (key, values) in samples.items()}
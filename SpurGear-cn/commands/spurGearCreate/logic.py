@@ -3,11 +3,51 @@ import adsk.fusion
 import math
 import os
 import json
-import time
+import ast
+import hashlib
+import contextlib
+from . import presets
+from . import history
+from ...lib import gearMath
+from ...lib.gearMath import quantities
 
 app = adsk.core.Application.get()
 ui = app.userInterface
-skipValidate = False
+
+# The event counts of the most recent spur gear dialog, kept after the dialog
+# closes so they can be reported by the benchmarks.
+lastEventCounts = {}
+
+# The levels of detail a gear can be built with.  A full gear has the real
+# involute teeth, the others are fast placeholders used while laying out an
+# assembly that can later be swapped for the full detail gear.
+DETAIL_FULL = 'Full'
+DETAIL_POLYGON = 'Polygon'
+DETAIL_PITCH_CYLINDER = 'PitchCylinder'
+DETAIL_OUTSIDE_CYLINDER = 'OutsideCylinder'
+
+# The version of the layout of the SpurGear/Values attribute saved on each 
+# gear component.  Version 0 is the str() of a dict of strings that was saved
+# before the layout had a version.
+GEAR_VALUES_SCHEMA = 1
+
+# The values that make up the specification of a gear.  Two gears with the
+# same values are the same part, whatever their level of detail.
+SPEC_VALUES = ('diametralPitch', 'numTeeth', 'pressureAngle', 'thickness', 'holeDiam', 'rootFilletRad', 'backlash', 'profileShift')
+
+# The values added to the specification after gears were saved with a hash.
+# They're only part of the hash when they aren't zero, so the gears saved
+# before a value was added keep their hash.
+ADDED_SPEC_VALUES = ('profileShift',)
+
+# The inputs of the dialog the derived values are computed from.
+DERIVED_VALUE_INPUTS = ('standard', 'diaPitch', 'module', 'numTeeth', 'presetList')
+
+# The names shown in the dialogs for each level of detail.
+detailNames = {DETAIL_FULL: '完整齿形',
+               DETAIL_POLYGON: '简化多边形齿形',
+               DETAIL_PITCH_CYLINDER: '分度圆柱体',
+               DETAIL_OUTSIDE_CYLINDER: '齿顶圆柱体'}
 
 
 class SpurGearLogic():
@@ -19,7 +59,9 @@ class SpurGearLogic():
             jsonSettings = settingAttribute.value
             settings = json.loads(jsonSettings)              
 
-        defaultUnits = des.unitsManager.defaultLengthUnits
+        # The units of the design are looked up once for the dialog.
+        self.unitsCache = quantities.UnitsCache(des.unitsManager)
+        defaultUnits = self.unitsCache.defaultLengthUnits
             
         # Determine whether to use inches or millimeters as the intial default.
         if defaultUnits == 'in' or defaultUnits == 'ft':
@@ -53,7 +95,7 @@ class SpurGearLogic():
         if settings:
             self.diaPitch = settings['DiaPitch']
         
-        self.metricModule = 25.4 / float(self.diaPitch)
+        self.metricModule = quantities.diametralPitchToModule(float(self.diaPitch))
 
         self.backlash = '0'
         if settings:
@@ -63,6 +105,10 @@ class SpurGearLogic():
         if settings:
             self.numTeeth = settings['NumTeeth']
 
+        self.profileShift = '0'
+        if settings and 'ProfileShift' in settings:
+            self.profileShift = settings['ProfileShift']
+
         self.rootFilletRad = '0.2'
         if settings:
             self.rootFilletRad = settings['RootFilletRad']
@@ -75,11 +121,49 @@ class SpurGearLogic():
         if settings:
             self.holeDiam = settings['HoleDiam']
 
+        self.detail = DETAIL_FULL
+        if settings and 'Detail' in settings:
+            self.detail = settings['Detail']
+
+        self.family = False
+        if settings and 'Family' in settings:
+            self.family = settings['Family'] == 'True'
+
+        # The dialog state.  While updateDepth is greater than zero the inputs
+        # are being changed by the add-in and the events those changes fire are
+        # ignored.  The validation result is kept until an input changes.
+        self.updateDepth = 0
+        self.isDerivedValueStale = True
+        self.pitchDiaText = None
+        self.isValidationStale = True
+        self.areInputsValid = True
+        self.eventCounts = {'inputChanged': 0, 'inputChangedSuppressed': 0,
+                            'validateInputs': 0, 'validateInputsSuppressed': 0, 'validateInputsReused': 0,
+                            'derivedValueUpdates': 0, 'validations': 0}
+
+
+    # Changes the inputs as a single update.  The inputChanged and validateInputs
+    # events fired by changes made inside the update are ignored, and when the
+    # outermost update ends the derived values are computed once and the
+    # inputs are validated again at the next validateInputs event.
+    @contextlib.contextmanager
+    def batchUpdate(self):
+        self.updateDepth += 1
+        try:
+            yield
+        finally:
+            self.updateDepth -= 1
+            if self.updateDepth == 0:
+                self.updateDerivedValues()
+                self.isValidationStale = True
+
 
     def CreateCommandInputs(self, inputs: adsk.core.CommandInputs):
-        global skipValidate
-        skipValidate = True
+        with self.batchUpdate():
+            self.createInputs(inputs)
 
+
+    def createInputs(self, inputs: adsk.core.CommandInputs):
         # Create the command inputs to define the contents of the command dialog.
         imagePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'GearEnglish.png')
         self.englishImageInput = inputs.addImageCommandInput('gearImageEnglish', '', imagePath)
@@ -89,6 +173,19 @@ class SpurGearLogic():
         self.metricImageInput = inputs.addImageCommandInput('gearImageMetric', '', imagePath)
         self.metricImageInput.isFullWidth = True
 
+        # The preset library.  Nothing is read from it until the user searches.
+        presetGroupInput = inputs.addGroupCommandInput('presetGroup', '预设库')
+        presetGroupInput.isExpanded = False
+        presetInputs = presetGroupInput.children
+        self.presetSearchStringInput = presetInputs.addStringValueInput('presetSearch', '搜索', '')
+        self.presetSearchStringInput.tooltip = '例如 "m2 z24 d10" 查找模数2、24齿、孔径10mm的预设,也可以输入预设名称的一部分'
+        self.presetListInput = presetInputs.addDropDownCommandInput('presetList', '预设', adsk.core.DropDownStyles.TextListDropDownStyle)
+        self.presetNameStringInput = presetInputs.addStringValueInput('presetName', '预设名称', '')
+        presetInputs.addBoolValueInput('presetSave', '保存为预设', False, '', False)
+        presetInputs.addBoolValueInput('presetImport', '导入目录', False, '', False)
+        presetInputs.addBoolValueInput('presetExport', '导出目录', False, '', False)
+        self.presetResults = []
+
         self.standardDropDownInput = inputs.addDropDownCommandInput('standard', '标准单位', adsk.core.DropDownStyles.TextListDropDownStyle)
         if self.standard == "English":
             self.standardDropDownInput.listItems.add('英制单位', True)
@@ -136,6 +233,9 @@ class SpurGearLogic():
             
         self.numTeethStringInput = inputs.addStringValueInput('numTeeth', '齿数', self.numTeeth)        
 
+        self.profileShiftValueInput = inputs.addValueInput('profileShift', '变位系数', '', adsk.core.ValueInput.createByReal(float(self.profileShift)))
+        self.profileShiftValueInput.tooltip = '正变位使齿根变厚,可以避免齿数少的小齿轮根切。齿根按齿条刀具展成,齿根圆角半径即刀具齿顶圆角半径。'
+
         self.backlashValueInput = inputs.addValueInput('backlash', '背隙', self.units, adsk.core.ValueInput.createByReal(float(self.backlash)))
         self.backlashValueInput.tooltip = "Backlash:是指齿轮啮合时，一个齿轮固定不动，另一个齿轮可以轻微转动或移动的最大间隙"
 
@@ -145,163 +245,300 @@ class SpurGearLogic():
 
         self.holeDiamValueInput = inputs.addValueInput('holeDiam', '中心孔直径', self.units, adsk.core.ValueInput.createByReal(float(self.holeDiam)))
 
+        self.detailDropDownInput = inputs.addDropDownCommandInput('detail', '细节级别', adsk.core.DropDownStyles.TextListDropDownStyle)
+        for detail, detailName in detailNames.items():
+            self.detailDropDownInput.listItems.add(detailName, detail == self.detail)
+        self.detailDropDownInput.tooltip = '占位细节级别创建很快,之后可以用"齿轮细节切换"命令替换为完整齿形。'
+
+        self.familyBoolInput = inputs.addBoolValueInput('family', '参数化齿轮族', True, '', self.family)
+        self.familyBoolInput.tooltip = '用户参数驱动齿轮厚度和中心孔直径,可以用"齿轮族变体"命令切换变体。'
+
         self.pitchDiamTextInput = inputs.addTextBoxCommandInput('pitchDiam', '分度圆直径', '', 1, True)
         
         self.errorMessageTextInput = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
         self.errorMessageTextInput.isFullWidth = True
 
-        skipValidate = False
-
 
     def HandleInputsChanged(self, args: adsk.core.InputChangedEventArgs):
         changedInput = args.input
+
+        if self.updateDepth > 0:
+            self.eventCounts['inputChangedSuppressed'] += 1
+            return
+        self.eventCounts['inputChanged'] += 1
+
+        if changedInput.id in DERIVED_VALUE_INPUTS:
+            self.isDerivedValueStale = True
         
-        if not skipValidate:
+        # Everything changed in response to the input is a single update.
+        with self.batchUpdate():
             if changedInput.id == 'standard':
                 if self.standardDropDownInput.selectedItem.name == '英制单位':
-                    self.metricImageInput.isVisible = False
-                    self.englishImageInput.isVisible = True
-                    
-                    self.diaPitchValueInput.isVisible = True
-                    self.moduleValueInput.isVisible = False
-
-                    self.diaPitchValueInput.value = 25.4 / self.moduleValueInput.value
-                    
-                    self.units = 'in'
+                    self.diaPitchValueInput.value = quantities.moduleToDiametralPitch(self.moduleValueInput.value)
                 elif self.standardDropDownInput.selectedItem.name == '公制单位':
-                    self.metricImageInput.isVisible = True
-                    self.englishImageInput.isVisible = False
-                    
-                    self.diaPitchValueInput.isVisible = False
-                    self.moduleValueInput.isVisible = True
-                
-                    self.moduleValueInput.value = 25.4 / self.diaPitchValueInput.value
-                    
-                    self.units = 'mm'
-
-                # Set each one to it's current value to work around an issue where
-                # otherwise if the user has edited the value, the value won't update 
-                # in the dialog because apparently it remembers the units when the 
-                # value was edited.  Setting the value using the API resets this.
-                self.backlashValueInput.value = self.backlashValueInput.value
-                self.backlashValueInput.unitType = self.units
-                self.rootFilletRadValueInput.value = self.rootFilletRadValueInput.value
-                self.rootFilletRadValueInput.unitType = self.units
-                self.thicknessValueInput.value = self.thicknessValueInput.value
-                self.thicknessValueInput.unitType = self.units
-                self.holeDiamValueInput.value = self.holeDiamValueInput.value
-                self.holeDiamValueInput.unitType = self.units
-                
-            # Update the pitch diameter value.
-            diaPitch = None
-            if self.standardDropDownInput.selectedItem.name == '英制单位':
-                if self.diaPitchValueInput.isValidExpression:
-                    diaPitch = self.diaPitchValueInput.value
-            elif self.standardDropDownInput.selectedItem.name == '公制单位':
-                if self.moduleValueInput.isValidExpression:
-                    diaPitch = 25.4 / self.moduleValueInput.value
-            if not diaPitch == None:
-                if self.numTeethStringInput.value.isdigit(): 
-                    numTeeth = int(self.numTeethStringInput.value)
-                    pitchDia = numTeeth/diaPitch
-
-                    # The pitch dia has been calculated in inches, but this expects cm as the input units.
-                    des = adsk.fusion.Design.cast(app.activeProduct)
-                    pitchDiaText = des.unitsManager.formatInternalValue(pitchDia * 2.54, self.units, True)
-                    self.pitchDiamTextInput.text = pitchDiaText
-                else:
-                    self.pitchDiamTextInput.text = ''                    
-            else:
-                self.pitchDiamTextInput.text = ''
-
-            if changedInput.id == 'pressureAngle':
+                    self.moduleValueInput.value = quantities.diametralPitchToModule(self.diaPitchValueInput.value)
+
+                self.updateStandard()
+            elif changedInput.id == 'presetSearch':
+                self.searchPresets()
+            elif changedInput.id == 'presetList':
+                if self.presetListInput.selectedItem is not None:
+                    self.applyPreset(self.presetResults[self.presetListInput.selectedItem.index])
+            elif changedInput.id == 'presetSave':
+                self.savePreset()
+            elif changedInput.id == 'presetImport':
+                self.importPresets()
+            elif changedInput.id == 'presetExport':
+                self.exportPresets()
+            elif changedInput.id == 'pressureAngle':
                 if self.pressureAngleListInput.selectedItem.name == '自定义':
                     self.pressureAngleCustomValueInput.isVisible = True
                 else:
                     self.pressureAngleCustomValueInput.isVisible = False                    
 
 
-    def HandleValidateInputs(self, args: adsk.core.ValidateInputsEventArgs):
-        if not skipValidate:
-            self.errorMessageTextInput.text = ''
-
-            # Verify that at lesat 4 teeth are specified.
-            if not self.numTeethStringInput.value.isdigit():
-                self.errorMessageTextInput.text = '警告!!!:齿数必须是一个整数。'
-                args.areInputsValid = False
-                return
-            else:    
+    # Updates the values shown in the dialog that are computed from the inputs.
+    # Nothing is done unless one of the inputs they're computed from changed,
+    # and the text is only set when it's different.
+    def updateDerivedValues(self):
+        if not self.isDerivedValueStale:
+            return
+        self.isDerivedValueStale = False
+        self.eventCounts['derivedValueUpdates'] += 1
+
+        # Update the pitch diameter value.
+        diaPitch = None
+        if self.standardDropDownInput.selectedItem.name == '英制单位':
+            if self.diaPitchValueInput.isValidExpression:
+                diaPitch = self.diaPitchValueInput.value
+        elif self.standardDropDownInput.selectedItem.name == '公制单位':
+            if self.moduleValueInput.isValidExpression:
+                diaPitch = quantities.moduleToDiametralPitch(self.moduleValueInput.value)
+        pitchDiaText = ''
+        if not diaPitch == None:
+            if self.numTeethStringInput.value.isdigit(): 
                 numTeeth = int(self.numTeethStringInput.value)
-            
-            if numTeeth < 4:
-                self.errorMessageTextInput.text = '警告!!!:齿数必须 ≥ 4'
-                args.areInputsValid = False
-                return
-                
-            # Calculate some of the gear sizes to use in validation.
-            if self.standardDropDownInput.selectedItem.name == '英制单位':
-                if self.diaPitchValueInput.isValidExpression:
-                    diaPitch = self.diaPitchValueInput.value
-                else:
-                    args.areInputsValid = False
-                    return
-            elif self.standardDropDownInput.selectedItem.name == '公制单位':
-                if self.moduleValueInput.isValidExpression:
-                    diaPitch = 25.4 / self.moduleValueInput.value
-                else:
-                    args.areInputsValid = False
-                    return
+                pitchDia = numTeeth/diaPitch
+
+                # The pitch dia has been calculated in inches, but this expects cm as the input units.
+                pitchDiaText = self.unitsCache.format(quantities.inchesToCm(pitchDia), self.units)
+
+        if pitchDiaText != self.pitchDiaText:
+            self.pitchDiamTextInput.text = pitchDiaText
+            self.pitchDiaText = pitchDiaText
+
 
-            diametralPitch = diaPitch / 2.54
-            pitchDia = numTeeth / diametralPitch
+    # Updates the dialog to show the inputs for the selected standard.
+    def updateStandard(self):
+        if self.standardDropDownInput.selectedItem.name == '英制单位':
+            self.metricImageInput.isVisible = False
+            self.englishImageInput.isVisible = True
+            
+            self.diaPitchValueInput.isVisible = True
+            self.moduleValueInput.isVisible = False
             
-            if (diametralPitch < (20 *(math.pi/180))-0.000001):
-                dedendum = 1.157 / diametralPitch
+            self.units = 'in'
+        elif self.standardDropDownInput.selectedItem.name == '公制单位':
+            self.metricImageInput.isVisible = True
+            self.englishImageInput.isVisible = False
+            
+            self.diaPitchValueInput.isVisible = False
+            self.moduleValueInput.isVisible = True
+            
+            self.units = 'mm'
+
+        # Set each one to it's current value to work around an issue where
+        # otherwise if the user has edited the value, the value won't update 
+        # in the dialog because apparently it remembers the units when the 
+        # value was edited.  Setting the value using the API resets this.
+        self.backlashValueInput.value = self.backlashValueInput.value
+        self.backlashValueInput.unitType = self.units
+        self.rootFilletRadValueInput.value = self.rootFilletRadValueInput.value
+        self.rootFilletRadValueInput.unitType = self.units
+        self.thicknessValueInput.value = self.thicknessValueInput.value
+        self.thicknessValueInput.unitType = self.units
+        self.holeDiamValueInput.value = self.holeDiamValueInput.value
+        self.holeDiamValueInput.unitType = self.units
+
+
+    # Returns the pressure angle in radians selected in the dialog.
+    def getPressureAngle(self):
+        if self.pressureAngleListInput.selectedItem.name == '自定义':
+            return self.pressureAngleCustomValueInput.value
+        elif self.pressureAngleListInput.selectedItem.name == '14.5 deg':
+            return 14.5 * (math.pi/180)
+        elif self.pressureAngleListInput.selectedItem.name == '20 deg':
+            return 20.0 * (math.pi/180)
+        else:
+            return 25.0 * (math.pi/180)
+
+
+    # Fills the preset list with the presets matching the search text.
+    def searchPresets(self):
+        self.presetResults = presets.presetStore.search(self.presetSearchStringInput.value)
+
+        listItems = self.presetListInput.listItems
+        listItems.clear()
+        for preset in self.presetResults:
+            if preset['standard'] == 'English':
+                label = preset['name'] + ' (DP ' + format(preset['diaPitch'], 'g') + ', ' + str(preset['numTeeth']) + '齿)'
             else:
-                circularPitch = math.pi / diametralPitch
-                if circularPitch >= 20:
-                    dedendum = 1.25 / diametralPitch
-                else:
-                    dedendum = (1.2 / diametralPitch) + (.002 * 2.54)                
+                label = preset['name'] + ' (m ' + format(preset['module'], 'g') + ', ' + str(preset['numTeeth']) + '齿)'
+            listItems.add(label, False)
 
-            rootDia = pitchDia - (2 * dedendum)        
-                    
-            if self.pressureAngleListInput.selectedItem.name == '自定义':
-                pressureAngle = self.pressureAngleCustomValueInput.value
+
+    # Sets the dialog inputs to the values of a preset.
+    def applyPreset(self, preset):
+        if preset['standard'] == 'English':
+            self.standardDropDownInput.listItems.item(0).isSelected = True
+        else:
+            self.standardDropDownInput.listItems.item(1).isSelected = True
+        self.updateStandard()
+
+        self.diaPitchValueInput.value = preset['diaPitch']
+        self.moduleValueInput.value = preset['module']
+        self.numTeethStringInput.value = str(preset['numTeeth'])
+
+        # Use one of the standard pressure angles if it matches, otherwise a custom angle.
+        pressureAngleName = '自定义'
+        for standardAngle in ('14.5 deg', '20 deg', '25 deg'):
+            if abs(float(standardAngle.split()[0]) * (math.pi/180) - preset['pressureAngle']) < 0.000001:
+                pressureAngleName = standardAngle
+        for listItem in self.pressureAngleListInput.listItems:
+            if listItem.name == pressureAngleName:
+                listItem.isSelected = True
+        self.pressureAngleCustomValueInput.value = preset['pressureAngle']
+        self.pressureAngleCustomValueInput.isVisible = pressureAngleName == '自定义'
+
+        self.backlashValueInput.value = preset['backlash']
+        self.rootFilletRadValueInput.value = preset['rootFilletRad']
+        self.thicknessValueInput.value = preset['thickness']
+        self.holeDiamValueInput.value = preset['holeDiam']
+        self.profileShiftValueInput.value = preset['profileShift']
+        self.presetNameStringInput.value = preset['name']
+
+
+    # Saves the current dialog values as a preset using the name in the dialog.
+    def savePreset(self):
+        name = self.presetNameStringInput.value.strip()
+        if name == '':
+            ui.messageBox('请输入预设名称。')
+            return
+
+        if not self.numTeethStringInput.value.isdigit():
+            ui.messageBox('齿数必须是一个整数。')
+            return
+
+        if self.standardDropDownInput.selectedItem.name == '英制单位':
+            standard = 'English'
+            diaPitch = self.diaPitchValueInput.value
+        else:
+            standard = 'Metric'
+            diaPitch = quantities.moduleToDiametralPitch(self.moduleValueInput.value)
+
+        preset = {'name': name,
+                  'standard': standard,
+                  'module': quantities.diametralPitchToModule(diaPitch),
+                  'diaPitch': diaPitch,
+                  'numTeeth': int(self.numTeethStringInput.value),
+                  'pressureAngle': self.getPressureAngle(),
+                  'thickness': self.thicknessValueInput.value,
+                  'holeDiam': self.holeDiamValueInput.value,
+                  'rootFilletRad': self.rootFilletRadValueInput.value,
+                  'backlash': self.backlashValueInput.value,
+                  'profileShift': self.profileShiftValueInput.value}
+        presets.presetStore.save(preset)
+        self.searchPresets()
+
+
+    # Adds the presets from a shop catalog file chosen by the user.
+    def importPresets(self):
+        fileDialog = ui.createFileDialog()
+        fileDialog.title = '导入齿轮目录'
+        fileDialog.filter = 'CSV (*.csv)'
+        if fileDialog.showOpen() != adsk.core.DialogResults.DialogOK:
+            return
+
+        count = presets.presetStore.importCatalog(fileDialog.filename)
+        ui.messageBox('已导入 ' + str(count) + ' 个预设。')
+        self.searchPresets()
+
+
+    # Writes all of the presets to a shop catalog file chosen by the user.
+    def exportPresets(self):
+        fileDialog = ui.createFileDialog()
+        fileDialog.title = '导出齿轮目录'
+        fileDialog.filter = 'CSV (*.csv)'
+        if fileDialog.showSave() != adsk.core.DialogResults.DialogOK:
+            return
+
+        count = presets.presetStore.exportCatalog(fileDialog.filename)
+        ui.messageBox('已导出 ' + str(count) + ' 个预设。')
+
+
+    def HandleValidateInputs(self, args: adsk.core.ValidateInputsEventArgs):
+        if self.updateDepth > 0:
+            self.eventCounts['validateInputsSuppressed'] += 1
+            return
+        self.eventCounts['validateInputs'] += 1
+
+        # Nothing has changed since the last validation so use its result.
+        if not self.isValidationStale:
+            self.eventCounts['validateInputsReused'] += 1
+            args.areInputsValid = self.areInputsValid
+            return
+
+        self.eventCounts['validations'] += 1
+        self.isValidationStale = False
+        self.areInputsValid = self.validateInputs()
+        args.areInputsValid = self.areInputsValid
+
+
+    # Checks the inputs and shows a message for the first problem found.  Returns
+    # whether the inputs are valid.
+    def validateInputs(self):
+        self.errorMessageTextInput.text = ''
+
+        # Verify that the number of teeth is a whole number.
+        if not self.numTeethStringInput.value.isdigit():
+            self.errorMessageTextInput.text = '警告!!!:齿数必须是一个整数。'
+            return False
+        else:    
+            numTeeth = int(self.numTeethStringInput.value)
+        
+        if self.standardDropDownInput.selectedItem.name == '英制单位':
+            if self.diaPitchValueInput.isValidExpression:
+                diaPitch = self.diaPitchValueInput.value
             else:
-                if self.pressureAngleListInput.selectedItem.name == '14.5 deg':
-                    pressureAngle = 14.5 * (math.pi/180)
-                elif self.pressureAngleListInput.selectedItem.name == '20 deg':
-                    pressureAngle = 20.0 * (math.pi/180)
-                elif self.pressureAngleListInput.selectedItem.name == '25 deg':
-                    pressureAngle = 25.0 * (math.pi/180)
-            baseCircleDia = pitchDia * math.cos(pressureAngle)
-            baseCircleCircumference = 2 * math.pi * (baseCircleDia / 2) 
-
-            if self.holeDiamValueInput.isValidExpression:
-                holeDiam = self.holeDiamValueInput.value
+                return False
+        elif self.standardDropDownInput.selectedItem.name == '公制单位':
+            if self.moduleValueInput.isValidExpression:
+                diaPitch = quantities.moduleToDiametralPitch(self.moduleValueInput.value)
             else:
-                args.areInputsValid = False
-                return
-                            
-            des = adsk.fusion.Design.cast(app.activeProduct)
-            if holeDiam >= (rootDia - 0.01):
-                self.errorMessageTextInput.text = '警告!!!:中心孔直径过大,必须小于 ' + des.unitsManager.formatInternalValue(rootDia - 0.01, self.units, True)
-                args.areInputsValid = False
-                return
-
-            toothThickness = baseCircleCircumference / (numTeeth * 2)
-            if self.rootFilletRadValueInput.value > toothThickness * .4:
-                self.errorMessageTextInput.text = '警告!!!:齿根圆角半径过大,必须小于 ' + des.unitsManager.formatInternalValue(toothThickness * .4, self.units, True)
-                args.areInputsValid = False
-                return
+                return False
+
+        # The rest of the checks are the same for every gear the add-in builds.
+        for valueInput in (self.profileShiftValueInput, self.backlashValueInput, self.holeDiamValueInput,
+                           self.rootFilletRadValueInput, self.thicknessValueInput):
+            if not valueInput.isValidExpression:
+                return False
+
+        gearValues = getGearValues(diaPitch, numTeeth, self.thicknessValueInput.value, self.rootFilletRadValueInput.value,
+                                   self.getPressureAngle(), self.backlashValueInput.value, self.holeDiamValueInput.value,
+                                   self.getSelectedDetail(), None, self.profileShiftValueInput.value)
+        problem = checkGearValues(gearValues, lambda length: self.unitsCache.format(length, self.units))
+        if problem is not None:
+            self.errorMessageTextInput.text = '警告!!!:' + problem
+            return False
+
+        return True
 
 
     def HandleExecute(self, args: adsk.core.CommandEventArgs):
         if self.standardDropDownInput.selectedItem.name == '英制单位':
             diaPitch = self.diaPitchValueInput.value            
         elif self.standardDropDownInput.selectedItem.name == '公制单位':
-            diaPitch = 25.4 / self.moduleValueInput.value
+            diaPitch = quantities.moduleToDiametralPitch(self.moduleValueInput.value)
         
         # Save the current values as attributes.
         settings = {'Standard': self.standardDropDownInput.selectedItem.name,
@@ -309,10 +546,13 @@ class SpurGearLogic():
                     'PressureAngleCustom': str(self.pressureAngleCustomValueInput.value),
                     'DiaPitch': str(diaPitch),
                     'NumTeeth': str(self.numTeethStringInput.value),
+                    'ProfileShift': str(self.profileShiftValueInput.value),
                     'RootFilletRad': str(self.rootFilletRadValueInput.value),
                     'Thickness': str(self.thicknessValueInput.value),
                     'HoleDiam': str(self.holeDiamValueInput.value),
-                    'Backlash': str(self.backlashValueInput.value)}
+                    'Backlash': str(self.backlashValueInput.value),
+                    'Detail': self.getSelectedDetail(),
+                    'Family': str(self.familyBoolInput.value)}
 
         jsonSettings = json.dumps(settings)
 
@@ -321,42 +561,45 @@ class SpurGearLogic():
         attribs.add('SpurGear', 'settings', jsonSettings)
 
         # Get the current values.
-        if self.pressureAngleListInput.selectedItem.name == '自定义':
-            pressureAngle = self.pressureAngleCustomValueInput.value
-        else:
-            if self.pressureAngleListInput.selectedItem.name == '14.5 deg':
-                pressureAngle = 14.5 * (math.pi/180)
-            elif self.pressureAngleListInput.selectedItem.name == '20 deg':
-                pressureAngle = 20.0 * (math.pi/180)
-            elif self.pressureAngleListInput.selectedItem.name == '25 deg':
-                pressureAngle = 25.0 * (math.pi/180)
+        pressureAngle = self.getPressureAngle()
 
         numTeeth = int(self.numTeethStringInput.value)
+        profileShift = self.profileShiftValueInput.value
         rootFilletRad = self.rootFilletRadValueInput.value
         thickness = self.thicknessValueInput.value
         holeDiam = self.holeDiamValueInput.value
         backlash = self.backlashValueInput.value
+        detail = self.getSelectedDetail()
 
-        # Create the gear.
-        start = time.time()
-        gearComp = drawGear(des, diaPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam)
-        end = time.time()
-        app.log(f'Time to create spur gear: {end - start} seconds.')            
+        # Create the gear.  The time of each stage is saved in the history.
+        gearComp = drawGear(des, diaPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, self.familyBoolInput.value, profileShift)
 
         # If the gear was created, add a description to the component.
         if gearComp:
             if self.standardDropDownInput.selectedItem.name == '英制单位':
                 desc = 'Spur Gear; Diametrial Pitch: ' + str(diaPitch) + '; '            
             elif self.standardDropDownInput.selectedItem.name == '公制单位':
-                desc = 'Spur Gear; Module: ' +  str(25.4 / diaPitch) + '; '
+                desc = 'Spur Gear; Module: ' +  str(quantities.diametralPitchToModule(diaPitch)) + '; '
             
             desc += 'Num Teeth: ' + str(numTeeth) + '; '
             desc += 'Pressure Angle: ' + str(pressureAngle * (180/math.pi)) + '; '
+            if profileShift != 0:
+                desc += 'Profile Shift: ' + str(profileShift) + '; '
             
-            desc += 'Backlash: ' + des.unitsManager.formatInternalValue(backlash, self.units, True)
+            desc += 'Backlash: ' + self.unitsCache.format(backlash, self.units)
             gearComp.description = desc        
 
 
+    # Returns the level of detail currently selected in the dialog.
+    def getSelectedDetail(self):
+        selectedName = self.detailDropDownInput.selectedItem.name
+        for detail, detailName in detailNames.items():
+            if detailName == selectedName:
+                return detail
+
+        return DETAIL_FULL
+
+
 # # Verfies that a value command input has a valid expression and returns the 
 # # value if it does.  Otherwise it returns False.  This works around a 
 # # problem where when you get the value from a ValueCommandInput it causes the
@@ -379,159 +622,683 @@ class SpurGearLogic():
 #         return (False, 0)
 
 
-# Calculate points along an involute curve.
-def involutePoint(baseCircleRadius, distFromCenterToInvolutePoint):
-    # Calculate the other side of the right-angle triangle defined by the base circle and the current distance radius.
-    # This is also the length of the involute chord as it comes off of the base circle.
-    triangleSide = math.sqrt(math.pow(distFromCenterToInvolutePoint,2) - math.pow(baseCircleRadius,2)) 
-    
-    # Calculate the angle of the involute.
-    alpha = triangleSide / baseCircleRadius
-
-    # Calculate the angle where the current involute point is.
-    theta = alpha - math.acos(baseCircleRadius / distFromCenterToInvolutePoint)
-
-    # Calculate the coordinates of the involute point.    
-    x = distFromCenterToInvolutePoint * math.cos(theta)
-    y = distFromCenterToInvolutePoint * math.sin(theta)
-
-    # Create a point to return.        
-    return adsk.core.Point3D.create(x, y, 0)
-
-
-# Builds a spur gear.
-def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam):
+# Builds a spur gear.  If family is True the thickness and the center hole
+# diameter are driven by new user parameters so variants of the gear can be
+# made by changing the parameters instead of building another gear.  The
+# profile shift is in modules.  Any error is shown in a message box and None
+# is returned.
+def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail = DETAIL_FULL, family = False, profileShift = 0):
+    try:
+        return createGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, family, True, profileShift)
+    except Exception as error:
+        ui.messageBox("drawGear Failed : " + str(error)) 
+        return None
+
+
+# Builds a spur gear the same way as drawGear, but raises any error so the 
+# caller can decide how to report it.  Whatever was created for a gear that
+# fails is deleted again so a failed gear doesn't leave a partial component
+# in the design.  The features of the gear are grouped in the timeline unless
+# groupTimeline is False.  The build is added to the history unless
+# recordHistory is False, which the benchmarks use so their gears aren't
+# compared with the gears users build.
+def createGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail = DETAIL_FULL, family = False, groupTimeline = True, profileShift = 0, recordHistory = True):
+    newOcc = None
+    parameters = None
+    timer = history.StageTimer()
     try:
-        # The diametral pitch is specified in inches but everthing
-        # here expects all distances to be in centimeters, so convert
-        # for the gear creation.
-        diametralPitch = diametralPitch / 2.54
-    
-        # Compute the various values for a gear.
-        pitchDia = numTeeth / diametralPitch
-        
-        #addendum = 1.0 / diametralPitch
-        if (diametralPitch < (20 *(math.pi/180))-0.000001):
-            dedendum = 1.157 / diametralPitch
-        else:
-            circularPitch = math.pi / diametralPitch
-            if circularPitch >= 20:
-                dedendum = 1.25 / diametralPitch
-            else:
-                dedendum = (1.2 / diametralPitch) + (.002 * 2.54)                
-
-        rootDia = pitchDia - (2 * dedendum)
-        
-        baseCircleDia = pitchDia * math.cos(pressureAngle)
-        outsideDia = (numTeeth + 2) / diametralPitch
-        
         # Create a new component by creating an occurrence.
         occs = design.rootComponent.occurrences
         mat = adsk.core.Matrix3D.create()
         newOcc = occs.addNewComponent(mat)        
         newComp = adsk.fusion.Component.cast(newOcc.component)
-        
-        # Create a new sketch.
-        sketches = newComp.sketches
-        xyPlane = newComp.xYConstructionPlane
-        baseSketch = sketches.add(xyPlane)
 
-        # Draw a circle for the base.
-        baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), rootDia/2.0)
-        
-        # Draw a circle for the center hole, if the value is greater than 0.
-        prof = adsk.fusion.Profile.cast(None)
-        if holeDiam - (app.pointTolerance * 2) > 0:
-            baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), holeDiam/2.0)
-
-            # Find the profile that uses both circles.
-            for prof in baseSketch.profiles:
-                if prof.profileLoops.count == 2:
-                    break
-        else:
-            # Use the single profile.
-            prof = baseSketch.profiles.item(0)
-        
-        #### Extrude the circle to create the base of the gear.
+        if family:
+            parameters = createFamilyParameters(design, thickness, holeDiam)
+        timer.lap('component')
 
-        # Create an extrusion input to be able to define the input needed for an extrusion
-        # while specifying the profile and that a new component is to be created
-        extrudes = newComp.features.extrudeFeatures
-        extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+        firstIndex = design.timeline.markerPosition
+        diametralPitchSketch = buildGearGeometry(newComp, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, parameters, timer, profileShift)
 
-        # Define that the extent is a distance extent of 5 cm.
-        distance = adsk.core.ValueInput.createByReal(thickness)
-        extInput.setDistanceExtent(False, distance)
-
-        # Create the extrusion.
-        baseExtrude = extrudes.add(extInput)
-        
-        # Create a second sketch for the tooth.
-        toothSketch = sketches.add(xyPlane)
-
-        # Calculate points along the involute curve.
-        involutePointCount = 15 
-        involuteIntersectionRadius = baseCircleDia / 2.0
-        involutePoints = []
-        involuteSize = (outsideDia - baseCircleDia) / 2.0
-        for i in range(0, involutePointCount):
-            involuteIntersectionRadius = (baseCircleDia / 2.0) + ((involuteSize / (involutePointCount - 1)) * i)
-            newPoint = involutePoint(baseCircleDia / 2.0, involuteIntersectionRadius)
-            involutePoints.append(newPoint)
-            
-        # Get the point along the tooth that's at the pitch diameter and then
-        # calculate the angle to that point.
-        pitchInvolutePoint = involutePoint(baseCircleDia / 2.0, pitchDia / 2.0)
-        pitchPointAngle = math.atan(pitchInvolutePoint.y / pitchInvolutePoint.x)
-
-        # Determine the angle defined by the tooth thickness as measured at
-        # the pitch diameter circle.
-        toothThicknessAngle = (2 * math.pi) / (2 * numTeeth)
+        # Save the sketches and features of the gear so a rebuild only deletes
+        # those and not ones added to the component later.
+        newComp.attributes.add('SpurGear', 'Features', json.dumps(getTimelineTokens(design.timeline, firstIndex)))
         
-        # Determine the angle needed for the specified backlash.
-        backlashAngle = (backlash / (pitchDia / 2.0)) * .25
+        # Group everything used to create the gear in the timeline.
+        if groupTimeline:
+            timelineGroups = design.timeline.timelineGroups
+            newOccIndex = newOcc.timelineObject.index
+            pitchSketchIndex = diametralPitchSketch.timelineObject.index
+            timelineGroup = timelineGroups.add(newOccIndex, pitchSketchIndex)
+            timelineGroup.name = 'Spur Gear'
         
-        # Determine the angle to rotate the curve.
-        rotateAngle = -((toothThicknessAngle/2) + pitchPointAngle - backlashAngle)
+        # Add an attribute to the component with all of the input values.  This is
+        # used to rebuild the gear at a different level of detail.
+        gearValues = getGearValues(diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, parameters, profileShift)
+        writeGearValues(newComp, gearValues)
         
-        # Rotate the involute so the middle of the tooth lies on the x axis.
-        cosAngle = math.cos(rotateAngle)
-        sinAngle = math.sin(rotateAngle)
-        for i in range(0, involutePointCount):
-            newX = involutePoints[i].x * cosAngle - involutePoints[i].y * sinAngle
-            newY = involutePoints[i].x * sinAngle + involutePoints[i].y * cosAngle
-            involutePoints[i] = adsk.core.Point3D.create(newX, newY, 0)
-
-        # Create a new set of points with a negated y.  This effectively mirrors the original
-        # points about the X axis.
-        involute2Points = []
-        for i in range(0, involutePointCount):
-            involute2Points.append(adsk.core.Point3D.create(involutePoints[i].x, -involutePoints[i].y, 0))
-
-        # Calculate the angle of each involute point relative to the X axis.
-        curve1Angle = []
-        curve2Angle = []
-        for i in range(0, involutePointCount):
-            curve1Angle.append(math.atan(involutePoints[i].y / involutePoints[i].x))
-            curve2Angle.append(math.atan(involute2Points[i].y / involute2Points[i].x))      
-
-        toothSketch.isComputeDeferred = True
-		
-        # Create and load an object collection with the points.
-        pointSet = adsk.core.ObjectCollection.create()
-        for i in range(0, involutePointCount):
-            pointSet.add(involutePoints[i])
-
-        # Create the first spline.
-        spline1 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet)
-
-        # Add the involute points for the second spline to an ObjectCollection.
-        pointSet = adsk.core.ObjectCollection.create()
-        for i in range(0, involutePointCount):
-            pointSet.add(involute2Points[i])
-
-        # Create the second spline.
-        spline2 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet)
+        newComp.name = 'Spur Gear (' + str(numTeeth) + ' teeth)'
+        timer.lap('finish')
+    except Exception:
+        deletePartialGear(design, newOcc, parameters)
+        raise
+
+    # The gear is finished, so nothing the history does can delete it.
+    if recordHistory:
+        history.recordBuild(gearValues, 'Component', timer, app.version)
+    app.log(f'Time to create spur gear: {timer.total()} seconds.')
+    return newComp
+
+
+# Builds a spur gear as a new body in an existing component, which lets many
+# gears share a single component instead of each having its own.  The gear
+# values are saved on the body.  Raises any error after deleting the features
+# that were created for the gear.  The build is added to the history unless
+# recordHistory is False, like createGear.  Returns the new body.
+def createGearBody(design, comp, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail = DETAIL_FULL, groupTimeline = True, profileShift = 0, recordHistory = True):
+    timeline = design.timeline
+    firstIndex = timeline.markerPosition
+    timer = history.StageTimer()
+    try:
+        diametralPitchSketch = buildGearGeometry(comp, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, None, timer, profileShift)
+
+        # The gear is the last body of the component because the first feature
+        # of every level of detail creates a new body and the others add to it.
+        body = comp.bRepBodies.item(comp.bRepBodies.count - 1)
+        gearValues = getGearValues(diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, None, profileShift)
+        writeGearValues(body, gearValues)
+
+        # Save the sketches and features of the gear so they can be deleted
+        # when the gear is rebuilt without touching the other gear bodies.
+        body.attributes.add('SpurGear', 'Features', json.dumps(getTimelineTokens(timeline, firstIndex)))
+        body.name = 'Spur Gear (' + str(numTeeth) + ' teeth)'
+
+        if groupTimeline:
+            timelineGroup = timeline.timelineGroups.add(firstIndex, diametralPitchSketch.timelineObject.index)
+            timelineGroup.name = 'Spur Gear'
+        timer.lap('finish')
+    except Exception:
+        # Delete the features of the gear, last first.
+        try:
+            for i in range(timeline.markerPosition - 1, firstIndex - 1, -1):
+                timeline.item(i).entity.deleteMe()
+        except Exception:
+            pass
+        raise
+
+    if recordHistory:
+        history.recordBuild(gearValues, 'Body', timer, app.version)
+    return body
+
+
+# Returns the entity tokens of the sketches and features added to the
+# timeline from firstIndex on, which are the ones just created for a gear.
+def getTimelineTokens(timeline, firstIndex):
+    tokens = []
+    for i in range(firstIndex, timeline.markerPosition):
+        entity = timeline.item(i).entity
+        if entity is not None:
+            tokens.append(entity.entityToken)
+    return tokens
+
+
+# Checks the values of a gear the way the spur gear dialog does, so a gear
+# built from a catalog or a family table can't have values the dialog
+# wouldn't accept.  The values are like the ones saved on a gear, with the
+# diametral pitch in teeth per inch and lengths in centimeters, and
+# formatLength formats a length for a message.  Returns the problem with the
+# first value that's wrong, or None.
+def checkGearValues(gearValues, formatLength):
+    numTeeth = gearValues['numTeeth']
+    if numTeeth < 4:
+        return '齿数必须 ≥ 4'
+
+    if gearValues['diametralPitch'] <= 0:
+        return '径节和模数必须大于 0'
+
+    if gearValues['thickness'] <= 0:
+        return '齿轮厚度必须大于 0'
+
+    diametralPitch = quantities.diametralPitchPerCm(gearValues['diametralPitch'])
+    profileShift = gearValues['profileShift']
+    backlash = gearValues['backlash']
+    (pitchDia, rootDia, baseCircleDia, outsideDia) = gearMath.gearDiameters(diametralPitch, numTeeth, gearValues['pressureAngle'], profileShift)
+
+    # A pointed tooth also makes an outline that can't be drawn, so the sign
+    # of the shift tells which way it's wrong.
+    if (not gearMath.isValidToothOutline(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift, gearValues['rootFilletRad']) or
+            gearMath.tipHalfAngle(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, profileShift) <= 0):
+        if profileShift < 0:
+            return '变位系数过小,根切穿过齿形或齿顶低于分度圆。'
+        return '变位系数过大,齿顶变尖。'
+
+    if gearValues['holeDiam'] >= (rootDia - 0.01):
+        return '中心孔直径过大,必须小于 ' + formatLength(rootDia - 0.01)
+
+    baseCircleCircumference = 2 * math.pi * (baseCircleDia / 2)
+    toothThickness = baseCircleCircumference / (numTeeth * 2)
+    if gearValues['rootFilletRad'] > toothThickness * .4:
+        return '齿根圆角半径过大,必须小于 ' + formatLength(toothThickness * .4)
+
+    return None
+
+
+# Returns the values saved on a gear.
+def getGearValues(diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, parameters, profileShift = 0):
+    gearValues = {}
+    gearValues['diametralPitch'] = diametralPitch
+    gearValues['numTeeth'] = numTeeth
+    gearValues['thickness'] = thickness
+    gearValues['rootFilletRad'] = rootFilletRad
+    gearValues['pressureAngle'] = pressureAngle
+    gearValues['holeDiam'] = holeDiam
+    gearValues['backlash'] = backlash
+    gearValues['profileShift'] = profileShift
+    gearValues['detail'] = detail
+    gearValues['parameters'] = parameters
+    return gearValues
+
+
+# Deletes what was created for a gear that failed.  Errors are ignored so
+# the original error is the one that's reported.
+def deletePartialGear(design, occ, parameters):
+    try:
+        if occ is not None and occ.isValid:
+            occ.deleteMe()
+
+        if parameters:
+            for name in parameters.values():
+                param = design.userParameters.itemByName(name)
+                if param is not None:
+                    param.deleteMe()
+    except Exception:
+        pass
+
+
+# Creates the user parameters that drive a gear of a family and returns a
+# dictionary of the parameter names.  The parameters are named after the 
+# first "SpurGear<n>" prefix that isn't already used in the design.
+def createFamilyParameters(design, thickness, holeDiam):
+    userParams = design.userParameters
+    index = 1
+    while userParams.itemByName('SpurGear' + str(index) + '_thickness') is not None:
+        index += 1
+    prefix = 'SpurGear' + str(index) + '_'
+
+    units = design.unitsManager.defaultLengthUnits
+    parameters = {}
+    userParams.add(prefix + 'thickness', adsk.core.ValueInput.createByReal(thickness), units, '齿轮厚度')
+    parameters['thickness'] = prefix + 'thickness'
+
+    if holeDiam - (app.pointTolerance * 2) > 0:
+        userParams.add(prefix + 'holeDiam', adsk.core.ValueInput.createByReal(holeDiam), units, '中心孔直径')
+        parameters['holeDiam'] = prefix + 'holeDiam'
+
+    return parameters
+
+
+# Saves the values of a gear as a JSON attribute of its component, or of its
+# body for a gear that shares a component, along with the hash of its 
+# specification in a separate attribute so the gears with a given 
+# specification can be found without reading all of the values.
+def writeGearValues(comp, gearValues):
+    savedValues = {'schema': GEAR_VALUES_SCHEMA}
+    savedValues.update(gearValues)
+    comp.attributes.add('SpurGear', 'Values', json.dumps(savedValues))
+    comp.attributes.add('SpurGear', 'SpecHash', getSpecHash(gearValues))
+
+
+# Returns a hash of the specification of a gear.  The values are rounded so 
+# the same gear entered in different units has the same hash.
+def getSpecHash(gearValues):
+    spec = [round(float(gearValues.get(name, 0)), 9) for name in SPEC_VALUES
+            if name not in ADDED_SPEC_VALUES or gearValues.get(name, 0) != 0]
+    return hashlib.sha256(json.dumps(spec).encode('utf-8')).hexdigest()
+
+
+# Returns the hash of the specification saved on a gear by writeGearValues.
+# Gears saved before the hash was added get it computed from their values
+# with getSpecHash, which is what writeGearValues would have saved.
+def readSpecHash(gear, gearValues):
+    attrib = gear.attributes.itemByName('SpurGear', 'SpecHash')
+    if attrib is None:
+        return getSpecHash(gearValues)
+
+    return attrib.value
+
+
+# Reads the values saved on a gear component by drawGear, or on a gear body
+# by createGearBody.  Returns None if it isn't a spur gear.
+def readGearValues(comp):
+    attrib = comp.attributes.itemByName('SpurGear', 'Values')
+    if attrib is None:
+        return None
+
+    return parseGearValues(attrib.value)
+
+
+# Converts the text of a SpurGear/Values attribute to a dictionary of values.
+def parseGearValues(text):
+    try:
+        savedValues = json.loads(text)
+    except ValueError:
+        # Values saved before the layout had a version used str() of a dict 
+        # so they're parsed as a Python literal, which unlike eval can't run
+        # any code.
+        savedValues = ast.literal_eval(text)
+
+    if savedValues.get('schema', 0) > GEAR_VALUES_SCHEMA:
+        raise ValueError('The spur gear was created by a newer version of the add-in.')
+
+    gearValues = {}
+    gearValues['diametralPitch'] = float(savedValues['diametralPitch'])
+    gearValues['numTeeth'] = int(savedValues['numTeeth'])
+    gearValues['thickness'] = float(savedValues['thickness'])
+    gearValues['rootFilletRad'] = float(savedValues['rootFilletRad'])
+    gearValues['pressureAngle'] = float(savedValues['pressureAngle'])
+    gearValues['holeDiam'] = float(savedValues['holeDiam'])
+    gearValues['backlash'] = float(savedValues['backlash'])
+    gearValues['profileShift'] = float(savedValues.get('profileShift', 0))
+    gearValues['detail'] = savedValues.get('detail', DETAIL_FULL)
+    gearValues['parameters'] = savedValues.get('parameters')
+    return gearValues
+
+
+# Finds every spur gear in the design using the attribute index of the design
+# instead of walking the occurrences.  Returns a list of (gear, gearValues)
+# tuples, where the gear is its component, or its body for a gear built as a
+# body of a shared component.
+def findGears(design):
+    gears = []
+    for attrib in design.findAttributes('SpurGear', 'Values'):
+        gear = adsk.fusion.Component.cast(attrib.parent)
+        if gear is None:
+            gear = adsk.fusion.BRepBody.cast(attrib.parent)
+        if gear is not None:
+            gears.append((gear, parseGearValues(attrib.value)))
+
+    return gears
+
+
+# Returns the gears of a component, which is the component itself if it's a
+# gear, otherwise the gear bodies it has.
+def getComponentGears(comp):
+    if comp.attributes.itemByName('SpurGear', 'Values') is not None:
+        return [comp]
+
+    return [body for body in comp.bRepBodies if body.attributes.itemByName('SpurGear', 'Values') is not None]
+
+
+# Returns the component of a gear found by findGears, which for a gear body
+# is the component the body is in.
+def getGearComponent(gear):
+    body = adsk.fusion.BRepBody.cast(gear)
+    if body is not None:
+        return body.parentComponent
+
+    return gear
+
+
+# Returns the number of copies of a gear in the design, which is the number 
+# of occurrences of its component.
+def countGearOccurrences(design, gear):
+    comp = getGearComponent(gear)
+    if comp == design.rootComponent:
+        return 1
+
+    return design.rootComponent.allOccurrencesByComponent(comp).count
+
+
+# Returns the sketches of a component followed by its features.
+def getComponentFeatures(comp):
+    entities = [comp.sketches.item(i) for i in range(comp.sketches.count)]
+    entities.extend(comp.features.item(i) for i in range(comp.features.count))
+    return entities
+
+
+# Returns the sketches and features the add-in created for a gear component,
+# in the order they were created.  They're found from the tokens saved when
+# the gear was built.  Gears saved before the tokens were added get the ones
+# in the 'Spur Gear' timeline group of their first sketch.  Returns None for
+# a gear with neither, whose features can't be told apart from ones added to
+# the component later.  Tokens of the same entity can differ, so entities
+# are compared instead.
+def getGearFeatures(comp):
+    featuresAttrib = comp.attributes.itemByName('SpurGear', 'Features')
+    if featuresAttrib is not None:
+        design = comp.parentDesign
+        gearFeatures = []
+        for token in json.loads(featuresAttrib.value):
+            gearFeatures.extend(entity for entity in design.findEntityByToken(token) if entity.isValid)
+        return gearFeatures
+
+    if comp.sketches.count == 0:
+        return None
+
+    group = comp.sketches.item(0).timelineObject.parentGroup
+    if group is None or group.name != 'Spur Gear':
+        return None
+
+    # The group also holds the occurrence of the component, which isn't one
+    # of its features.
+    componentFeatures = getComponentFeatures(comp)
+    gearFeatures = []
+    for i in range(group.count):
+        entity = group.item(i).entity
+        if entity is not None and entity in componentFeatures:
+            gearFeatures.append(entity)
+    return gearFeatures
+
+
+# Returns the sketches and features of a gear component that the add-in
+# didn't create, like a keyway or a chamfer added by the user.  For a gear
+# whose own features can't be found every sketch and feature is returned,
+# since rebuildGear has to delete them all.
+def getForeignFeatures(comp):
+    gearFeatures = getGearFeatures(comp)
+    if gearFeatures is None:
+        return getComponentFeatures(comp)
+
+    return [entity for entity in getComponentFeatures(comp) if entity not in gearFeatures]
+
+
+# Asks the user whether to rebuild gear components that have sketches or 
+# features the add-in didn't create, which are kept but can fail once the
+# gear they were built on is replaced.  Returns True to rebuild them.
+def confirmRebuild(comps):
+    names = [comp.name for comp in comps if len(getForeignFeatures(comp)) > 0]
+    if len(names) == 0:
+        return True
+
+    result = ui.messageBox('以下齿轮组件包含不是由齿轮插件创建的特征,重建齿轮后这些特征会保留,但可能需要修复:\n' +
+                           '\n'.join(names) + '\n\n是否继续重建?', '重建齿轮',
+                           adsk.core.MessageBoxButtonTypes.YesNoButtonType)
+    return result == adsk.core.DialogResults.DialogYes
+
+
+# Rebuilds an existing gear component from the specified values.  The 
+# sketches and features the add-in created are deleted and the geometry
+# created again, so any occurrences of the component are updated too.  Ones
+# the user added are kept, except on an old gear whose own features can't be
+# found, which has the whole component emptied.  The build is added to the
+# history unless recordHistory is False, like createGear.
+def rebuildGear(comp, gearValues, recordHistory = True):
+    gearFeatures = getGearFeatures(comp)
+    if gearFeatures is None:
+        gearFeatures = getComponentFeatures(comp)
+
+    # Delete them in the reverse order they were created so nothing is left
+    # referencing something that was deleted.
+    for entity in reversed(gearFeatures):
+        if entity.isValid:
+            entity.deleteMe()
+
+    timeline = comp.parentDesign.timeline
+    firstIndex = timeline.markerPosition
+    timer = history.StageTimer()
+    buildGearGeometry(comp, gearValues['diametralPitch'], gearValues['numTeeth'], gearValues['thickness'],
+                      gearValues['rootFilletRad'], gearValues['pressureAngle'], gearValues['backlash'], 
+                      gearValues['holeDiam'], gearValues['detail'], gearValues['parameters'], timer, gearValues['profileShift'])
+
+    comp.attributes.add('SpurGear', 'Features', json.dumps(getTimelineTokens(timeline, firstIndex)))
+    writeGearValues(comp, gearValues)
+    comp.name = 'Spur Gear (' + str(gearValues['numTeeth']) + ' teeth)'
+    timer.lap('finish')
+
+    if recordHistory:
+        history.recordBuild(gearValues, 'Rebuild', timer, app.version)
+
+
+# Rebuilds a gear body of a shared component from the specified values.  The
+# sketches and features of the gear are deleted and a new body is built in
+# the same component with the same name.  A body saved without the list of
+# its features is removed with a remove feature instead.  Returns the new body.
+def rebuildGearBody(body, gearValues):
+    comp = body.parentComponent
+    design = comp.parentDesign
+    name = body.name
+
+    featuresAttrib = body.attributes.itemByName('SpurGear', 'Features')
+    if featuresAttrib is None:
+        comp.features.removeFeatures.add(body)
+    else:
+        for token in reversed(json.loads(featuresAttrib.value)):
+            for entity in design.findEntityByToken(token):
+                if entity.isValid:
+                    entity.deleteMe()
+
+    newBody = createGearBody(design, comp, gearValues['diametralPitch'], gearValues['numTeeth'], gearValues['thickness'],
+                             gearValues['rootFilletRad'], gearValues['pressureAngle'], gearValues['backlash'],
+                             gearValues['holeDiam'], gearValues['detail'], True, gearValues['profileShift'])
+    newBody.name = name
+    return newBody
+
+
+# Rebuilds an existing gear component, or gear body, at a different level of
+# detail.  Returns True if the gear was rebuilt and False if it already had
+# the requested detail.
+def setGearDetail(gear, detail):
+    gearValues = readGearValues(gear)
+    if gearValues is None or gearValues['detail'] == detail:
+        return False
+
+    gearValues['detail'] = detail
+    if adsk.fusion.BRepBody.cast(gear) is not None:
+        rebuildGearBody(gear, gearValues)
+    else:
+        rebuildGear(gear, gearValues)
+    return True
+
+
+# Creates the geometry of a spur gear in the specified component at the 
+# specified level of detail.  Returns the sketch containing the pitch circle,
+# which is the last thing created for the gear.  If a timer is given the time
+# of building the teeth and the pitch sketch are added to it.
+def buildGearGeometry(comp, diametralPitch, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, detail, parameters = None, timer = None, profileShift = 0):
+    # The diametral pitch is specified in inches but everthing
+    # here expects all distances to be in centimeters, so convert
+    # for the gear creation.
+    diametralPitch = quantities.diametralPitchPerCm(diametralPitch)
+
+    # Compute the various values for a gear.
+    (pitchDia, rootDia, baseCircleDia, outsideDia) = gearMath.gearDiameters(diametralPitch, numTeeth, pressureAngle, profileShift)
+
+    if detail == DETAIL_FULL:
+        buildFullTeeth(comp, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, 
+                       pitchDia, rootDia, baseCircleDia, outsideDia, parameters, profileShift)
+    elif detail == DETAIL_POLYGON:
+        buildPolygonTeeth(comp, numTeeth, thickness, pressureAngle, backlash, holeDiam, 
+                          pitchDia, rootDia, baseCircleDia, outsideDia, parameters, profileShift)
+    elif detail == DETAIL_PITCH_CYLINDER:
+        buildCylinder(comp, pitchDia, thickness, holeDiam, parameters)
+    else:
+        buildCylinder(comp, outsideDia, thickness, holeDiam, parameters)
+    if timer:
+        timer.lap('teeth')
+
+    # Create an extra sketch that contains a circle of the diametral pitch.
+    diametralPitchSketch = comp.sketches.add(comp.xYConstructionPlane)
+    diametralPitchCircle = diametralPitchSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), pitchDia/2.0)
+    diametralPitchCircle.isConstruction = True
+    diametralPitchCircle.isFixed = True
+    if timer:
+        timer.lap('pitchSketch')
+
+    return diametralPitchSketch
+
+
+# Finds the profile of a sketch that should be extruded for the gear.  If 
+# there's a center hole, it's the profile that has both the outer loop and 
+# the hole, otherwise there's only a single profile.
+def getGearProfile(sketch, hasHole):
+    if hasHole:
+        for prof in sketch.profiles:
+            if prof.profileLoops.count == 2:
+                return prof
+
+    return sketch.profiles.item(0)
+
+
+# Returns the value to use for the thickness of a gear, which is the name of 
+# the thickness parameter for a gear that's part of a family.
+def getThicknessInput(thickness, parameters):
+    if parameters:
+        return adsk.core.ValueInput.createByString(parameters['thickness'])
+    else:
+        return adsk.core.ValueInput.createByReal(thickness)
+
+
+# Draws the circle for the center hole, if the value is greater than 0, and 
+# returns whether it was drawn.  For a gear that's part of a family the 
+# circle is centered on the origin and its diameter is driven by the hole 
+# diameter parameter.
+def addHoleCircle(sketch, holeDiam, parameters):
+    if holeDiam - (app.pointTolerance * 2) <= 0:
+        return False
+
+    circle = sketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), holeDiam/2.0)
+    if parameters and 'holeDiam' in parameters:
+        sketch.geometricConstraints.addCoincident(circle.centerSketchPoint, sketch.originPoint)
+        dimension = sketch.sketchDimensions.addDiameterDimension(circle, adsk.core.Point3D.create(holeDiam/2.0, holeDiam/2.0, 0))
+        dimension.parameter.expression = parameters['holeDiam']
+
+    return True
+
+
+# Builds a placeholder gear that is a cylinder of the specified diameter.
+def buildCylinder(comp, diameter, thickness, holeDiam, parameters):
+    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    circle = sketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), diameter/2.0)
+    circle.isFixed = True
+
+    hasHole = addHoleCircle(sketch, holeDiam, parameters)
+
+    extrudes = comp.features.extrudeFeatures
+    extInput = extrudes.createInput(getGearProfile(sketch, hasHole), adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extInput.setDistanceExtent(False, getThicknessInput(thickness, parameters))
+    extrudes.add(extInput)
+
+
+# Builds a placeholder gear where each tooth is approximated by four straight 
+# lines.  The whole outline is drawn in a single sketch and extruded once, so
+# there aren't any splines, fillets or patterns to compute.
+def buildPolygonTeeth(comp, numTeeth, thickness, pressureAngle, backlash, holeDiam, pitchDia, rootDia, baseCircleDia, outsideDia, parameters, profileShift = 0):
+    # Calculate the half angle of the tooth at the root and at the outside 
+    # diameter using the involute function, which gives the same tooth 
+    # thickness at the pitch diameter as the full detail gear.
+    def halfToothAngle(radius):
+        radius = max(radius, baseCircleDia / 2.0)
+        pressureAngleAtRadius = math.acos((baseCircleDia / 2.0) / radius)
+        involuteDifference = (math.tan(pressureAngle) - pressureAngle) - (math.tan(pressureAngleAtRadius) - pressureAngleAtRadius)
+        backlashAngle = (backlash / (pitchDia / 2.0)) * .25
+        shiftAngle = 2 * profileShift * math.tan(pressureAngle) / numTeeth
+        return (math.pi / (2 * numTeeth)) + shiftAngle + involuteDifference - backlashAngle
+
+    rootAngle = halfToothAngle(rootDia / 2.0)
+    tipAngle = halfToothAngle(outsideDia / 2.0)
+
+    points = []
+    for tooth in range(0, numTeeth):
+        toothAngle = (2 * math.pi / numTeeth) * tooth
+        for (radius, angle) in ((rootDia / 2.0, toothAngle - rootAngle), (outsideDia / 2.0, toothAngle - tipAngle),
+                                (outsideDia / 2.0, toothAngle + tipAngle), (rootDia / 2.0, toothAngle + rootAngle)):
+            points.append(adsk.core.Point3D.create(radius * math.cos(angle), radius * math.sin(angle), 0))
+
+    sketch = comp.sketches.add(comp.xYConstructionPlane)
+    sketch.isComputeDeferred = True
+
+    # Connect the points with lines, reusing the end of the previous line so 
+    # the outline is a single closed loop.
+    lines = sketch.sketchCurves.sketchLines
+    firstLine = lines.addByTwoPoints(points[0], points[1])
+    lastLine = firstLine
+    for i in range(2, len(points)):
+        lastLine = lines.addByTwoPoints(lastLine.endSketchPoint, points[i])
+    lines.addByTwoPoints(lastLine.endSketchPoint, firstLine.startSketchPoint)
+
+    # Fix the outline so only the hole changes when its parameter does.
+    for line in lines:
+        line.isFixed = True
+
+    hasHole = addHoleCircle(sketch, holeDiam, parameters)
+
+    sketch.isComputeDeferred = False
+
+    extrudes = comp.features.extrudeFeatures
+    extInput = extrudes.createInput(getGearProfile(sketch, hasHole), adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extInput.setDistanceExtent(False, getThicknessInput(thickness, parameters))
+    extrudes.add(extInput)
+
+
+# Builds the full detail gear with involute teeth.  When the involute doesn't
+# reach the root circle, or the profile is shifted, the flank is generated
+# by the rack that cuts the gear instead, with the root fillet radius as the
+# tip radius of the rack, so the root has the fillet and any undercut the
+# cutting leaves.  A rack without a flat at its tip can't cut the root, so
+# then the involute is joined to the root with radial lines.
+def buildFullTeeth(comp, numTeeth, thickness, rootFilletRad, pressureAngle, backlash, holeDiam, pitchDia, rootDia, baseCircleDia, outsideDia, parameters, profileShift = 0):
+    # Create a new sketch.
+    sketches = comp.sketches
+    xyPlane = comp.xYConstructionPlane
+    baseSketch = sketches.add(xyPlane)
+
+    # Draw a circle for the base.
+    rootCircle = baseSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), rootDia/2.0)
+    rootCircle.isFixed = True
+    
+    # Draw a circle for the center hole, if the value is greater than 0, and
+    # find the profile that uses both circles.
+    hasHole = addHoleCircle(baseSketch, holeDiam, parameters)
+    prof = getGearProfile(baseSketch, hasHole)
+    
+    #### Extrude the circle to create the base of the gear.
+
+    # Create an extrusion input to be able to define the input needed for an extrusion
+    # while specifying the profile and that a new component is to be created
+    extrudes = comp.features.extrudeFeatures
+    extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+
+    # Define that the extent is a distance extent of the gear thickness.
+    distance = getThicknessInput(thickness, parameters)
+    extInput.setDistanceExtent(False, distance)
+
+    # Create the extrusion.
+    baseExtrude = extrudes.add(extInput)
+    
+    # Create a second sketch for the tooth.
+    toothSketch = sketches.add(xyPlane)
+
+    isGenerated = gearMath.isGeneratedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, backlash, profileShift)
+    toothSketch.isComputeDeferred = True
+
+    if isGenerated:
+        # Draw each side of the tooth as a spline for the fillet and one for 
+        # the involute.  The other side is the same points with a negated y,
+        # which mirrors them about the X axis.
+        pieces = gearMath.generatedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift, rootFilletRad)
+        side1 = addFlankSplines(toothSketch, pieces, 1)
+        side2 = addFlankSplines(toothSketch, pieces, -1)
+
+        # Draw the arc for the top of the tooth and close the tooth with a 
+        # line across the root, which is inside the base of the gear.
+        midPoint = adsk.core.Point3D.create((outsideDia / 2), 0, 0)
+        toothSketch.sketchCurves.sketchArcs.addByThreePoints(side1[-1].endSketchPoint, midPoint, side2[-1].endSketchPoint)
+        toothSketch.sketchCurves.sketchLines.addByTwoPoints(side2[0].startSketchPoint, side1[0].startSketchPoint)
+    else:
+        # Calculate the points along one side of the tooth.  The other side is the
+        # same points with a negated y, which mirrors them about the X axis.
+        (involuteXs, involuteYs) = gearMath.toothFlank(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, profileShift=profileShift)
+
+        # Create and load an object collection with the points of each side.
+        pointSet1 = adsk.core.ObjectCollection.create()
+        pointSet2 = adsk.core.ObjectCollection.create()
+        for i in range(0, len(involuteXs)):
+            pointSet1.add(adsk.core.Point3D.create(involuteXs[i], involuteYs[i], 0))
+            pointSet2.add(adsk.core.Point3D.create(involuteXs[i], -involuteYs[i], 0))
+
+        # Create the splines.
+        spline1 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet1)
+        spline2 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet2)
 
         # Draw the arc for the top of the tooth.
         midPoint = adsk.core.Point3D.create((outsideDia / 2), 0, 0)
@@ -542,10 +1309,14 @@ def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressur
         if( baseCircleDia < rootDia ):
             toothSketch.sketchCurves.sketchLines.addByTwoPoints(spline2.startSketchPoint, spline1.startSketchPoint)
         else:
-            rootPoint1 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve1Angle[0] ), (rootDia / 2) * math.sin(curve1Angle[0]), 0)
+            # The angle of the start of each involute relative to the X axis.
+            curve1Angle = math.atan(involuteYs[0] / involuteXs[0])
+            curve2Angle = -curve1Angle
+
+            rootPoint1 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve1Angle), (rootDia / 2) * math.sin(curve1Angle), 0)
             line1 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint1, spline1.startSketchPoint)
 
-            rootPoint2 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve2Angle[0]), (rootDia / 2) * math.sin(curve2Angle[0]), 0)
+            rootPoint2 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve2Angle), (rootDia / 2) * math.sin(curve2Angle), 0)
             line2 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint2, spline2.startSketchPoint)
 
             baseLine = toothSketch.sketchCurves.sketchLines.addByTwoPoints(line1.startSketchPoint, line2.startSketchPoint)
@@ -555,97 +1326,93 @@ def drawGear(design, diametralPitch, numTeeth, thickness, rootFilletRad, pressur
             line2.isFixed = True
             toothSketch.geometricConstraints.addTangent(spline1, line1)
             toothSketch.geometricConstraints.addTangent(spline2, line2)
-        
-        toothSketch.isComputeDeferred = False
+    
+    toothSketch.isComputeDeferred = False
 
-        ### Extrude the tooth.
-        
-        # Get the profile defined by the tooth.
-        prof = toothSketch.profiles.item(0)
+    ### Extrude the tooth.
+    
+    # Get the profile defined by the tooth.
+    prof = toothSketch.profiles.item(0)
 
-        # Create an extrusion input to be able to define the input needed for an extrusion
-        # while specifying the profile and that a new component is to be created
-        extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.JoinFeatureOperation)
+    # Create an extrusion input to be able to define the input needed for an extrusion
+    # while specifying the profile and that a new component is to be created
+    extInput = extrudes.createInput(prof, adsk.fusion.FeatureOperations.JoinFeatureOperation)
 
-        # Define that the extent is a distance extent of 5 cm.
-        distance = adsk.core.ValueInput.createByReal(thickness)
-        extInput.setDistanceExtent(False, distance)
+    # Only join the base of this gear, in case other gears share the component.
+    extInput.participantBodies = [baseExtrude.bodies.item(0)]
 
-        # Create the extrusion.
-        toothExtrude = extrudes.add(extInput)
+    # Define that the extent is a distance extent of the gear thickness.
+    distance = getThicknessInput(thickness, parameters)
+    extInput.setDistanceExtent(False, distance)
 
-        # Get the side faces created by the extrude and save their entity tokens.
-        tokens = []
-        for sideFace in toothExtrude.sideFaces:
-            tokens.append(sideFace.entityToken)
+    # Create the extrusion.
+    toothExtrude = extrudes.add(extInput)
 
-        baseFillet = None
-        if rootFilletRad > 0:
-            ### Find the edges between the base cylinder and the tooth.
-            
-            # Get the outer cylindrical face from the base extrusion by checking the number
-            # of edges and if it's 2 get the other one.
-            cylFace = baseExtrude.sideFaces.item(0)
-            if cylFace.edges.count == 2:
-                cylFace = baseExtrude.sideFaces.item(1)
-    
-            # Get the two linear edges, which are the connection between the cylinder and tooth.
-            edges = adsk.core.ObjectCollection.create()
-            for edge in cylFace.edges:
-                if isinstance(edge.geometry, adsk.core.Line3D):
-                    edges.add(edge)
-    
-            # Create a fillet input to be able to define the input needed for a fillet.
-            fillets = newComp.features.filletFeatures
-            filletInput = fillets.createInput()
-    
-            # Define that the edges and radius of the fillet.
-            radius = adsk.core.ValueInput.createByReal(rootFilletRad)
-            filletInput.addConstantRadiusEdgeSet(edges, radius, False)
-    
-            # Create the fillet.
-            baseFillet = fillets.add(filletInput)
+    # Get the side faces created by the extrude and save their entity tokens.
+    tokens = []
+    for sideFace in toothExtrude.sideFaces:
+        tokens.append(sideFace.entityToken)
 
-        # Create a pattern of the tooth extrude and the base fillet.
-        circularPatterns = newComp.features.circularPatternFeatures
-        entities = adsk.core.ObjectCollection.create()
-        entities.add(toothExtrude)
+    # The fillet of a generated tooth is already part of the sketch.
+    baseFillet = None
+    if rootFilletRad > 0 and not isGenerated:
+        ### Find the edges between the base cylinder and the tooth.
+        
+        # Get the outer cylindrical face from the base extrusion by checking the number
+        # of edges and if it's 2 get the other one.
+        cylFace = baseExtrude.sideFaces.item(0)
+        if cylFace.edges.count == 2:
+            cylFace = baseExtrude.sideFaces.item(1)
+
+        # Get the two linear edges, which are the connection between the cylinder and tooth.
+        edges = adsk.core.ObjectCollection.create()
+        for edge in cylFace.edges:
+            if isinstance(edge.geometry, adsk.core.Line3D):
+                edges.add(edge)
+
+        # Create a fillet input to be able to define the input needed for a fillet.
+        fillets = comp.features.filletFeatures
+        filletInput = fillets.createInput()
+
+        # Define that the edges and radius of the fillet.
+        radius = adsk.core.ValueInput.createByReal(rootFilletRad)
+        filletInput.addConstantRadiusEdgeSet(edges, radius, False)
+
+        # Create the fillet.
+        baseFillet = fillets.add(filletInput)
+
+    # Create a pattern of the tooth extrude and the base fillet.
+    circularPatterns = comp.features.circularPatternFeatures
+    entities = adsk.core.ObjectCollection.create()
+    entities.add(toothExtrude)
+    if baseFillet:
         entities.add(baseFillet)
 
-        cylFace = baseExtrude.sideFaces.item(0)        
-        patternInput = circularPatterns.createInput(entities, cylFace)
-        numTeethInput = adsk.core.ValueInput.createByString(str(numTeeth))
-        patternInput.quantity = numTeethInput
-        patternInput.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute
-        pattern = circularPatterns.add(patternInput)        
-        
-        # Create an extra sketch that contains a circle of the diametral pitch.
-        diametralPitchSketch = sketches.add(xyPlane)
-        diametralPitchCircle = diametralPitchSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), pitchDia/2.0)
-        diametralPitchCircle.isConstruction = True
-        diametralPitchCircle.isFixed = True
-        
-        # Group everything used to create the gear in the timeline.
-        timelineGroups = design.timeline.timelineGroups
-        newOccIndex = newOcc.timelineObject.index
-        pitchSketchIndex = diametralPitchSketch.timelineObject.index
-        timelineGroup = timelineGroups.add(newOccIndex, pitchSketchIndex)
-        timelineGroup.name = 'Spur Gear'
-        
-        # Add an attribute to the component with all of the input values.  This might 
-        # be used in the future to be able to edit the gear.     
-        gearValues = {}
-        gearValues['diametralPitch'] = str(diametralPitch * 2.54)
-        gearValues['numTeeth'] = str(numTeeth)
-        gearValues['thickness'] = str(thickness)
-        gearValues['rootFilletRad'] = str(rootFilletRad)
-        gearValues['pressureAngle'] = str(pressureAngle)
-        gearValues['holeDiam'] = str(holeDiam)
-        gearValues['backlash'] = str(backlash)
-        attrib = newComp.attributes.add('SpurGear', 'Values', str(gearValues))
-        
-        newComp.name = 'Spur Gear (' + str(numTeeth) + ' teeth)'
-        return newComp
-    except Exception as error:
-        ui.messageBox("drawGear Failed : " + str(error)) 
-        return None
\ No newline at end of file
+    cylFace = baseExtrude.sideFaces.item(0)        
+    patternInput = circularPatterns.createInput(entities, cylFace)
+    numTeethInput = adsk.core.ValueInput.createByString(str(numTeeth))
+    patternInput.quantity = numTeethInput
+    patternInput.patternComputeOption = adsk.fusion.PatternComputeOptions.IdenticalPatternCompute
+    pattern = circularPatterns.add(patternInput)
+
+
+# Draws one side of a generated tooth as a fitted spline for each of the 
+# pieces from generatedFlank, with y multiplied by sign so -1 draws the side
+# above the X axis.  Each spline starts at the end of the one before it.
+# Returns the splines from the root to the tip.
+def addFlankSplines(sketch, pieces, sign):
+    splines = []
+    for (xs, ys) in pieces:
+        points = adsk.core.ObjectCollection.create()
+        if splines:
+            points.add(splines[-1].endSketchPoint)
+        else:
+            points.add(adsk.core.Point3D.create(xs[0], ys[0] * sign, 0))
+        for i in range(1, len(xs)):
+            points.add(adsk.core.Point3D.create(xs[i], ys[i] * sign, 0))
+
+        spline = sketch.sketchCurves.sketchFittedSplines.add(points)
+        spline.isFixed = True
+        splines.append(spline)
+
+    return splines
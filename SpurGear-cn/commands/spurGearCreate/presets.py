@@ -0,0 +1,210 @@
+import os
+import re
+import csv
+import math
+import sqlite3
+from ... import config
+from ...lib.gearMath import quantities
+
+# The columns of a preset.  Lengths are in centimeters and angles in radians,
+# which are the internal units of the dialog, except for the module which
+# is in millimeters, the diametral pitch which is teeth per inch and the
+# profile shift which is in modules.
+PRESET_COLUMNS = ('name', 'standard', 'module', 'diaPitch', 'numTeeth', 'pressureAngle',
+                  'thickness', 'holeDiam', 'rootFilletRad', 'backlash', 'profileShift')
+
+# The columns of a shop catalog file.  Catalogs are meant to be edited in a
+# spreadsheet so lengths are in millimeters and angles in degrees.
+CATALOG_COLUMNS = ('name', 'standard', 'module', 'diaPitch', 'numTeeth', 'pressureAngleDeg',
+                   'thicknessMM', 'holeDiamMM', 'rootFilletRadMM', 'backlashMM', 'profileShift')
+
+# The maximum number of presets returned by a search.
+SEARCH_LIMIT = 20
+
+# The tolerance used when searching for a number.
+SEARCH_TOLERANCE = 0.0001
+
+
+# A per-user store of gear presets saved in a SQLite database.  The database
+# isn't opened until the first time it's used, so creating the dialog doesn't
+# wait for it, and every search is answered by an indexed query that returns
+# at most SEARCH_LIMIT presets no matter how many are saved.
+class PresetStore():
+    def __init__(self, filename):
+        self.filename = filename
+        self.connection = None
+
+
+    def connect(self):
+        if self.connection is None:
+            folder = os.path.dirname(self.filename)
+            if not os.path.exists(folder):
+                os.makedirs(folder)
+
+            self.connection = sqlite3.connect(self.filename)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.executescript('''
+                CREATE TABLE IF NOT EXISTS presets (
+                    name TEXT PRIMARY KEY,
+                    standard TEXT NOT NULL,
+                    module REAL NOT NULL,
+                    diaPitch REAL NOT NULL,
+                    numTeeth INTEGER NOT NULL,
+                    pressureAngle REAL NOT NULL,
+                    thickness REAL NOT NULL,
+                    holeDiam REAL NOT NULL,
+                    rootFilletRad REAL NOT NULL,
+                    backlash REAL NOT NULL,
+                    profileShift REAL NOT NULL DEFAULT 0);
+                CREATE INDEX IF NOT EXISTS presetsModule ON presets (module);
+                CREATE INDEX IF NOT EXISTS presetsDiaPitch ON presets (diaPitch);
+                CREATE INDEX IF NOT EXISTS presetsNumTeeth ON presets (numTeeth);
+                CREATE INDEX IF NOT EXISTS presetsHoleDiam ON presets (holeDiam);''')
+
+            # Presets saved before the profile shift was added don't have it,
+            # which is the same as no shift.
+            columns = [row['name'] for row in self.connection.execute('PRAGMA table_info(presets)')]
+            if 'profileShift' not in columns:
+                with self.connection:
+                    self.connection.execute('ALTER TABLE presets ADD COLUMN profileShift REAL NOT NULL DEFAULT 0')
+
+        return self.connection
+
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+    # Finds the presets that match the search text.  The text is made up of
+    # terms separated by spaces where "m2" matches a module of 2, "dp12" a
+    # diametral pitch of 12, "z24" or just "24" 24 teeth and "d10" a bore of
+    # 10 mm.  Any other term has to be part of the preset name, where % and _
+    # are matched as themselves rather than as wildcards.
+    def search(self, text):
+        conditions = []
+        values = []
+        for term in text.lower().split():
+            match = re.fullmatch(r'(m|dp|z|d)=?([0-9]*\.?[0-9]+)', term)
+            if match:
+                key = match.group(1)
+                number = float(match.group(2))
+            elif re.fullmatch(r'[0-9]+', term):
+                key = 'z'
+                number = float(term)
+            else:
+                conditions.append("name LIKE ? ESCAPE '\\'")
+                values.append('%' + escapeLike(term) + '%')
+                continue
+
+            if key == 'z':
+                conditions.append('numTeeth = ?')
+                values.append(int(number))
+            else:
+                if key == 'm':
+                    column = 'module'
+                elif key == 'dp':
+                    column = 'diaPitch'
+                else:
+                    column = 'holeDiam'
+                    number = quantities.mmToCm(number)
+
+                conditions.append(column + ' BETWEEN ? AND ?')
+                values.extend((number - SEARCH_TOLERANCE, number + SEARCH_TOLERANCE))
+
+        query = 'SELECT * FROM presets'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY name LIMIT ' + str(SEARCH_LIMIT)
+
+        return [dict(row) for row in self.connect().execute(query, values)]
+
+
+    # Saves a preset, replacing any existing preset with the same name.
+    def save(self, preset):
+        connection = self.connect()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO presets VALUES (' + ', '.join('?' * len(PRESET_COLUMNS)) + ')',
+                               [preset[column] for column in PRESET_COLUMNS])
+
+
+    # Adds the presets in a shop catalog CSV file, replacing existing presets
+    # with the same name.  All of the presets are added in a single transaction.
+    # Returns the number of presets read from the file.
+    def importCatalog(self, filename):
+        presets = []
+        with open(filename, newline='', encoding='utf-8-sig') as catalogFile:
+            for row in csv.DictReader(catalogFile):
+                presets.append(catalogRowToPreset(row))
+
+        connection = self.connect()
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO presets VALUES (' + ', '.join('?' * len(PRESET_COLUMNS)) + ')',
+                                   [[preset[column] for column in PRESET_COLUMNS] for preset in presets])
+
+        return len(presets)
+
+
+    # Writes all of the presets to a shop catalog CSV file.  Returns the number
+    # of presets written.
+    def exportCatalog(self, filename):
+        count = 0
+        with open(filename, 'w', newline='', encoding='utf-8-sig') as catalogFile:
+            writer = csv.DictWriter(catalogFile, CATALOG_COLUMNS)
+            writer.writeheader()
+            for row in self.connect().execute('SELECT * FROM presets ORDER BY name'):
+                writer.writerow(presetToCatalogRow(dict(row)))
+                count += 1
+
+        return count
+
+
+# Escapes the characters of a search term that are wildcards in LIKE, with
+# a backslash as the escape character.
+def escapeLike(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# Converts a row read from a catalog file to a preset.  A catalog can give
+# either the module or the diametral pitch, the other is computed.  Catalogs
+# written before the profile shift was added don't have it.
+def catalogRowToPreset(row):
+    preset = {}
+    preset['name'] = row['name'].strip()
+    preset['standard'] = row.get('standard') or 'Metric'
+    if row.get('module'):
+        preset['module'] = float(row['module'])
+        preset['diaPitch'] = quantities.moduleToDiametralPitch(preset['module'])
+    else:
+        preset['diaPitch'] = float(row['diaPitch'])
+        preset['module'] = quantities.diametralPitchToModule(preset['diaPitch'])
+    preset['numTeeth'] = int(row['numTeeth'])
+    preset['pressureAngle'] = math.radians(float(row.get('pressureAngleDeg') or 20))
+    preset['thickness'] = quantities.mmToCm(float(row['thicknessMM']))
+    preset['holeDiam'] = quantities.mmToCm(float(row.get('holeDiamMM') or 0))
+    preset['rootFilletRad'] = quantities.mmToCm(float(row.get('rootFilletRadMM') or 0))
+    preset['backlash'] = quantities.mmToCm(float(row.get('backlashMM') or 0))
+    preset['profileShift'] = float(row.get('profileShift') or 0)
+    return preset
+
+
+# Converts a preset to a row of a catalog file.
+def presetToCatalogRow(preset):
+    row = {}
+    row['name'] = preset['name']
+    row['standard'] = preset['standard']
+    row['module'] = round(preset['module'], 6)
+    row['diaPitch'] = round(preset['diaPitch'], 6)
+    row['numTeeth'] = preset['numTeeth']
+    row['pressureAngleDeg'] = round(math.degrees(preset['pressureAngle']), 6)
+    row['thicknessMM'] = round(quantities.cmToMm(preset['thickness']), 6)
+    row['holeDiamMM'] = round(quantities.cmToMm(preset['holeDiam']), 6)
+    row['rootFilletRadMM'] = round(quantities.cmToMm(preset['rootFilletRad']), 6)
+    row['backlashMM'] = round(quantities.cmToMm(preset['backlash']), 6)
+    row['profileShift'] = round(preset['profileShift'], 6)
+    return row
+
+
+# The preset store shared by every dialog in the session.
+presetStore = PresetStore(os.path.join(config.USER_DATA_FOLDER, 'presets.sqlite'))
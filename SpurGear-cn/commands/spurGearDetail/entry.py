@@ -0,0 +1,179 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from ..spurGearCreate import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearDetail'
+CMD_NAME = '齿轮细节切换'
+CMD_Description = ('将选中的齿轮(或全部齿轮)在占位体和完整齿形之间切换')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    inputs = args.command.commandInputs
+
+    gearsInput = inputs.addSelectionInput('gears', '齿轮', '选择要切换细节级别的齿轮')
+    gearsInput.addSelectionFilter('Occurrences')
+    gearsInput.addSelectionFilter('SolidBodies')
+    gearsInput.setSelectionLimits(0)
+
+    inputs.addBoolValueInput('allGears', '设计中的全部齿轮', True, '', False)
+
+    detailInput = inputs.addDropDownCommandInput('detail', '细节级别', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for detail, detailName in logic.detailNames.items():
+        detailInput.listItems.add(detailName, detail == logic.DETAIL_FULL)
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    gearsInput: adsk.core.SelectionCommandInput = inputs.itemById('gears')
+    allGearsInput: adsk.core.BoolValueInput = inputs.itemById('allGears')
+    detailInput: adsk.core.DropDownCommandInput = inputs.itemById('detail')
+
+    detail = logic.DETAIL_FULL
+    for key, detailName in logic.detailNames.items():
+        if detailName == detailInput.selectedItem.name:
+            detail = key
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+
+    # Get the unique gears to rebuild, which are components or the bodies of
+    # gears that share a component.  Several occurrences can reference the 
+    # same component and it only needs to be rebuilt once.
+    gears = []
+    if allGearsInput.value:
+        for (gear, gearValues) in logic.findGears(des):
+            gears.append(gear)
+    else:
+        for i in range(0, gearsInput.selectionCount):
+            entity = gearsInput.selection(i).entity
+            occ = adsk.fusion.Occurrence.cast(entity)
+            if occ is not None:
+                selectedGears = logic.getComponentGears(occ.component)
+            else:
+                # A body selected in an occurrence is a proxy of the real body.
+                body = adsk.fusion.BRepBody.cast(entity)
+                if body.nativeObject is not None:
+                    body = body.nativeObject
+                selectedGears = [body] if body.attributes.itemByName('SpurGear', 'Values') is not None else []
+
+            for gear in selectedGears:
+                if gear not in gears:
+                    gears.append(gear)
+
+    # Gear bodies only have their own features deleted, but components can
+    # have features the user added to the gear.
+    rebuiltComps = []
+    for gear in gears:
+        gearValues = logic.readGearValues(gear)
+        if adsk.fusion.BRepBody.cast(gear) is None and gearValues is not None and gearValues['detail'] != detail:
+            rebuiltComps.append(gear)
+    if not logic.confirmRebuild(rebuiltComps):
+        return
+
+    start = time.time()
+    rebuiltCount = 0
+    for gear in gears:
+        if logic.setGearDetail(gear, detail):
+            rebuiltCount += 1
+    end = time.time()
+    app.log(f'Time to rebuild {rebuiltCount} spur gears as {detail}: {end - start} seconds.')
+
+
+# This event handler is called when the user changes anything in the command dialog.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {args.input.id}')
+
+    # The selection isn't used when all of the gears are rebuilt.
+    if args.input.id == 'allGears':
+        inputs = args.inputs
+        inputs.itemById('gears').isEnabled = not args.input.value
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
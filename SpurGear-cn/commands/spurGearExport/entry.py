@@ -0,0 +1,178 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from . import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearExport'
+CMD_NAME = '批量导出齿轮'
+CMD_Description = ('将设计中的齿轮导出为 STEP/STL/3MF 文件,未变化的齿轮会跳过')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    inputs = args.command.commandInputs
+
+    inputs.addTextBoxCommandInput('folder', '导出文件夹', '', 1, True)
+    inputs.addBoolValueInput('selectFolder', '选择文件夹...', False, '', False)
+
+    for exportFormat in logic.EXPORT_FORMATS:
+        inputs.addBoolValueInput('format' + exportFormat, exportFormat, True, '', exportFormat == 'STEP')
+
+    inputs.addBoolValueInput('force', '重新导出未变化的齿轮', True, '', False)
+
+    errorMessageInput = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
+    errorMessageInput.isFullWidth = True
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.validateInputs, command_validate_inputs, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# Returns the formats checked in the dialog.
+def get_export_formats(inputs: adsk.core.CommandInputs):
+    exportFormats = []
+    for exportFormat in logic.EXPORT_FORMATS:
+        formatInput: adsk.core.BoolValueInput = inputs.itemById('format' + exportFormat)
+        if formatInput.value:
+            exportFormats.append(exportFormat)
+
+    return exportFormats
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    folderInput: adsk.core.TextBoxCommandInput = inputs.itemById('folder')
+    forceInput: adsk.core.BoolValueInput = inputs.itemById('force')
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+
+    progressDialog = ui.createProgressDialog()
+    progressDialog.isCancelButtonShown = True
+
+    start = time.time()
+    (exported, upToDate, errors, cancelled) = logic.runExport(des, folderInput.text, get_export_formats(inputs), forceInput.value, progressDialog)
+    end = time.time()
+    app.log(f'Time to export {exported} spur gear files: {end - start} seconds.')
+
+    report = logic.formatExportReport(exported, upToDate, errors, cancelled)
+    app.log(report)
+    ui.messageBox(report)
+
+
+# This event handler is called when the user changes one of the inputs.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+    if changed_input.id != 'selectFolder':
+        return
+
+    folderDialog = ui.createFolderDialog()
+    folderDialog.title = '选择导出文件夹'
+    if folderDialog.showDialog() != adsk.core.DialogResults.DialogOK:
+        return
+
+    folderInput: adsk.core.TextBoxCommandInput = args.inputs.itemById('folder')
+    folderInput.text = folderDialog.folder
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_inputs(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    errorMessageInput: adsk.core.TextBoxCommandInput = inputs.itemById('errMessage')
+    errorMessageInput.text = ''
+
+    folderInput: adsk.core.TextBoxCommandInput = inputs.itemById('folder')
+    if not os.path.isdir(folderInput.text):
+        errorMessageInput.text = '警告!!!:请选择导出文件夹。'
+        args.areInputsValid = False
+        return
+
+    if len(get_export_formats(inputs)) == 0:
+        errorMessageInput.text = '警告!!!:请至少选择一种文件格式。'
+        args.areInputsValid = False
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
@@ -0,0 +1,185 @@
+import adsk.core
+import adsk.fusion
+import os
+import re
+import json
+import time
+import hashlib
+from ..spurGearCreate import logic as gearLogic
+from ...lib.gearMath import quantities
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# The formats gears can be exported to as (file extension, mesh refinement).
+# STEP is exact geometry, the mesh formats are refined for what they're used
+# for, STL for quick prints and 3MF for the supplier.
+EXPORT_FORMATS = {'STEP': ('.step', None),
+                  'STL': ('.stl', adsk.fusion.MeshRefinementSettings.MeshRefinementMedium),
+                  '3MF': ('.3mf', adsk.fusion.MeshRefinementSettings.MeshRefinementHigh)}
+
+# The file written to the export folder listing what was exported.
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_SCHEMA = 1
+
+# The number of exports done before the manifest is saved, so a cancelled
+# or failed export keeps the record of what was already written.
+CHUNK_SIZE = 5
+
+
+# A file to export.  The gear is its component, or its body for a gear built
+# as a body of a shared component, and the hash is the one saved on it.
+class ExportJob():
+    def __init__(self, gear, gearValues, specHash, exportFormat, filename):
+        self.gear = gear
+        self.gearValues = gearValues
+        self.exportFormat = exportFormat
+        self.filename = filename
+        self.specHash = specHash
+
+        # The hash of everything the exported file depends on.
+        refinement = EXPORT_FORMATS[exportFormat][1]
+        key = [self.specHash, gearValues['detail'], exportFormat, str(refinement)]
+        self.exportHash = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+# Reads the manifest of an export folder, which is empty if there isn't one.
+def loadManifest(folder):
+    filename = os.path.join(folder, MANIFEST_FILENAME)
+    if not os.path.exists(filename):
+        return {'schema': MANIFEST_SCHEMA, 'files': {}}
+
+    with open(filename, encoding='utf-8') as manifestFile:
+        return json.load(manifestFile)
+
+
+# Saves the manifest, replacing the old one only once the new one is written.
+def saveManifest(folder, manifest):
+    filename = os.path.join(folder, MANIFEST_FILENAME)
+    with open(filename + '.tmp', 'w', encoding='utf-8') as manifestFile:
+        json.dump(manifest, manifestFile, indent=4, sort_keys=True, ensure_ascii=False)
+    os.replace(filename + '.tmp', filename)
+
+
+# Returns a name for the files of a gear.  Identical gears share their files,
+# so the name is made from the values and the hash of the specification.
+def getExportName(gearValues, specHash):
+    name = f"SpurGear_m{quantities.diametralPitchToModule(gearValues['diametralPitch']):g}_z{gearValues['numTeeth']}_{gearValues['detail']}_{specHash[:8]}"
+    return re.sub(r'[^0-9A-Za-z_.-]', '_', name)
+
+
+# Makes the list of files to export for the gears in the design.  Each gear
+# that's identical to one already listed is left out because it would write
+# the same files.  Unless force is True, a file is left out if the manifest
+# shows it was exported from the same values and is still there.  Returns
+# the jobs and the number of files that are up to date.
+def queueExports(design: adsk.fusion.Design, folder, exportFormats, manifest, force):
+    jobs = []
+    upToDate = 0
+    names = set()
+    for (gear, gearValues) in gearLogic.findGears(design):
+        specHash = gearLogic.readSpecHash(gear, gearValues)
+        name = getExportName(gearValues, specHash)
+        if name in names:
+            continue
+        names.add(name)
+
+        for exportFormat in exportFormats:
+            filename = name + EXPORT_FORMATS[exportFormat][0]
+            job = ExportJob(gear, gearValues, specHash, exportFormat, filename)
+            entry = manifest['files'].get(filename)
+            if (not force and entry is not None and entry['exportHash'] == job.exportHash and 
+                os.path.exists(os.path.join(folder, filename))):
+                upToDate += 1
+                continue
+
+            jobs.append(job)
+
+    return (jobs, upToDate)
+
+
+# Writes the file of an export job.  The STEP export of the export manager
+# only takes a component, which for a gear body would have all of the other
+# gears too, so a body is written with the temporary B-Rep manager instead.
+def exportGear(design: adsk.fusion.Design, folder, job):
+    exportMgr = design.exportManager
+    filename = os.path.join(folder, job.filename)
+    if job.exportFormat == 'STEP':
+        body = adsk.fusion.BRepBody.cast(job.gear)
+        if body is not None:
+            if not adsk.fusion.TemporaryBRepManager.get().exportToFile([body], filename):
+                raise RuntimeError('导出失败')
+            return
+
+        options = exportMgr.createSTEPExportOptions(filename, job.gear)
+    elif job.exportFormat == 'STL':
+        options = exportMgr.createSTLExportOptions(job.gear, filename)
+        options.meshRefinement = EXPORT_FORMATS['STL'][1]
+    else:
+        options = exportMgr.createC3MFExportOptions(job.gear, filename)
+        options.meshRefinement = EXPORT_FORMATS['3MF'][1]
+
+    if not exportMgr.execute(options):
+        raise RuntimeError('导出失败')
+
+
+# Exports the gears in the design to a folder.  The exports are run one at a
+# time with the progress dialog updated and Fusion given a chance to handle
+# events between them so the export can be cancelled, and the manifest is
+# saved after every chunk.  Errors don't stop the export, they're returned as
+# a list of (filename, error) along with the number of files exported, the
+# number that were up to date and whether it was cancelled.
+def runExport(design: adsk.fusion.Design, folder, exportFormats, force, progressDialog = None):
+    manifest = loadManifest(folder)
+    (jobs, upToDate) = queueExports(design, folder, exportFormats, manifest, force)
+
+    exported = 0
+    errors = []
+    cancelled = False
+    try:
+        if progressDialog:
+            progressDialog.show('导出齿轮', '%v / %m', 0, len(jobs))
+
+        for index, job in enumerate(jobs):
+            if progressDialog:
+                progressDialog.progressValue = index
+                adsk.doEvents()
+                if progressDialog.wasCancelled:
+                    cancelled = True
+                    break
+
+            try:
+                exportGear(design, folder, job)
+            except Exception as error:
+                errors.append((job.filename, str(error)))
+                continue
+
+            manifest['files'][job.filename] = {'component': job.gear.name,
+                                               'format': job.exportFormat,
+                                               'specHash': job.specHash,
+                                               'exportHash': job.exportHash,
+                                               'gearValues': job.gearValues,
+                                               'size': os.path.getsize(os.path.join(folder, job.filename)),
+                                               'time': time.time()}
+            exported += 1
+            if exported % CHUNK_SIZE == 0:
+                saveManifest(folder, manifest)
+    finally:
+        saveManifest(folder, manifest)
+        if progressDialog:
+            progressDialog.hide()
+
+    return (exported, upToDate, errors, cancelled)
+
+
+# Formats the result of an export as the report shown when it's done.
+def formatExportReport(exported, upToDate, errors, cancelled):
+    report = f'已导出 {exported} 个文件, {upToDate} 个文件未变化已跳过'
+    if cancelled:
+        report += '\n导出已取消, 再次运行将只导出剩余的文件。'
+    if errors:
+        report += f'\n{len(errors)} 个文件失败:'
+        for (filename, error) in errors:
+            report += f'\n{filename}: {error}'
+
+    return report
@@ -0,0 +1,241 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from ...lib.gearMath import quantities
+from . import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearFamily'
+CMD_NAME = '齿轮族变体'
+CMD_Description = ('通过修改用户参数把参数化齿轮切换为变体表中的一行,并可对比重新创建的耗时')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+# The units of the active design while the dialog is open.
+units_cache = None
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    global units_cache
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    units_cache = quantities.UnitsCache(des.unitsManager)
+
+    inputs = args.command.commandInputs
+
+    gearInput = inputs.addSelectionInput('gear', '齿轮', '选择用"参数化齿轮族"选项创建的齿轮')
+    gearInput.addSelectionFilter('Occurrences')
+    gearInput.setSelectionLimits(1, 1)
+
+    tableInput = inputs.addTextBoxCommandInput('table', '变体表', '', 6, False)
+    tableInput.tooltip = '每行一个变体: 齿数, 厚度, 孔径 (例如 24, 10 mm, 8 mm)'
+
+    inputs.addIntegerSpinnerCommandInput('row', '应用的变体行', 1, 1000, 1, 1)
+
+    inputs.addBoolValueInput('benchmark', '对比参数驱动与重新创建的耗时', True, '', False)
+
+    errorMessageInput = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
+    errorMessageInput.isFullWidth = True
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.validateInputs, command_validate_inputs, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# Returns the component of the selected gear if it's part of a gear family, otherwise None.
+def get_family_component(inputs: adsk.core.CommandInputs):
+    gearInput: adsk.core.SelectionCommandInput = inputs.itemById('gear')
+    if gearInput.selectionCount == 0:
+        return None
+
+    comp = adsk.fusion.Occurrence.cast(gearInput.selection(0).entity).component
+    gearValues = logic.gearLogic.readGearValues(comp)
+    if gearValues is None or not gearValues['parameters']:
+        return None
+
+    return comp
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    tableInput: adsk.core.TextBoxCommandInput = inputs.itemById('table')
+    rowInput: adsk.core.IntegerSpinnerCommandInput = inputs.itemById('row')
+    benchmarkInput: adsk.core.BoolValueInput = inputs.itemById('benchmark')
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    comp = get_family_component(inputs)
+    rows = logic.parseFamilyTable(tableInput.text)
+    logic.saveFamilyTable(comp, tableInput.text)
+
+    # Only a row with a different number of teeth rebuilds the gear.
+    appliedRows = rows if benchmarkInput.value else [rows[rowInput.value - 1]]
+    numTeeth = logic.gearLogic.readGearValues(comp)['numTeeth']
+    if any(row[0] != numTeeth for row in appliedRows) and not logic.gearLogic.confirmRebuild([comp]):
+        return
+
+    if benchmarkInput.value:
+        try:
+            results = logic.benchmarkFamily(des, comp, rows)
+        except Exception as error:
+            ui.messageBox('基准测试失败: ' + str(error))
+            return
+
+        report = '齿数, 厚度, 孔径: 参数驱动 / 重新创建 (秒)\n'
+        for (row, familyTime, freshTime) in results:
+            report += f'{row[0]}, {row[1]}, {row[2]}: {familyTime:.3f} / {freshTime:.3f}\n'
+        app.log(report)
+        ui.messageBox(report)
+    else:
+        start = time.time()
+        logic.applyFamilyRow(des, comp, rows[rowInput.value - 1])
+        end = time.time()
+        app.log(f'Time to apply spur gear family row {rowInput.value}: {end - start} seconds.')
+
+
+# This event handler is called when the user changes anything in the command dialog.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {args.input.id}')
+
+    # Show the variant table saved on the selected gear, or start one with its current values.
+    if args.input.id == 'gear':
+        comp = get_family_component(args.inputs)
+        if comp is None:
+            return
+
+        tableInput: adsk.core.TextBoxCommandInput = args.inputs.itemById('table')
+        tableInput.text = logic.readFamilyTable(comp)
+        if tableInput.text == '':
+            units = units_cache.defaultLengthUnits
+            gearValues = logic.gearLogic.readGearValues(comp)
+            tableInput.text = (str(gearValues['numTeeth']) + ', ' +
+                               units_cache.format(gearValues['thickness'], units) + ', ' +
+                               units_cache.format(gearValues['holeDiam'], units))
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_inputs(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    errorMessageInput: adsk.core.TextBoxCommandInput = inputs.itemById('errMessage')
+    errorMessageInput.text = ''
+
+    if get_family_component(inputs) is None:
+        errorMessageInput.text = '警告!!!:请选择用"参数化齿轮族"选项创建的齿轮。'
+        args.areInputsValid = False
+        return
+
+    tableInput: adsk.core.TextBoxCommandInput = inputs.itemById('table')
+    try:
+        rows = logic.parseFamilyTable(tableInput.text)
+    except ValueError as error:
+        errorMessageInput.text = '警告!!!:' + str(error)
+        args.areInputsValid = False
+        return
+
+    rowInput: adsk.core.IntegerSpinnerCommandInput = inputs.itemById('row')
+    if len(rows) == 0 or rowInput.value > len(rows):
+        errorMessageInput.text = '警告!!!:变体表中没有第 ' + str(rowInput.value) + ' 行。'
+        args.areInputsValid = False
+        return
+
+    units = units_cache.defaultLengthUnits
+    for row in rows:
+        for expression in row[1:]:
+            if expression != '' and not units_cache.isValidExpression(expression, units):
+                errorMessageInput.text = '警告!!!:无效的长度 "' + expression + '"'
+                args.areInputsValid = False
+                return
+
+    # Each variant has to be a gear the spur gear dialog would accept.
+    gearValues = logic.gearLogic.readGearValues(get_family_component(inputs))
+    problem = logic.checkFamilyRows(gearValues, rows,
+                                    lambda expression: units_cache.evaluateExpression(expression, units),
+                                    lambda length: units_cache.format(length, units))
+    if problem is not None:
+        errorMessageInput.text = '警告!!!:' + problem
+        args.areInputsValid = False
+        return
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers, units_cache
+    local_handlers = []
+    units_cache = None
@@ -0,0 +1,128 @@
+import adsk.core
+import adsk.fusion
+import time
+from ..spurGearCreate import logic as gearLogic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+
+# Reads the variant table of a gear family.  Each line that isn't empty is a
+# variant written as "teeth, thickness, hole diameter", where the lengths are
+# expressions like "10 mm" and the hole diameter can be left out.  Returns a
+# list of (numTeeth, thicknessExpression, holeDiamExpression) tuples and
+# raises a ValueError naming the line if a line can't be read.
+def parseFamilyTable(text):
+    rows = []
+    for lineNumber, line in enumerate(text.splitlines(), 1):
+        if line.strip() == '':
+            continue
+
+        fields = [field.strip() for field in line.split(',')]
+        if len(fields) < 2 or len(fields) > 3 or not fields[0].isdigit() or fields[1] == '':
+            raise ValueError('第 ' + str(lineNumber) + ' 行应为 "齿数, 厚度, 孔径"')
+
+        holeDiamExpression = ''
+        if len(fields) == 3:
+            holeDiamExpression = fields[2]
+        rows.append((int(fields[0]), fields[1], holeDiamExpression))
+
+    return rows
+
+
+# Returns the variant table saved on a family gear, or an empty string.
+def readFamilyTable(comp: adsk.fusion.Component):
+    attrib = comp.attributes.itemByName('SpurGear', 'FamilyTable')
+    if attrib is None:
+        return ''
+
+    return attrib.value
+
+
+# Saves the variant table on a family gear.
+def saveFamilyTable(comp: adsk.fusion.Component, text):
+    comp.attributes.add('SpurGear', 'FamilyTable', text)
+
+
+# Makes a family gear into the variant described by a row of its table.  The
+# thickness and hole diameter are changed through their user parameters and
+# the existing features recompute.  The shape of the teeth can't be driven
+# by a parameter, so only a row with a different number of teeth rebuilds
+# the gear, which still keeps the component and its occurrences.  The
+# rebuild is added to the history unless recordHistory is False.
+def applyFamilyRow(design: adsk.fusion.Design, comp: adsk.fusion.Component, row, recordHistory = True):
+    (numTeeth, thicknessExpression, holeDiamExpression) = row
+    gearValues = gearLogic.readGearValues(comp)
+    parameters = gearValues['parameters']
+    userParams = design.userParameters
+
+    thicknessParam = userParams.itemByName(parameters['thickness'])
+    thicknessParam.expression = thicknessExpression
+    gearValues['thickness'] = thicknessParam.value
+
+    if 'holeDiam' in parameters and holeDiamExpression != '':
+        holeDiamParam = userParams.itemByName(parameters['holeDiam'])
+        holeDiamParam.expression = holeDiamExpression
+        gearValues['holeDiam'] = holeDiamParam.value
+
+    if numTeeth != gearValues['numTeeth']:
+        gearValues['numTeeth'] = numTeeth
+        gearLogic.rebuildGear(comp, gearValues, recordHistory)
+    else:
+        gearLogic.writeGearValues(comp, gearValues)
+
+
+# Checks every variant of a family gear the way the spur gear dialog checks a
+# gear.  evaluateLength returns the value of a length expression and
+# formatLength formats a length for a message.  Returns the problem with the
+# first variant that's wrong, naming its row, or None.
+def checkFamilyRows(gearValues, rows, evaluateLength, formatLength):
+    for index, (numTeeth, thicknessExpression, holeDiamExpression) in enumerate(rows, 1):
+        variantValues = dict(gearValues)
+        variantValues['numTeeth'] = numTeeth
+        variantValues['thickness'] = evaluateLength(thicknessExpression)
+        if 'holeDiam' in gearValues['parameters'] and holeDiamExpression != '':
+            variantValues['holeDiam'] = evaluateLength(holeDiamExpression)
+
+        problem = gearLogic.checkGearValues(variantValues, formatLength)
+        if problem is not None:
+            return '第 ' + str(index) + ' 行: ' + problem
+
+    return None
+
+
+# Times making each variant by changing the family gear against building the
+# same gear from scratch with createGear.  An error building a gear stops the
+# benchmark and is raised.  The features built for the comparison are deleted
+# again and the family gear is left as the first variant.  None of the builds
+# are added to the history.  Returns a list of (row, familyTime, freshTime)
+# tuples with the times in seconds.
+def benchmarkFamily(design: adsk.fusion.Design, comp: adsk.fusion.Component, rows):
+    timeline = design.timeline
+    results = []
+    try:
+        for row in rows:
+            start = time.perf_counter()
+            applyFamilyRow(design, comp, row, False)
+            adsk.doEvents()
+            familyTime = time.perf_counter() - start
+
+            gearValues = gearLogic.readGearValues(comp)
+            firstIndex = timeline.markerPosition
+            start = time.perf_counter()
+            try:
+                gearLogic.createGear(design, gearValues['diametralPitch'], gearValues['numTeeth'], gearValues['thickness'],
+                                     gearValues['rootFilletRad'], gearValues['pressureAngle'], gearValues['backlash'],
+                                     gearValues['holeDiam'], gearValues['detail'], False, False, gearValues['profileShift'], False)
+                adsk.doEvents()
+                freshTime = time.perf_counter() - start
+            finally:
+                # Delete everything the comparison gear added to the timeline, last first.
+                for i in range(timeline.markerPosition - 1, firstIndex - 1, -1):
+                    timeline.item(i).entity.deleteMe()
+
+            results.append((row, familyTime, freshTime))
+    finally:
+        applyFamilyRow(design, comp, rows[0], False)
+
+    return results
@@ -0,0 +1,139 @@
+import adsk.core
+import adsk.fusion
+import os
+import html
+import statistics
+from ... import config
+from ..spurGearCreate import history
+from ..spurGearCreate import logic as gearLogic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# The file the history report is written to.
+REPORT_FILENAME = os.path.join(config.USER_DATA_FOLDER, 'historyReport.html')
+
+# A version is a regression if its median time per tooth is this much more
+# than the version before it, and both have at least REGRESSION_SAMPLES builds.
+REGRESSION_RATIO = 1.2
+REGRESSION_SAMPLES = 3
+
+# The colors of the levels of detail and strategies in the plot.
+PLOT_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+
+
+# Returns the version of the add-in and of Fusion a build was made with.
+def getVersion(entry):
+    return (entry.get('addin') or '-') + ' / ' + entry.get('fusion', '')
+
+
+# Finds the versions that build gears slower than the version before them.
+# Builds are compared with the builds of the same detail and strategy on
+# the same computer, as time per tooth.  Returns a list of (detail, strategy,
+# machine, oldVersion, newVersion, oldMsPerTooth, newMsPerTooth).
+def findRegressions(entries):
+    groups = {}
+    for entry in entries:
+        if entry['z'] <= 0:
+            continue
+
+        versions = groups.setdefault((entry['detail'], entry['strategy'], entry.get('machine', '')), {})
+        versions.setdefault(getVersion(entry), []).append((entry['t'], entry['ms'] / entry['z']))
+
+    regressions = []
+    for (key, versions) in groups.items():
+        # Order the versions by when they were first used.
+        ordered = sorted(versions.items(), key=lambda item: min(sample[0] for sample in item[1]))
+        previous = None
+        for (version, samples) in ordered:
+            if len(samples) < REGRESSION_SAMPLES:
+                continue
+
+            median = statistics.median(sample[1] for sample in samples)
+            if previous is not None and median > previous[1] * REGRESSION_RATIO:
+                regressions.append(key + (previous[0], version, previous[1], median))
+            previous = (version, median)
+
+    return regressions
+
+
+# Formats the summary shown in the dialog.
+def formatSummary(entries, regressions):
+    lines = [f'共 {len(entries)} 条创建记录']
+    for ((detail, strategy), msPerTooth) in sorted(history.getTimePerTooth(entries).items()):
+        lines.append(f'{gearLogic.detailNames.get(detail, detail)} ({strategy}): 每齿 {msPerTooth:.1f} ms')
+
+    if regressions:
+        lines.append(f'发现 {len(regressions)} 处性能退化:')
+        for (detail, strategy, machine, oldVersion, newVersion, oldMs, newMs) in regressions:
+            lines.append(f'{detail} ({strategy}) {oldVersion} → {newVersion}: 每齿 {oldMs:.1f} → {newMs:.1f} ms')
+    else:
+        lines.append('未发现性能退化')
+
+    return '<br>'.join(lines)
+
+
+# Returns an SVG plot of the time to build each gear against its number of
+# teeth, with a color for each level of detail and strategy.
+def plotHistory(entries, width = 800, height = 480):
+    margin = 50
+    maxTeeth = max([entry['z'] for entry in entries] + [10])
+    maxMs = max([entry['ms'] for entry in entries] + [1.0])
+
+    def x(teeth):
+        return margin + (width - 2 * margin) * teeth / maxTeeth
+
+    def y(ms):
+        return height - margin - (height - 2 * margin) * ms / maxMs
+
+    series = sorted({(entry['detail'], entry['strategy']) for entry in entries})
+    colors = {key: PLOT_COLORS[index % len(PLOT_COLORS)] for (index, key) in enumerate(series)}
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-size="12">',
+             f'<line x1="{margin}" y1="{height - margin}" x2="{width - margin}" y2="{height - margin}" stroke="black"/>',
+             f'<line x1="{margin}" y1="{margin}" x2="{margin}" y2="{height - margin}" stroke="black"/>',
+             f'<text x="{width / 2}" y="{height - 10}" text-anchor="middle">齿数 (0 - {maxTeeth})</text>',
+             f'<text x="10" y="{margin - 10}">耗时 (0 - {maxMs:.0f} ms)</text>']
+    for entry in entries:
+        color = colors[(entry['detail'], entry['strategy'])]
+        title = html.escape(f"{entry['z']} 齿, {entry['ms']} ms, {getVersion(entry)}")
+        parts.append(f'<circle cx="{x(entry["z"]):.1f}" cy="{y(entry["ms"]):.1f}" r="3" fill="{color}" fill-opacity="0.6"><title>{title}</title></circle>')
+
+    for (index, key) in enumerate(series):
+        legendY = margin + 16 * index
+        parts.append(f'<rect x="{width - margin - 180}" y="{legendY - 9}" width="10" height="10" fill="{colors[key]}"/>')
+        parts.append(f'<text x="{width - margin - 165}" y="{legendY}">{html.escape(key[0] + " / " + key[1])}</text>')
+
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+# Writes the history report, with the plot, the regressions and the slowest
+# stages of the builds, to an HTML file.
+def writeReport(entries, regressions, filename = REPORT_FILENAME):
+    stageTimes = {}
+    for entry in entries:
+        for (stage, ms) in entry.get('stages', {}).items():
+            stageTimes.setdefault((entry['detail'], stage), []).append(ms)
+
+    rows = []
+    for (detail, stage), times in sorted(stageTimes.items()):
+        rows.append(f'<tr><td>{html.escape(detail)}</td><td>{html.escape(stage)}</td><td>{statistics.median(times):.1f}</td></tr>')
+
+    regressionRows = []
+    for (detail, strategy, machine, oldVersion, newVersion, oldMs, newMs) in regressions:
+        regressionRows.append(f'<tr><td>{html.escape(detail)}</td><td>{html.escape(strategy)}</td><td>{html.escape(machine)}</td>'
+                              f'<td>{html.escape(oldVersion)}</td><td>{html.escape(newVersion)}</td><td>{oldMs:.1f} → {newMs:.1f}</td></tr>')
+
+    with open(filename, 'w', encoding='utf-8') as reportFile:
+        reportFile.write('<!DOCTYPE html><html><head><meta charset="utf-8"><title>齿轮创建性能历史</title></head><body>\n')
+        reportFile.write(f'<h2>齿轮创建性能历史 ({len(entries)} 条记录)</h2>\n')
+        reportFile.write(plotHistory(entries))
+        reportFile.write('\n<h3>性能退化 (每齿耗时 ms)</h3>\n')
+        if regressionRows:
+            reportFile.write('<table border="1"><tr><th>细节</th><th>方式</th><th>计算机</th><th>旧版本</th><th>新版本</th><th>每齿耗时</th></tr>\n')
+            reportFile.write('\n'.join(regressionRows) + '</table>\n')
+        else:
+            reportFile.write('<p>未发现性能退化</p>\n')
+        reportFile.write('<h3>各阶段耗时中位数 (ms)</h3>\n<table border="1"><tr><th>细节</th><th>阶段</th><th>耗时</th></tr>\n')
+        reportFile.write('\n'.join(rows) + '</table>\n</body></html>\n')
@@ -0,0 +1,84 @@
+import adsk.core
+import adsk.fusion
+import csv
+import math
+from ..spurGearCreate import logic as gearLogic
+from ...lib.gearMath import quantities
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# A group of gears that are all the same part.  The gears are components, or
+# bodies for the gears built as bodies of a shared component.
+class GearGroup():
+    def __init__(self, gearValues):
+        self.gearValues = gearValues
+        self.gears = []
+        self.occurrenceCount = 0
+
+
+# Collects every spur gear in the design into groups of identical gears.  The
+# gears are found through the attribute index of the design and only the
+# occurrences of the component of each gear are looked up, so the assembly
+# tree is never walked.  Gears are the same part when they have the same spec hash,
+# which leaves out the level of detail and the family parameters.  Returns
+# the groups sorted by module and number of teeth.
+def collectInventory(design: adsk.fusion.Design):
+    groups = {}
+    for (gear, gearValues) in gearLogic.findGears(design):
+        key = gearLogic.readSpecHash(gear, gearValues)
+        group = groups.get(key)
+        if group is None:
+            group = GearGroup(gearValues)
+            groups[key] = group
+
+        group.gears.append(gear)
+        group.occurrenceCount += gearLogic.countGearOccurrences(design, gear)
+
+    return sorted(groups.values(), key=lambda group: (-group.gearValues['diametralPitch'], group.gearValues['numTeeth']))
+
+
+# Returns the values of a group formatted for the report and the CSV file in
+# the default units of the design.
+def getGroupRow(unitsCache: quantities.UnitsCache, group):
+    units = unitsCache.defaultLengthUnits
+    gearValues = group.gearValues
+    row = {}
+    row['模数'] = format(quantities.diametralPitchToModule(gearValues['diametralPitch']), '.4g')
+    row['径节'] = format(gearValues['diametralPitch'], '.4g')
+    row['齿数'] = gearValues['numTeeth']
+    row['压力角'] = format(gearValues['pressureAngle'] * (180/math.pi), '.4g')
+    row['变位系数'] = format(gearValues['profileShift'], '.4g')
+    row['厚度'] = unitsCache.format(gearValues['thickness'], units)
+    row['中心孔直径'] = unitsCache.format(gearValues['holeDiam'], units)
+    row['齿根圆角半径'] = unitsCache.format(gearValues['rootFilletRad'], units)
+    row['背隙'] = unitsCache.format(gearValues['backlash'], units)
+    row['组件'] = ' / '.join(gear.name for gear in group.gears)
+    row['数量'] = group.occurrenceCount
+    return row
+
+
+# Formats the groups as the text shown in the dialog.
+def formatInventory(design: adsk.fusion.Design, groups):
+    unitsCache = quantities.UnitsCache(design.unitsManager)
+    gearCount = sum(group.occurrenceCount for group in groups)
+    lines = ['共 ' + str(gearCount) + ' 个齿轮, ' + str(len(groups)) + ' 种']
+    for group in groups:
+        row = getGroupRow(unitsCache, group)
+        lines.append(f"{row['数量']} x 模数 {row['模数']}, {row['齿数']} 齿, 压力角 {row['压力角']}, "
+                     f"厚度 {row['厚度']}, 孔径 {row['中心孔直径']}")
+
+    return '<br>'.join(lines)
+
+
+# Writes the groups as a bill of materials CSV file.
+def exportInventory(design: adsk.fusion.Design, groups, filename):
+    unitsCache = quantities.UnitsCache(design.unitsManager)
+    with open(filename, 'w', newline='', encoding='utf-8-sig') as bomFile:
+        writer = None
+        for group in groups:
+            row = getGroupRow(unitsCache, group)
+            if writer is None:
+                writer = csv.DictWriter(bomFile, list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
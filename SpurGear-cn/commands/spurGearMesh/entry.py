@@ -0,0 +1,182 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from . import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearMesh'
+CMD_NAME = '齿轮啮合对齐'
+CMD_Description = ('旋转选中的齿轮使轮齿互相啮合,可选创建旋转关节与运动链接')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    inputs = args.command.commandInputs
+
+    # The gears are meshed in the order they're selected.
+    gearsInput = inputs.addSelectionInput('gears', '齿轮', '按传动顺序选择齿轮')
+    gearsInput.addSelectionFilter('Occurrences')
+    gearsInput.setSelectionLimits(2, 0)
+
+    inputs.addBoolValueInput('snapCenters', '调整中心距', True, '', True)
+
+    inputs.addBoolValueInput('createJoints', '创建旋转关节与运动链接', True, '', False)
+
+    frameInput = inputs.addSelectionInput('frame', '机架', '选择齿轮绕其旋转的机架零部件')
+    frameInput.addSelectionFilter('Occurrences')
+    frameInput.setSelectionLimits(0, 1)
+    frameInput.isVisible = False
+
+    errorMessageInput = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
+    errorMessageInput.isFullWidth = True
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
+    futil.add_handler(args.command.validateInputs, command_validate_inputs, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# Returns the selected gears as PlacedGear objects, skipping anything that isn't a spur gear.
+def get_selected_gears(inputs: adsk.core.CommandInputs):
+    gearsInput: adsk.core.SelectionCommandInput = inputs.itemById('gears')
+    gears = []
+    for i in range(0, gearsInput.selectionCount):
+        occ = adsk.fusion.Occurrence.cast(gearsInput.selection(i).entity)
+        gear = logic.getPlacedGear(occ)
+        if gear is not None:
+            gears.append(gear)
+
+    return gears
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    snapCentersInput: adsk.core.BoolValueInput = inputs.itemById('snapCenters')
+    createJointsInput: adsk.core.BoolValueInput = inputs.itemById('createJoints')
+    frameInput: adsk.core.SelectionCommandInput = inputs.itemById('frame')
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    gears = get_selected_gears(inputs)
+
+    start = time.time()
+    logic.solveMeshRotations(gears, snapCentersInput.value)
+    logic.applyPlacements(des, gears)
+
+    if createJointsInput.value:
+        frameOcc = adsk.fusion.Occurrence.cast(frameInput.selection(0).entity)
+        logic.createMeshJoints(des, gears, frameOcc)
+    end = time.time()
+    app.log(f'Time to mesh {len(gears)} spur gears: {end - start} seconds.')
+
+
+# This event handler is called when the user changes anything in the command dialog.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {args.input.id}')
+
+    # The frame is only needed when joints are created.
+    if args.input.id == 'createJoints':
+        args.inputs.itemById('frame').isVisible = args.input.value
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_inputs(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    errorMessageInput: adsk.core.TextBoxCommandInput = inputs.itemById('errMessage')
+    errorMessageInput.text = ''
+
+    if len(get_selected_gears(inputs)) < 2:
+        errorMessageInput.text = '警告!!!:至少需要选择两个由正齿轮命令创建的齿轮。'
+        args.areInputsValid = False
+        return
+
+    createJointsInput: adsk.core.BoolValueInput = inputs.itemById('createJoints')
+    frameInput: adsk.core.SelectionCommandInput = inputs.itemById('frame')
+    if createJointsInput.value and frameInput.selectionCount == 0:
+        errorMessageInput.text = '警告!!!:创建关节需要选择机架。'
+        args.areInputsValid = False
+        return
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
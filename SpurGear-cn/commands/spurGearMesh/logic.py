@@ -0,0 +1,139 @@
+import adsk.core
+import adsk.fusion
+import math
+from ..spurGearCreate import logic as gearLogic
+from ...lib import gearMath
+from ...lib.gearMath import quantities
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+
+# A gear occurrence along with the values needed to mesh it.  The position
+# and angle are of the occurrence in the XY plane of its parent, where the
+# angle is the rotation of the tooth that was created on the X axis.
+class PlacedGear():
+    def __init__(self, occ: adsk.fusion.Occurrence, numTeeth, pitchDia, pressureAngle, profileShift):
+        self.occ = occ
+        self.numTeeth = numTeeth
+        self.pitchDia = pitchDia
+        self.pressureAngle = pressureAngle
+        self.profileShift = profileShift
+
+        mat = occ.transform2
+        self.x = mat.getCell(0, 3)
+        self.y = mat.getCell(1, 3)
+        self.z = mat.getCell(2, 3)
+        self.angle = math.atan2(mat.getCell(1, 0), mat.getCell(0, 0))
+
+        # The index of the gear this gear meshes with, or None for the first gear.
+        self.partner = None
+
+
+# Returns a PlacedGear for the occurrence or None if it isn't a spur gear.
+def getPlacedGear(occ: adsk.fusion.Occurrence):
+    gearValues = gearLogic.readGearValues(occ.component)
+    if gearValues is None:
+        return None
+
+    # The diametral pitch is saved in teeth per inch, and the pitch diameter is needed in centimeters.
+    pitchDia = gearValues['numTeeth'] / quantities.diametralPitchPerCm(gearValues['diametralPitch'])
+    return PlacedGear(occ, gearValues['numTeeth'], pitchDia, gearValues['pressureAngle'], gearValues['profileShift'])
+
+
+# Returns the center distance of two gears when they mesh, which is the sum
+# of their pitch radii unless they have a profile shift.
+def getCenterDistance(gear: PlacedGear, other: PlacedGear):
+    return gearMath.operatingCenterDistance(gear.numTeeth, gear.pitchDia, gear.profileShift,
+                                            other.numTeeth, other.pitchDia, other.profileShift, gear.pressureAngle)
+
+
+# Computes the rotation of each gear so it meshes with the gears before it.
+# The first gear keeps its rotation and each of the others is meshed with the
+# earlier gear whose center distance is closest to the one they mesh at.  If
+# snapCenters is True the gear is also moved along the center line so the
+# center distance is exact.  A profile shift keeps the tooth centered on the
+# X axis, so it doesn't change the rotation, only the center distance.  Only the values of the PlacedGear objects
+# are changed, nothing is changed in the design.
+def solveMeshRotations(gears, snapCenters):
+    for i in range(1, len(gears)):
+        gear = gears[i]
+
+        # Find the gear to mesh with.
+        bestError = None
+        for j in range(0, i):
+            other = gears[j]
+            centerDistance = math.hypot(gear.x - other.x, gear.y - other.y)
+            error = abs(centerDistance - getCenterDistance(gear, other))
+            if bestError is None or error < bestError:
+                bestError = error
+                gear.partner = j
+
+        partner = gears[gear.partner]
+
+        # The angle of the line from the center of the partner to the center of this gear.
+        lineAngle = math.atan2(gear.y - partner.y, gear.x - partner.x)
+
+        if snapCenters:
+            centerDistance = getCenterDistance(gear, partner)
+            gear.x = partner.x + centerDistance * math.cos(lineAngle)
+            gear.y = partner.y + centerDistance * math.sin(lineAngle)
+
+        # When the partner has a tooth on the center line this gear needs the
+        # middle of a gap on it, which is half a tooth from the tooth on the X
+        # axis.  Rotating the partner rotates this gear the opposite direction
+        # by the ratio of the tooth counts.
+        ratio = partner.numTeeth / gear.numTeeth
+        angle = lineAngle + math.pi - (math.pi / gear.numTeeth) + ratio * (lineAngle - partner.angle)
+
+        # Keep the smallest equivalent rotation.
+        toothAngle = 2 * math.pi / gear.numTeeth
+        gear.angle = math.fmod(angle, toothAngle)
+
+
+# Moves all of the gear occurrences to their solved positions.  All of the
+# transforms are computed before any occurrence is changed and the positions
+# are captured with a single snapshot.
+def applyPlacements(design: adsk.fusion.Design, gears):
+    transforms = []
+    for gear in gears:
+        mat = adsk.core.Matrix3D.create()
+        mat.setToRotation(gear.angle, adsk.core.Vector3D.create(0, 0, 1), adsk.core.Point3D.create(0, 0, 0))
+        mat.translation = adsk.core.Vector3D.create(gear.x, gear.y, gear.z)
+        transforms.append(mat)
+
+    for gear, mat in zip(gears, transforms):
+        gear.occ.transform2 = mat
+
+    if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        if design.snapshots.hasPendingSnapshot:
+            design.snapshots.add()
+
+
+# Creates a revolute joint between each gear and the frame and a motion link
+# between each pair of meshing gears so they turn together.
+def createMeshJoints(design: adsk.fusion.Design, gears, frameOcc: adsk.fusion.Occurrence):
+    rootComp = design.rootComponent
+
+    joints = []
+    for gear in gears:
+        # The gear turns about the Z axis of its component.
+        originPoint = gear.occ.component.originConstructionPoint.createForAssemblyContext(gear.occ)
+        geometry = adsk.fusion.JointGeometry.createByPoint(originPoint)
+
+        jointInput = rootComp.asBuiltJoints.createInput(gear.occ, frameOcc, geometry)
+        jointInput.setAsRevoluteJointMotion(adsk.fusion.JointDirections.ZAxisJointDirection)
+        joint = rootComp.asBuiltJoints.add(jointInput)
+        joint.name = gear.occ.name + ' Mesh'
+        joints.append(joint)
+
+    for i, gear in enumerate(gears):
+        if gear.partner is None:
+            continue
+
+        partner = gears[gear.partner]
+        linkInput = rootComp.motionLinks.createInput(joints[gear.partner], joints[i])
+        linkInput.valueOne = adsk.core.ValueInput.createByString('360 deg')
+        linkInput.valueTwo = adsk.core.ValueInput.createByString(str(360.0 * partner.numTeeth / gear.numTeeth) + ' deg')
+        linkInput.isReversed = True
+        rootComp.motionLinks.add(linkInput)
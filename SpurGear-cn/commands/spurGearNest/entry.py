@@ -0,0 +1,173 @@
+import adsk.core
+import adsk.fusion
+import os
+from ...lib import fusionAddInUtils as futil
+from ... import config
+from . import logic
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Specify the command identity information.
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearNest'
+CMD_NAME = '齿轮排样'
+CMD_Description = ('将设计中的齿轮轮廓排列到板材上,输出为草图或 DXF 文件以便切割')
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# Defines the location of the command to be in the DESIGN workspace and
+# in the CREATE panel below the spur gear command.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidCreatePanel'
+COMMAND_BESIDE_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_spurGearCreate'
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+
+# Executed when the add-in is loaded. The button to execute the command
+# is created and the event handler to handle when the command is run is connected.
+def start():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} started')
+
+    # Delete the existing command, in case it wasn't correctly deleted during a failed execution.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+    # The command uses the same icon as the spur gear command.
+    icon_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spurGearCreate', 'resources', 'SpurGear')
+
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, icon_folder)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # Create the button command control in the UI after the spur gear command.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+    control.isPromoted = IS_PROMOTED
+
+
+# Executed when add-in is stopped.
+def stop():
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} stopped')
+
+    # Gets the toolbar panel containing the button.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Delete the button command control.
+    cntrl = panel.controls.itemById(CMD_ID)
+    if cntrl:
+        cntrl.deleteMe()
+
+    # Delete the command definition.
+    cmdDef = ui.commandDefinitions.itemById(CMD_ID)
+    if cmdDef:
+        cmdDef.deleteMe()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    inputs = args.command.commandInputs
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    units = des.unitsManager.defaultLengthUnits
+
+    inputs.addValueInput('sheetWidth', '板材宽度', units, adsk.core.ValueInput.createByReal(100.0))
+    inputs.addValueInput('sheetHeight', '板材高度', units, adsk.core.ValueInput.createByReal(60.0))
+    inputs.addValueInput('spacing', '齿轮间距', units, adsk.core.ValueInput.createByReal(0.3))
+    inputs.addValueInput('margin', '板材边距', units, adsk.core.ValueInput.createByReal(0.5))
+    inputs.addValueInput('boreClearance', '中心孔间隙', units, adsk.core.ValueInput.createByReal(0.3))
+    inputs.addIntegerSpinnerCommandInput('copies', '每个齿轮的份数', 1, 1000, 1, 1)
+
+    outputInput = inputs.addDropDownCommandInput('output', '输出', adsk.core.DropDownStyles.TextListDropDownStyle)
+    outputInput.listItems.add(logic.OUTPUT_SKETCH, True)
+    outputInput.listItems.add(logic.OUTPUT_DXF, False)
+
+    errorMessageInput = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
+    errorMessageInput.isFullWidth = True
+
+    # Setup the event handlers needed for this command.
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.validateInputs, command_validate_inputs, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# This event handler is called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    inputs = args.command.commandInputs
+    outputInput: adsk.core.DropDownCommandInput = inputs.itemById('output')
+    copiesInput: adsk.core.IntegerSpinnerCommandInput = inputs.itemById('copies')
+
+    filename = ''
+    if outputInput.selectedItem.name == logic.OUTPUT_DXF:
+        fileDialog = ui.createFileDialog()
+        fileDialog.title = '保存排样'
+        fileDialog.filter = 'DXF (*.dxf)'
+        fileDialog.initialFilename = 'SpurGearNest.dxf'
+        if fileDialog.showSave() != adsk.core.DialogResults.DialogOK:
+            return
+        filename = fileDialog.filename
+
+    des = adsk.fusion.Design.cast(app.activeProduct)
+    values = [inputs.itemById(inputId).value for inputId in ('sheetWidth', 'sheetHeight', 'spacing', 'margin', 'boreClearance')]
+
+    try:
+        (gearCount, boreCount, sheetCount, seconds) = logic.runNest(des, *values, copiesInput.value, filename)
+    except ValueError as error:
+        ui.messageBox('无法排样: ' + str(error))
+        return
+
+    report = logic.formatNestReport(gearCount, boreCount, sheetCount, seconds)
+    app.log(report)
+    ui.messageBox(report)
+
+
+# This event handler is called when the user interacts with any of the inputs in the dialog
+# which allows you to verify that all of the inputs are valid and enables the OK button.
+def command_validate_inputs(args: adsk.core.ValidateInputsEventArgs):
+    inputs = args.inputs
+    errorMessageInput: adsk.core.TextBoxCommandInput = inputs.itemById('errMessage')
+    errorMessageInput.text = ''
+
+    for inputId in ('sheetWidth', 'sheetHeight', 'spacing', 'margin', 'boreClearance'):
+        valueInput: adsk.core.ValueCommandInput = inputs.itemById(inputId)
+        if not valueInput.isValidExpression:
+            errorMessageInput.text = '警告!!!:' + valueInput.name + '无效。'
+            args.areInputsValid = False
+            return
+
+        if valueInput.value < 0 or (inputId.startswith('sheet') and valueInput.value == 0):
+            errorMessageInput.text = '警告!!!:' + valueInput.name + '必须为正数。'
+            args.areInputsValid = False
+            return
+
+    sheetWidth = inputs.itemById('sheetWidth').value
+    sheetHeight = inputs.itemById('sheetHeight').value
+    margin = inputs.itemById('margin').value
+    if 2 * margin >= min(sheetWidth, sheetHeight):
+        errorMessageInput.text = '警告!!!:板材边距过大。'
+        args.areInputsValid = False
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
\ No newline at end of file
@@ -0,0 +1,75 @@
+import adsk.core
+import adsk.fusion
+import os
+import time
+import tempfile
+from ..spurGearCreate import logic as gearLogic
+from ...lib.gearMath import nesting
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# The ways a nest can be written out.
+OUTPUT_SKETCH = '草图'
+OUTPUT_DXF = 'DXF 文件'
+
+
+# Makes the gears to nest from the gears in the design.  Each gear is nested
+# once for every occurrence of it times the number of copies, and gears that
+# are the same part share their outline.
+def collectNestGears(design: adsk.fusion.Design, copies):
+    outlines = {}
+    gears = []
+    for (gear, gearValues) in gearLogic.findGears(design):
+        specHash = gearLogic.readSpecHash(gear, gearValues)
+        nestGear = outlines.get(specHash)
+        if nestGear is None:
+            (outline, rootRadius, outsideRadius) = nesting.gearOutline(gearValues['diametralPitch'], gearValues['numTeeth'],
+                                                                       gearValues['pressureAngle'], gearValues['backlash'],
+                                                                       gearValues['profileShift'])
+            nestGear = nesting.NestGear(gear.name, gearValues['numTeeth'], outline, rootRadius, outsideRadius, gearValues['holeDiam'] / 2.0)
+            outlines[specHash] = nestGear
+
+        count = gearLogic.countGearOccurrences(design, gear) * copies
+        gears.extend([nestGear] * count)
+
+    return gears
+
+
+# Nests the gears of the design and writes the nest to a DXF file, or to a
+# sketch in the root component when filename is empty.  Returns the number
+# of gears, the number of gears put in the bore of another gear, the number
+# of sheets and the time taken to compute the nest in seconds.
+def runNest(design: adsk.fusion.Design, sheetWidth, sheetHeight, spacing, margin, boreClearance, copies, filename = ''):
+    gears = collectNestGears(design, copies)
+
+    start = time.perf_counter()
+    (placements, sheetCount) = nesting.nestGears(gears, sheetWidth, sheetHeight, spacing, margin, boreClearance)
+    seconds = time.perf_counter() - start
+
+    if filename != '':
+        nesting.writeNestDxf(filename, placements, sheetCount, sheetWidth, sheetHeight)
+    elif placements:
+        # The sketch is made by importing the DXF, which draws the whole nest
+        # in one call instead of a call for every point of every outline.
+        (handle, dxfFilename) = tempfile.mkstemp('.dxf')
+        os.close(handle)
+        try:
+            nesting.writeNestDxf(dxfFilename, placements, sheetCount, sheetWidth, sheetHeight)
+            rootComp = design.rootComponent
+            importMgr = app.importManager
+            options = importMgr.createDXF2DImportOptions(dxfFilename, rootComp.xYConstructionPlane)
+            options.isSingleSketchResult = True
+            importMgr.importToTarget(options, rootComp)
+        finally:
+            os.remove(dxfFilename)
+
+    boreCount = sum(1 for placement in placements if placement.host is not None)
+    return (len(placements), boreCount, sheetCount, seconds)
+
+
+# Formats the result of runNest as a report.
+def formatNestReport(gearCount, boreCount, sheetCount, seconds):
+    return (f'已排样 {gearCount} 个齿轮, 共 {sheetCount} 张板材\n'
+            f'其中 {boreCount} 个齿轮放在其他齿轮的中心孔内\n'
+            f'排样耗时 {seconds:.2f} s')
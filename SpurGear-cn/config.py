@@ -17,5 +17,9 @@ DEBUG = True
 ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 COMPANY_NAME = 'ACME'
 
+# Folder where data that belongs to the user instead of a design, like the 
+# gear presets, is saved so it's available in every document.
+USER_DATA_FOLDER = os.path.join(os.path.expanduser('~'), f'.{ADDIN_NAME}')
+
 # Palettes
 sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
\ No newline at end of file
@@ -0,0 +1,6 @@
+# The gear math of the add-in.  Everything in this package only uses the
+# Python standard library, so gears, nests and unit conversions can be
+# computed and checked outside of Fusion, like the corpus does.
+
+from .involute import *
+from .generation import *
@@ -0,0 +1,429 @@
+# A corpus of reference tooth profiles and a runner that checks a profile
+# generator against it.  Run it from the add-in folder, without Fusion:
+#
+#     python -m lib.gearMath.corpus                  check fullToothProfile
+#     python -m lib.gearMath.corpus --generator mymodule:myProfile
+#     python -m lib.gearMath.corpus --random 5000    also check random gears
+#     python -m lib.gearMath.corpus --update         save a new corpus
+#
+# A generator is called like fullToothProfile and has to return the outline
+# of the tooth centered on the X axis, up the flank below the axis and back
+# down the flank above it.  Every case is checked against the properties
+# every gear has to have, and the grid cases are also compared with the
+# saved outlines, so a faster generator can't quietly change the gears.
+# The grid covers the involute teeth, and the teeth generated by the rack
+# with a profile shift and a tip radius, which is the root fillet.
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import importlib
+import itertools
+import multiprocessing
+from . import involute
+from . import generation
+from . import quantities
+
+# The file with the reference outlines.
+CORPUS_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'goldenCorpus.json')
+CORPUS_SCHEMA = 3
+
+# The grid of gears in the corpus.  The diametral pitches are teeth per inch,
+# the first four are modules of 0.5, 1, 2 and 4 mm.  A pressure angle of 35
+# degrees is too large for the rack to have a tip, so those teeth aren't
+# generated.  Lengths are in centimeters.
+DIAMETRAL_PITCHES = (50.8, 25.4, 12.7, 6.35, 48.0, 24.0, 10.0, 3.0)
+TOOTH_COUNTS = (4, 5, 6, 9, 12, 17, 25, 40, 80, 150)
+PRESSURE_ANGLES = (14.5, 20.0, 25.0, 35.0)
+BACKLASHES = (0.0, 0.005, 0.02)
+
+# The profile shifts, in modules, and the tip radii of the rack, which are
+# multiples of the module, that are added to the grid.  The shape doesn't
+# depend on the size of the gear, so they're only combined with a metric
+# and an English diametral pitch and no backlash.
+SHIFT_DIAMETRAL_PITCHES = (25.4, 3.0)
+PROFILE_SHIFTS = (-0.75, -0.5, -0.25, 0.0, 0.25, 0.5)
+TIP_RADII = (0.0, 0.25, 0.38)
+
+# The number of points on each flank.
+POINT_COUNT = 15
+
+# The tolerances, in centimeters.  A point can move PROFILE_TOLERANCE from
+# its reference position.  The tooth thickness is measured by interpolating
+# between the points of the outline, so it's checked to a fraction of the
+# thickness instead.  The points of a generated flank are only as close to
+# the curve as GENERATED_TOLERANCE, so its thickness can be off by that much
+# more.
+PROFILE_TOLERANCE = 1e-6
+SYMMETRY_TOLERANCE = 1e-9
+DIAMETER_TOLERANCE = 1e-9
+RADIUS_TOLERANCE = 1e-9
+THICKNESS_TOLERANCE = 0.002
+
+# The number of cases given to a process at a time.
+CHUNK_SIZE = 64
+
+
+# Returns the default generator, which is the one the add-in builds gears with.
+def defaultGenerator():
+    return 'lib.gearMath.generation:fullToothProfile'
+
+
+# Imports a generator named "module:function".
+def loadGenerator(name):
+    (moduleName, functionName) = name.split(':')
+    return getattr(importlib.import_module(moduleName), functionName)
+
+
+# Returns the name of a case, which is also its key in the corpus.
+def getCaseName(case):
+    return 'dp{diametralPitch:g}_z{numTeeth}_pa{pressureAngle:g}_b{backlash:g}_x{profileShift:g}_r{tipRadius:g}'.format(**case)
+
+
+# Returns whether the spur gear dialog accepts the gear of a case, which it
+# doesn't when the tooth is pointed, like the small gears at 35 degrees, or
+# when a negative profile shift leaves an outline that can't be drawn.
+def isValidCase(case):
+    return getCaseGeometry(case)['isValid']
+
+
+# Returns the cases of the grid.
+def gridCases():
+    cases = []
+    for (diametralPitch, numTeeth, pressureAngle, backlash) in itertools.product(
+            DIAMETRAL_PITCHES, TOOTH_COUNTS, PRESSURE_ANGLES, BACKLASHES):
+        case = {'diametralPitch': diametralPitch, 'numTeeth': numTeeth, 'pressureAngle': pressureAngle,
+                'backlash': backlash, 'profileShift': 0.0, 'tipRadius': 0.0}
+        if isValidCase(case):
+            cases.append(case)
+
+    for (diametralPitch, numTeeth, pressureAngle, profileShift, tipRadius) in itertools.product(
+            SHIFT_DIAMETRAL_PITCHES, TOOTH_COUNTS, PRESSURE_ANGLES, PROFILE_SHIFTS, TIP_RADII):
+        if profileShift == 0 and tipRadius == 0:
+            continue
+
+        case = {'diametralPitch': diametralPitch, 'numTeeth': numTeeth, 'pressureAngle': pressureAngle,
+                'backlash': 0.0, 'profileShift': profileShift, 'tipRadius': tipRadius}
+        if isValidCase(case):
+            cases.append(case)
+
+    return cases
+
+
+# Returns random cases that cover the range of the grid.  They aren't in the
+# corpus so only the properties are checked.
+def randomCases(count, seed):
+    generator = random.Random(seed)
+    cases = []
+    while len(cases) < count:
+        case = {'diametralPitch': round(math.exp(generator.uniform(math.log(2.0), math.log(64.0))), 4),
+                'numTeeth': generator.randint(4, 200),
+                'pressureAngle': round(generator.uniform(14.5, 35.0), 3),
+                'backlash': round(generator.uniform(0.0, 0.02), 5),
+                'profileShift': round(generator.uniform(-1.0, 0.6), 3),
+                'tipRadius': round(generator.uniform(0.0, 0.38), 3)}
+        if isValidCase(case):
+            cases.append(case)
+
+    return cases
+
+
+# Computes the sizes of the gear of a case the same way the add-in does, and
+# checks it the same way the dialog does.  A generated flank of a valid case
+# is also computed to find the radius the undercut reaches, where the
+# involute starts.
+def getCaseGeometry(case):
+    diametralPitch = quantities.diametralPitchPerCm(case['diametralPitch'])
+    pressureAngle = case['pressureAngle'] * (math.pi/180)
+    (pitchDia, rootDia, baseCircleDia, outsideDia) = involute.gearDiameters(diametralPitch, case['numTeeth'], pressureAngle, case['profileShift'])
+    geometry = {'pitchDia': pitchDia, 'rootDia': rootDia, 'baseCircleDia': baseCircleDia, 'outsideDia': outsideDia,
+                'tipRadius': case['tipRadius'] / diametralPitch,
+                'hasRackTip': generation.getRackTip(case['numTeeth'], pitchDia, baseCircleDia, rootDia,
+                                                    case['profileShift'], case['backlash'])[1] > 0,
+                'isGenerated': generation.isGeneratedFlank(case['numTeeth'], pitchDia, baseCircleDia, rootDia,
+                                                           case['backlash'], case['profileShift']),
+                'involuteRadius': 0.0}
+    geometry['isValid'] = (generation.isValidToothOutline(case['numTeeth'], pitchDia, baseCircleDia, rootDia, outsideDia,
+                                                          case['backlash'], case['profileShift'], geometry['tipRadius']) and
+                           generation.tipHalfAngle(case['numTeeth'], pitchDia, baseCircleDia, outsideDia,
+                                                   case['backlash'], case['profileShift']) > 0)
+    if geometry['isValid'] and geometry['isGenerated']:
+        (involuteXs, involuteYs) = generation.generatedFlank(case['numTeeth'], pitchDia, baseCircleDia, rootDia, outsideDia,
+                                                             case['backlash'], case['profileShift'], geometry['tipRadius'])[-1]
+        geometry['involuteRadius'] = math.hypot(involuteXs[0], involuteYs[0])
+
+    return geometry
+
+
+# Calls a generator for a case and returns the outline as (xs, ys).
+def generateProfile(generator, case, geometry):
+    return generator(case['numTeeth'], geometry['pitchDia'], geometry['baseCircleDia'], geometry['rootDia'], geometry['outsideDia'],
+                     case['backlash'], case['profileShift'], geometry['tipRadius'], POINT_COUNT)
+
+
+# Returns the angle of the outline where it crosses a radius on the flank
+# between the points start and end, interpolating through the two points on
+# either side of it and the next one, since a straight line between points
+# that are far apart misses the curve.  Returns None if the flank doesn't
+# reach the radius.
+def angleAtRadius(xs, ys, start, end, step, radius):
+    points = [(math.hypot(xs[i], ys[i]), math.atan2(ys[i], xs[i])) for i in range(start, end, step)]
+    for i in range(1, len(points)):
+        (previous, current) = (points[i - 1], points[i])
+        if min(previous[0], current[0]) <= radius <= max(previous[0], current[0]):
+            if current[0] == previous[0]:
+                return current[1]
+            other = points[i + 1] if i + 1 < len(points) else points[i - 2] if i >= 2 else None
+            if other is None or other[0] in (previous[0], current[0]):
+                t = (radius - previous[0]) / (current[0] - previous[0])
+                return previous[1] + (current[1] - previous[1]) * t
+
+            angle = 0.0
+            for (a, b, c) in ((previous, current, other), (current, other, previous), (other, previous, current)):
+                angle += a[1] * (radius - b[0]) * (radius - c[0]) / ((a[0] - b[0]) * (a[0] - c[0]))
+            return angle
+
+    return None
+
+
+# Returns the space between two teeth where the flanks meet the root circle,
+# or where they start if the base circle is outside of it.
+def getRootGap(case, geometry, xs, ys):
+    count = len(xs)
+    rootRadius = max(geometry['rootDia'] / 2.0, math.hypot(xs[0], ys[0]))
+    lowerAngle = angleAtRadius(xs, ys, 0, count // 2, 1, rootRadius)
+    upperAngle = angleAtRadius(xs, ys, count - 1, count // 2 - 1, -1, rootRadius)
+    if lowerAngle is None or upperAngle is None:
+        lowerAngle = upperAngle = math.atan2(ys[0], xs[0])
+
+    return rootRadius * ((2 * math.pi / case['numTeeth']) - abs(upperAngle - lowerAngle))
+
+
+# Returns whether the segments from a to b and from c to d cross.  Segments
+# that only touch at an end don't.
+def doSegmentsCross(ax, ay, bx, by, cx, cy, dx, dy):
+    def side(px, py, qx, qy, rx, ry):
+        return (qx - px) * (ry - py) - (qy - py) * (rx - px)
+
+    return (side(ax, ay, bx, by, cx, cy) * side(ax, ay, bx, by, dx, dy) < 0 and
+            side(cx, cy, dx, dy, ax, ay) * side(cx, cy, dx, dy, bx, by) < 0)
+
+
+# Returns the index of the first segment of the outline, closed by the line
+# across the root, that crosses a later segment, or None if none do.
+def findSelfIntersection(xs, ys):
+    count = len(xs)
+    for i in range(0, count):
+        (ax, ay, bx, by) = (xs[i], ys[i], xs[(i + 1) % count], ys[(i + 1) % count])
+        for j in range(i + 2, count):
+            if i == 0 and j == count - 1:
+                continue
+            if doSegmentsCross(ax, ay, bx, by, xs[j], ys[j], xs[(j + 1) % count], ys[(j + 1) % count]):
+                return i
+
+    return None
+
+
+# Checks the properties every tooth has to have and returns a list of the
+# problems found.  The outline has to be symmetric about the X axis, its
+# thickness at the pitch circle has to be half the circular pitch plus what
+# the profile shift adds and less half the backlash, or less than that if
+# the undercut reaches past the pitch circle, it has to reach the outside
+# diameter and not go past it, and it can't overlap the next tooth at the
+# root or cross the middle of the space above the root circle, unless the
+# rack has no tip and the flanks of the space meet above the root circle.
+# The radius has to grow up each flank, the outline can't
+# cross itself, and it can't go inside the root circle, or the base circle
+# for an involute that starts below the root.
+def checkProperties(case, geometry, xs, ys):
+    problems = []
+    count = len(xs)
+    if count != len(ys) or count < 4 or count % 2 != 0:
+        return ['轮廓点数不正确: ' + str(count)]
+
+    for i in range(0, count // 2):
+        j = count - 1 - i
+        if abs(xs[i] - xs[j]) > SYMMETRY_TOLERANCE or abs(ys[i] + ys[j]) > SYMMETRY_TOLERANCE:
+            problems.append(f'轮廓关于 X 轴不对称 (第 {i} 点)')
+            break
+
+    pitchRadius = geometry['pitchDia'] / 2.0
+    lowerAngle = angleAtRadius(xs, ys, 0, count // 2, 1, pitchRadius)
+    upperAngle = angleAtRadius(xs, ys, count - 1, count // 2 - 1, -1, pitchRadius)
+    module = geometry['pitchDia'] / case['numTeeth']
+    pressureAngle = case['pressureAngle'] * (math.pi/180)
+    expectedThickness = (math.pi * module / 2.0 + 2 * case['profileShift'] * module * math.tan(pressureAngle) -
+                         case['backlash'] / 2.0)
+    thicknessTolerance = THICKNESS_TOLERANCE * expectedThickness
+    if geometry['isGenerated']:
+        thicknessTolerance += 2 * generation.GENERATED_TOLERANCE
+    if lowerAngle is None or upperAngle is None:
+        problems.append('轮廓没有经过分度圆')
+    else:
+        thickness = (upperAngle - lowerAngle) * pitchRadius
+        if geometry['involuteRadius'] > pitchRadius:
+            if thickness > expectedThickness + thicknessTolerance:
+                problems.append(f'分度圆齿厚 {thickness:.6f} 应小于 {expectedThickness:.6f}')
+        elif abs(thickness - expectedThickness) > thicknessTolerance:
+            problems.append(f'分度圆齿厚 {thickness:.6f} 应为 {expectedThickness:.6f}')
+
+    outsideRadius = max(math.hypot(xs[i], ys[i]) for i in range(0, count))
+    if abs(outsideRadius - geometry['outsideDia'] / 2.0) > DIAMETER_TOLERANCE:
+        problems.append(f'齿顶圆直径 {outsideRadius * 2:.9f} 应为 {geometry["outsideDia"]:.9f}')
+
+    gap = getRootGap(case, geometry, xs, ys)
+    if geometry['hasRackTip'] and gap < -DIAMETER_TOLERANCE:
+        problems.append(f'齿根处与相邻齿重叠 ({gap:.6f})')
+    if geometry['hasRackTip']:
+        for i in range(0, count // 2):
+            if (math.hypot(xs[i], ys[i]) >= geometry['rootDia'] / 2.0 and
+                    math.atan2(ys[i], xs[i]) < -math.pi / case['numTeeth'] - SYMMETRY_TOLERANCE):
+                problems.append(f'齿面越过齿槽中线 (第 {i} 点)')
+                break
+
+    radii = [math.hypot(xs[i], ys[i]) for i in range(0, count // 2)]
+    for i in range(1, len(radii)):
+        if radii[i] < radii[i - 1] - RADIUS_TOLERANCE:
+            problems.append(f'齿廓半径没有沿齿面递增 (第 {i} 点)')
+            break
+
+    innerRadius = min(geometry['rootDia'], geometry['baseCircleDia']) / 2.0
+    if radii[0] < innerRadius - RADIUS_TOLERANCE:
+        problems.append(f'齿廓进入齿根圆内 ({radii[0] * 2:.9f})')
+
+    crossing = findSelfIntersection(xs, ys)
+    if crossing is not None:
+        problems.append(f'轮廓自相交 (第 {crossing} 段)')
+
+    return problems
+
+
+# Compares an outline with its reference, which is the list of coordinates
+# of the points of the lower flank, and returns a list of problems.  The
+# upper flank is already checked by the symmetry.
+def checkReference(case, geometry, points, xs, ys):
+    if len(points) != len(xs):
+        return [f'轮廓点数 {len(xs)} 与参考 {len(points)} 不同']
+
+    for i in range(0, len(xs) // 2):
+        distance = math.hypot(xs[i] - points[2 * i], ys[i] - points[2 * i + 1])
+        if distance > PROFILE_TOLERANCE:
+            return [f'第 {i} 点与参考相差 {distance:.3g} cm']
+
+    return []
+
+
+# Checks a chunk of cases in one process.  Returns a list of (name, problems)
+# for the cases with problems.
+def checkChunk(work):
+    (generatorName, cases, references) = work
+    generator = loadGenerator(generatorName)
+    failures = []
+    for case in cases:
+        name = getCaseName(case)
+        geometry = getCaseGeometry(case)
+        try:
+            (xs, ys) = generateProfile(generator, case, geometry)
+        except Exception as error:
+            failures.append((name, ['生成失败: ' + repr(error)]))
+            continue
+
+        problems = checkProperties(case, geometry, xs, ys)
+        if name in references:
+            problems += checkReference(case, geometry, references[name], xs, ys)
+        if problems:
+            failures.append((name, problems))
+
+    return failures
+
+
+# Reads the corpus, which has the reference outlines keyed by case name.
+def loadCorpus(filename = CORPUS_FILENAME):
+    if not os.path.exists(filename):
+        return None
+
+    with open(filename, encoding='utf-8') as corpusFile:
+        corpus = json.load(corpusFile)
+
+    if corpus.get('schema', 0) != CORPUS_SCHEMA:
+        raise ValueError('The golden corpus has a different layout, update it with --update.')
+
+    return corpus
+
+
+# Saves the outlines of the grid made by a generator as the new references.
+def saveCorpus(generatorName, filename = CORPUS_FILENAME):
+    generator = loadGenerator(generatorName)
+    profiles = {}
+    for case in gridCases():
+        geometry = getCaseGeometry(case)
+        (xs, ys) = generateProfile(generator, case, geometry)
+        points = []
+        for i in range(0, len(xs) // 2):
+            points += [round(xs[i], 8), round(ys[i], 8)]
+        profiles[getCaseName(case)] = points
+
+    with open(filename, 'w', encoding='utf-8') as corpusFile:
+        json.dump({'schema': CORPUS_SCHEMA, 'generator': generatorName, 'pointCount': POINT_COUNT,
+                   'profiles': profiles},
+                  corpusFile, separators=(',', ':'), sort_keys=True)
+
+    return len(profiles)
+
+
+# Checks the cases with a pool of processes.  Returns the failures.
+def runCases(generatorName, cases, corpus, processes = None):
+    work = []
+    for start in range(0, len(cases), CHUNK_SIZE):
+        chunk = cases[start:start + CHUNK_SIZE]
+        references = {}
+        for case in chunk:
+            name = getCaseName(case)
+            if name in corpus['profiles']:
+                references[name] = corpus['profiles'][name]
+        work.append((generatorName, chunk, references))
+
+    failures = []
+    with multiprocessing.Pool(processes) as pool:
+        for chunkFailures in pool.imap_unordered(checkChunk, work):
+            failures += chunkFailures
+
+    return sorted(failures)
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description='Checks a tooth profile generator against the golden corpus.')
+    parser.add_argument('--generator', default=defaultGenerator(), help='the generator to check, as module:function')
+    parser.add_argument('--random', type=int, default=0, help='the number of random gears to check as well')
+    parser.add_argument('--seed', type=int, default=1, help='the seed of the random gears')
+    parser.add_argument('--processes', type=int, default=None, help='the number of processes, all cores by default')
+    parser.add_argument('--update', action='store_true', help='save the outlines of the generator as the new corpus')
+    args = parser.parse_args(argv)
+
+    if args.update:
+        count = saveCorpus(args.generator)
+        print(f'Saved {count} reference profiles to {CORPUS_FILENAME}')
+        return 0
+
+    corpus = loadCorpus()
+    if corpus is None:
+        print('There is no golden corpus, create it with --update.')
+        return 1
+
+    cases = gridCases() + randomCases(args.random, args.seed)
+    start = time.perf_counter()
+    failures = runCases(args.generator, cases, corpus, args.processes)
+    seconds = time.perf_counter() - start
+
+    for (name, problems) in failures:
+        print(name + ': ' + '; '.join(problems))
+    print(f'{len(cases) - len(failures)} of {len(cases)} cases passed in {seconds:.2f} s')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
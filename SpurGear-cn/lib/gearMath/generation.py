@@ -0,0 +1,282 @@
+import math
+from array import array
+from . import involute
+
+# Generates the flank of a tooth the way it's cut, by rolling the gear on a
+# rack with a rounded tip.  The rack's flank cuts the involute, the rounded
+# tip cuts the root fillet and, on gears with few teeth, undercuts the
+# bottom of the involute.  Each part has a closed form, so only the point
+# where the fillet crosses the involute has to be searched for.
+
+# The number of points computed along the fillet and along the involute
+# before they're reduced to the points needed for the splines.
+GENERATED_POINT_COUNT = 64
+
+# The distance in centimeters the splines can be from the computed flank.
+GENERATED_TOLERANCE = 0.0001
+
+
+# The involute function.
+def inv(angle):
+    return math.tan(angle) - angle
+
+
+# Returns the center distance two meshing gears run at with no backlash.
+# Without a profile shift it's the sum of the pitch radii.  The shifts make
+# the teeth thicker, which pushes the gears apart until they mesh at the
+# operating pressure angle, where
+#     inv(operating angle) = inv(pressure angle) + 2 (x1 + x2) tan(pressure angle) / (z1 + z2)
+# and the center distance is the sum of the pitch radii times the ratio of
+# the cosines of the two angles.  The operating angle is found by Newton's
+# method, starting from the pressure angle.
+def operatingCenterDistance(numTeeth1, pitchDia1, profileShift1, numTeeth2, pitchDia2, profileShift2, pressureAngle):
+    centerDistance = (pitchDia1 + pitchDia2) / 2.0
+    if profileShift1 + profileShift2 == 0:
+        return centerDistance
+
+    target = inv(pressureAngle) + 2 * (profileShift1 + profileShift2) * math.tan(pressureAngle) / (numTeeth1 + numTeeth2)
+    operatingAngle = pressureAngle
+    for i in range(0, 50):
+        step = (inv(operatingAngle) - target) / math.tan(operatingAngle)**2
+        operatingAngle -= step
+        if abs(step) < 1e-15:
+            break
+
+    return centerDistance * math.cos(pressureAngle) / math.cos(operatingAngle)
+
+
+# Returns the largest tip radius the rack of a gear can have.  It's the
+# radius where the rounded corners on each side of the tip meet, so there's
+# no flat left at the tip.
+def maxTipRadius(numTeeth, pitchDia, baseCircleDia, rootDia, profileShift, backlash):
+    (pressureAngle, rackTipWidth) = getRackTip(numTeeth, pitchDia, baseCircleDia, rootDia, profileShift, backlash)
+    return rackTipWidth * math.cos(pressureAngle) / (1 - math.sin(pressureAngle))
+
+
+# Returns the pressure angle and half the width of the flat tip of the rack
+# that cuts a gear, before the corners are rounded.
+def getRackTip(numTeeth, pitchDia, baseCircleDia, rootDia, profileShift, backlash):
+    pressureAngle = math.acos(baseCircleDia / pitchDia)
+    module = pitchDia / numTeeth
+    dedendum = (pitchDia - rootDia) / 2.0 + profileShift * module
+    rackTipWidth = math.pi * module / 4.0 + backlash / 4.0 - dedendum * math.tan(pressureAngle)
+    return (pressureAngle, rackTipWidth)
+
+
+# Returns whether the flank of a gear is generated by its rack, which is how
+# the full detail gear is drawn when the involute doesn't reach the root
+# circle or the profile is shifted.  At large pressure angles the flanks of
+# the rack meet before its tip, so there's nothing to cut the root with and
+# the flank is drawn as the involute and a radial line down to the root.
+def isGeneratedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, backlash, profileShift):
+    if baseCircleDia < rootDia and profileShift == 0:
+        return False
+
+    (pressureAngle, rackTipWidth) = getRackTip(numTeeth, pitchDia, baseCircleDia, rootDia, profileShift, backlash)
+    return rackTipWidth > 0
+
+
+# Computes the flank of the tooth that's centered on the X axis, below the
+# axis like toothFlank, as it's cut by a rack with a tip radius.  The flank
+# goes from the root circle to the outside diameter and is returned as a
+# list of pieces, the root fillet and then the involute, each as (xs, ys).
+# The pieces meet at a corner if the gear is undercut, otherwise they're
+# tangent.  Each piece only has the points needed to stay within tolerance
+# of the flank when a spline is fit through them.  The tip radius is
+# limited to the largest radius the rack can have.
+def generatedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift, tipRadius, tolerance = GENERATED_TOLERANCE):
+    pitchRadius = pitchDia / 2.0
+    baseRadius = baseCircleDia / 2.0
+    rootRadius = rootDia / 2.0
+    outsideRadius = outsideDia / 2.0
+    module = pitchDia / numTeeth
+
+    (pressureAngle, rackTipWidth) = getRackTip(numTeeth, pitchDia, baseCircleDia, rootDia, profileShift, backlash)
+    if rackTipWidth <= 0:
+        raise ValueError('The rack that cuts the gear has no tip.')
+    tanPressureAngle = math.tan(pressureAngle)
+    tipRadius = min(max(tipRadius, 0.0), maxTipRadius(numTeeth, pitchDia, baseCircleDia, rootDia, profileShift, backlash))
+
+    # The rack is measured from the gear center along X and from the middle
+    # of the rack tooth along Y.  Half the width of the rack tooth where it
+    # rolls on the pitch circle, which is half the width of the space.
+    rollWidth = math.pi * module / 4.0 - profileShift * module * tanPressureAngle + backlash / 4.0
+
+    # The center of the rounded corner of the rack tip.
+    centerX = rootRadius + tipRadius
+    centerY = rollWidth + (centerX - pitchRadius) * tanPressureAngle - tipRadius / math.cos(pressureAngle)
+
+    # The angle of the involute of the space centered on the X axis at a
+    # radius, measured from the middle of the space.
+    def involuteAngle(radius):
+        return rollWidth / pitchRadius - inv(pressureAngle) + inv(math.acos(baseRadius / radius))
+
+    # The point of the fillet cut where the normal of the rounded corner is
+    # at the angle beta from the rack tip.  The cut happens when that normal
+    # goes through the pitch point, which gives the roll angle of the gear.
+    # Returns the point as (radius, angle) from the middle of the space.
+    def filletPoint(beta):
+        tanBeta = math.tan(beta)
+        rollAngle = -(centerY - (pitchRadius - centerX) * tanBeta) / pitchRadius
+        x = centerX - tipRadius * math.cos(beta)
+        y = tipRadius * math.sin(beta) + (pitchRadius - centerX) * tanBeta
+        return (math.hypot(x, y), math.atan2(y, x) - rollAngle)
+
+    # How far the fillet is into the involute at a point of the fillet.  It's
+    # positive where the fillet undercuts the involute.
+    def undercut(beta):
+        (radius, angle) = filletPoint(beta)
+        if radius < baseRadius:
+            return math.inf
+        return angle - involuteAngle(radius)
+
+    # The fillet ends where the rounded corner meets the flank of the rack.
+    # The gear is undercut if the flank of the rack is still cutting past
+    # the point where the line of action touches the base circle, and then
+    # the fillet ends where it crosses the involute instead.  Scan for the
+    # crossing and then refine it by bisection.
+    lastBeta = math.pi / 2 - pressureAngle
+    betas = [lastBeta * i / (GENERATED_POINT_COUNT - 1) for i in range(0, GENERATED_POINT_COUNT)]
+    flankDepth = pitchRadius - (centerX - tipRadius * math.sin(pressureAngle))
+    isUndercut = flankDepth / math.sin(pressureAngle) > pitchRadius * math.sin(pressureAngle)
+    previous = undercut(betas[0])
+    for i in range(1, len(betas) if isUndercut else 0):
+        current = undercut(betas[i])
+        if previous > 0 and current <= 0:
+            (low, high) = (betas[i - 1], betas[i])
+            for j in range(0, 50):
+                middle = (low + high) / 2.0
+                if undercut(middle) > 0:
+                    low = middle
+                else:
+                    high = middle
+            lastBeta = high
+            betas = [lastBeta * k / (GENERATED_POINT_COUNT - 1) for k in range(0, GENERATED_POINT_COUNT)]
+            break
+        previous = current
+
+    # Move the points from the space centered on the X axis to the tooth.
+    spaceAngle = math.pi / numTeeth
+    filletXs = array('d')
+    filletYs = array('d')
+    for beta in betas:
+        (radius, angle) = filletPoint(beta)
+        filletXs.append(radius * math.cos(angle - spaceAngle))
+        filletYs.append(radius * math.sin(angle - spaceAngle))
+
+    joinRadius = max(filletPoint(lastBeta)[0], baseRadius)
+    involuteXs = array('d')
+    involuteYs = array('d')
+    for i in range(0, GENERATED_POINT_COUNT):
+        radius = joinRadius + (outsideRadius - joinRadius) * i / (GENERATED_POINT_COUNT - 1)
+        angle = involuteAngle(radius) - spaceAngle
+        involuteXs.append(radius * math.cos(angle))
+        involuteYs.append(radius * math.sin(angle))
+
+    # Start the involute exactly where the fillet ends.
+    involuteXs[0] = filletXs[-1]
+    involuteYs[0] = filletYs[-1]
+
+    return [simplifyPoints(filletXs, filletYs, tolerance), simplifyPoints(involuteXs, involuteYs, tolerance)]
+
+
+# Returns whether the outline of a tooth can be drawn.  The tooth has to
+# reach past the pitch circle and the root circle can't be at the center.
+# A negative profile shift on a gear with few teeth can make the undercut
+# cut through the middle of the tooth or through the whole involute, so a
+# generated flank also has to go outward from the root to the outside
+# diameter without crossing the X axis or the middle of the space, which
+# keeps the outline from crossing itself or the next tooth.
+def isValidToothOutline(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift, tipRadius):
+    if rootDia <= 0 or outsideDia <= pitchDia:
+        return False
+    if not isGeneratedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, backlash, profileShift):
+        return True
+
+    spaceAngle = math.pi / numTeeth
+    lastRadius = 0.0
+    for (pieceXs, pieceYs) in generatedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift, tipRadius):
+        for i in range(0, len(pieceXs)):
+            radius = math.hypot(pieceXs[i], pieceYs[i])
+            angle = math.atan2(pieceYs[i], pieceXs[i])
+            if radius < lastRadius - 1e-9 or angle >= 0 or angle < -spaceAngle - 1e-9:
+                return False
+            lastRadius = radius
+
+    return lastRadius <= outsideDia / 2.0 + 1e-9
+
+
+# Calculates the outline of the tooth that's centered on the X axis the way
+# the full detail gear draws it, like toothProfile.  A generated flank is the
+# pieces from generatedFlank joined together, otherwise the flank is the
+# involute from toothFlank.  Returns the coordinates as (xs, ys).
+def fullToothProfile(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift = 0, tipRadius = 0, pointCount = 15):
+    if not isGeneratedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, backlash, profileShift):
+        return involute.toothProfile(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, pointCount, profileShift)
+
+    # Each piece starts at the last point of the piece before it.
+    flankXs = array('d')
+    flankYs = array('d')
+    for (pieceXs, pieceYs) in generatedFlank(numTeeth, pitchDia, baseCircleDia, rootDia, outsideDia, backlash, profileShift, tipRadius):
+        start = 1 if len(flankXs) > 0 else 0
+        flankXs.extend(pieceXs[start:])
+        flankYs.extend(pieceYs[start:])
+
+    xs = array('d', flankXs)
+    ys = array('d', flankYs)
+    for i in range(len(flankXs) - 1, -1, -1):
+        xs.append(flankXs[i])
+        ys.append(-flankYs[i])
+
+    return (xs, ys)
+
+
+# Reduces a curve given as points to the points needed to stay within the
+# tolerance of it, using the Douglas-Peucker algorithm.  The first and last
+# points are always kept.  Returns the kept points as (xs, ys).
+def simplifyPoints(xs, ys, tolerance):
+    count = len(xs)
+    keep = [False] * count
+    keep[0] = True
+    keep[count - 1] = True
+
+    stack = [(0, count - 1)]
+    while stack:
+        (first, last) = stack.pop()
+        dx = xs[last] - xs[first]
+        dy = ys[last] - ys[first]
+        length = math.hypot(dx, dy)
+
+        farthest = -1
+        farthestDistance = tolerance
+        for i in range(first + 1, last):
+            if length > 0:
+                distance = abs(dx * (ys[i] - ys[first]) - dy * (xs[i] - xs[first])) / length
+            else:
+                distance = math.hypot(xs[i] - xs[first], ys[i] - ys[first])
+            if distance > farthestDistance:
+                farthest = i
+                farthestDistance = distance
+
+        if farthest >= 0:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    simpleXs = array('d', (xs[i] for i in range(0, count) if keep[i]))
+    simpleYs = array('d', (ys[i] for i in range(0, count) if keep[i]))
+    return (simpleXs, simpleYs)
+
+
+# Returns half the angle of the tooth at the outside diameter, which is zero
+# or less when the profile shift or the backlash makes the tooth pointed.  A
+# negative profile shift can move the outside diameter inside the base
+# circle, where there's no involute and no tip, which is returned as zero.
+def tipHalfAngle(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, profileShift):
+    if outsideDia <= baseCircleDia:
+        return 0.0
+
+    pressureAngle = math.acos(baseCircleDia / pitchDia)
+    outsidePressureAngle = math.acos(baseCircleDia / outsideDia)
+    pitchHalfAngle = (math.pi / (2 * numTeeth)) + (2 * profileShift * math.tan(pressureAngle) / numTeeth) - (backlash / (pitchDia / 2.0)) * .25
+    return pitchHalfAngle + inv(pressureAngle) - inv(outsidePressureAngle)
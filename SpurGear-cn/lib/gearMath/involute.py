@@ -0,0 +1,111 @@
+import math
+from array import array
+from . import quantities
+
+
+# Calculate a point along an involute curve.  Returns the (x, y) coordinates.
+def involutePoint(baseCircleRadius, distFromCenterToInvolutePoint):
+    # Calculate the other side of the right-angle triangle defined by the base circle and the current distance radius.
+    # This is also the length of the involute chord as it comes off of the base circle.
+    triangleSide = math.sqrt(math.pow(distFromCenterToInvolutePoint,2) - math.pow(baseCircleRadius,2))
+
+    # Calculate the angle of the involute.
+    alpha = triangleSide / baseCircleRadius
+
+    # Calculate the angle where the current involute point is.
+    theta = alpha - math.acos(baseCircleRadius / distFromCenterToInvolutePoint)
+
+    # Calculate the coordinates of the involute point.
+    x = distFromCenterToInvolutePoint * math.cos(theta)
+    y = distFromCenterToInvolutePoint * math.sin(theta)
+
+    return (x, y)
+
+
+# Computes the pitch, root, base circle and outside diameters of a gear.  The
+# diametral pitch is expected in teeth per centimeter of pitch diameter.  A
+# profile shift moves the generating rack out by that many modules, which
+# moves the root and outside circles out by the same amount.
+def gearDiameters(diametralPitch, numTeeth, pressureAngle, profileShift = 0):
+    pitchDia = numTeeth / diametralPitch
+
+    #addendum = 1.0 / diametralPitch
+    if (diametralPitch < (20 *(math.pi/180))-0.000001):
+        dedendum = 1.157 / diametralPitch
+    else:
+        circularPitch = math.pi / diametralPitch
+        if circularPitch >= 20:
+            dedendum = 1.25 / diametralPitch
+        else:
+            dedendum = (1.2 / diametralPitch) + quantities.inchesToCm(.002)
+
+    rootDia = pitchDia - (2 * dedendum)
+
+    baseCircleDia = pitchDia * math.cos(pressureAngle)
+    outsideDia = (numTeeth + 2) / diametralPitch
+
+    shift = 2 * profileShift / diametralPitch
+    rootDia += shift
+    outsideDia += shift
+
+    return (pitchDia, rootDia, baseCircleDia, outsideDia)
+
+
+# Calculates the points along one side of the tooth that's centered on the X
+# axis, from the base circle out to the outside diameter.  These are the
+# points below the X axis, the other side of the tooth is the same points
+# mirrored about the X axis.  The coordinates are returned as two arrays of
+# doubles, (xs, ys), so nothing else is created until the points are used.
+# A profile shift makes the tooth thicker at the pitch diameter.
+def toothFlank(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, pointCount = 15, profileShift = 0):
+    baseCircleRadius = baseCircleDia / 2.0
+    involuteSize = (outsideDia - baseCircleDia) / 2.0
+
+    # Get the point along the tooth that's at the pitch diameter and then
+    # calculate the angle to that point.
+    (pitchX, pitchY) = involutePoint(baseCircleRadius, pitchDia / 2.0)
+    pitchPointAngle = math.atan(pitchY / pitchX)
+
+    # Determine the angle defined by the tooth thickness as measured at
+    # the pitch diameter circle.
+    toothThicknessAngle = (2 * math.pi) / (2 * numTeeth)
+
+    # Determine the angle needed for the specified backlash.
+    backlashAngle = (backlash / (pitchDia / 2.0)) * .25
+
+    # Determine the angle added to each side of the tooth by the profile 
+    # shift, which is 2 * x * tan(pressure angle) modules of thickness.
+    cosPressureAngle = baseCircleDia / pitchDia
+    shiftAngle = 2 * profileShift * (math.sqrt(1 - cosPressureAngle * cosPressureAngle) / cosPressureAngle) / numTeeth
+
+    # Determine the angle to rotate the curve.
+    rotateAngle = -((toothThicknessAngle/2) + shiftAngle + pitchPointAngle - backlashAngle)
+
+    # Calculate the points along the involute curve and rotate them so the
+    # middle of the tooth lies on the x axis.
+    cosAngle = math.cos(rotateAngle)
+    sinAngle = math.sin(rotateAngle)
+    xs = array('d', bytes(8 * pointCount))
+    ys = array('d', bytes(8 * pointCount))
+    for i in range(0, pointCount):
+        involuteIntersectionRadius = baseCircleRadius + ((involuteSize / (pointCount - 1)) * i)
+        (x, y) = involutePoint(baseCircleRadius, involuteIntersectionRadius)
+        xs[i] = x * cosAngle - y * sinAngle
+        ys[i] = x * sinAngle + y * cosAngle
+
+    return (xs, ys)
+
+
+# Calculates the outline of the tooth that's centered on the X axis.  The 
+# points go up the flank below the X axis from the base circle to the
+# outside diameter and back down the flank above it, so the outline is 
+# symmetric about the X axis.  Returns the coordinates as (xs, ys).
+def toothProfile(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, pointCount = 15, profileShift = 0):
+    (flankXs, flankYs) = toothFlank(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, pointCount, profileShift)
+    xs = array('d', flankXs)
+    ys = array('d', flankYs)
+    for i in range(pointCount - 1, -1, -1):
+        xs.append(flankXs[i])
+        ys.append(-flankYs[i])
+
+    return (xs, ys)
@@ -0,0 +1,403 @@
+import math
+from . import involute
+from . import quantities
+
+# Nests gear outlines on sheets for cutting.  Lengths are in centimeters.
+
+# The number of points on each flank of the outlines.  The outline is only
+# used to keep the gears apart, so it's coarser than the modeled gear.
+OUTLINE_FLANK_POINTS = 6
+
+
+# The outline of a gear to nest.  The outline is a closed polygon of the
+# teeth, centered on the origin, made by gearOutline, and the bore is a 
+# circle at the center.
+class NestGear():
+    def __init__(self, key, numTeeth, outline, rootRadius, outsideRadius, holeRadius):
+        self.key = key
+        self.numTeeth = numTeeth
+        self.outline = outline
+        self.rootRadius = rootRadius
+        self.outsideRadius = outsideRadius
+        self.holeRadius = holeRadius
+
+        # The length of the longest segment of the outline.
+        count = len(outline)
+        self.maxSegment = max(math.hypot(outline[i][0] - outline[i - 1][0], outline[i][1] - outline[i - 1][1]) for i in range(0, count))
+
+
+# A gear placed on a sheet.  The gear is moved so its center is at (x, y).
+# If it's placed in the bore of another gear, host is that placement.
+class Placement():
+    def __init__(self, gear, sheet, x, y, host = None):
+        self.gear = gear
+        self.sheet = sheet
+        self.x = x
+        self.y = y
+        self.host = host
+        self.boreUsed = False
+
+        # The order the gear was placed on its sheet.
+        self.order = 0
+
+
+# Computes the outline of a gear as a closed polygon of (x, y) points.  The
+# diametral pitch is in teeth per inch, like the values saved on a gear.
+# The parts of the flanks inside the root circle are moved out to it because
+# the gear is solid there.
+def gearOutline(diametralPitch, numTeeth, pressureAngle, backlash, profileShift = 0, pointCount = OUTLINE_FLANK_POINTS):
+    (pitchDia, rootDia, baseCircleDia, outsideDia) = involute.gearDiameters(quantities.diametralPitchPerCm(diametralPitch), numTeeth, pressureAngle, profileShift)
+    (xs, ys) = involute.toothProfile(numTeeth, pitchDia, baseCircleDia, outsideDia, backlash, pointCount, profileShift)
+    rootRadius = rootDia / 2.0
+
+    outline = []
+    for tooth in range(0, numTeeth):
+        angle = (2 * math.pi / numTeeth) * tooth
+        cosAngle = math.cos(angle)
+        sinAngle = math.sin(angle)
+        for i in range(0, len(xs)):
+            x = xs[i] * cosAngle - ys[i] * sinAngle
+            y = xs[i] * sinAngle + ys[i] * cosAngle
+            radius = math.hypot(x, y)
+            if radius < rootRadius:
+                x *= rootRadius / radius
+                y *= rootRadius / radius
+            outline.append((x, y))
+
+        # Add a point on the root circle half way to the next tooth.
+        midAngle = angle + math.pi / numTeeth
+        outline.append((rootRadius * math.cos(midAngle), rootRadius * math.sin(midAngle)))
+
+    return (outline, rootRadius, outsideDia / 2.0)
+
+
+# A grid of square cells over a sheet used to find the placements near a
+# point without looking at all of them.  Each placement is kept in the cell
+# its center is in, and a search is widened by the largest gear placed.
+class GridIndex():
+    def __init__(self, cellSize):
+        self.cellSize = cellSize
+        self.cells = {}
+        self.maxRadius = 0.0
+
+
+    def insert(self, placement):
+        key = (int(math.floor(placement.x / self.cellSize)), int(math.floor(placement.y / self.cellSize)))
+        self.cells.setdefault(key, []).append(placement)
+        self.maxRadius = max(self.maxRadius, placement.gear.outsideRadius)
+
+
+    # Returns the placements whose outside circle could be within the radius
+    # of the point.
+    def query(self, x, y, radius):
+        size = self.cellSize
+        radius += self.maxRadius
+        found = []
+        for i in range(int(math.floor((x - radius) / size)), int(math.floor((x + radius) / size)) + 1):
+            for j in range(int(math.floor((y - radius) / size)), int(math.floor((y + radius) / size)) + 1):
+                cell = self.cells.get((i, j))
+                if cell:
+                    found.extend(cell)
+
+        return found
+
+
+# Returns the distance from a point to a line segment.
+def pointSegmentDistance(px, py, ax, ay, bx, by):
+    dx = bx - ax
+    dy = by - ay
+    lengthSquared = dx * dx + dy * dy
+    if lengthSquared == 0:
+        return math.hypot(px - ax, py - ay)
+
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / lengthSquared))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+# Returns the segments of the outline of a gear placed at (x, y) that are
+# within the distance of another point.  The points of an outline go around
+# the center in order, one tooth pitch at a time, so only the teeth in the
+# direction of the point are looked at.
+def getNearSegments(gear, x, y, cx, cy, distance):
+    outline = gear.outline
+    count = len(outline)
+    centerDistance = math.hypot(cx - x, cy - y)
+    if centerDistance <= distance:
+        window = math.pi
+    else:
+        window = math.asin(distance / centerDistance)
+
+    # The teeth in the window, with one more on each side because a tooth
+    # starts half a pitch before its center.
+    pitchAngle = 2 * math.pi / gear.numTeeth
+    direction = math.atan2(cy - y, cx - x)
+    firstTooth = int(math.floor((direction - window) / pitchAngle + 0.5)) - 1
+    lastTooth = int(math.floor((direction + window) / pitchAngle + 0.5)) + 1
+    pointsPerTooth = count // gear.numTeeth
+    if (lastTooth - firstTooth + 1) * pointsPerTooth >= count:
+        (first, last) = (0, count - 1)
+    else:
+        (first, last) = (firstTooth * pointsPerTooth, (lastTooth + 1) * pointsPerTooth - 1)
+
+    # A segment can only be near the point if its start is within the 
+    # length of a segment of the distance, which is quick to check.
+    reachSquared = (distance + gear.maxSegment) ** 2
+    segments = []
+    for i in range(first, last + 1):
+        (ax, ay) = outline[i % count]
+        ax += x
+        ay += y
+        if (ax - cx) ** 2 + (ay - cy) ** 2 > reachSquared:
+            continue
+
+        (bx, by) = outline[(i + 1) % count]
+        bx += x
+        by += y
+        if pointSegmentDistance(cx, cy, ax, ay, bx, by) <= distance:
+            segments.append((ax, ay, bx, by))
+
+    return segments
+
+
+# Returns whether two segments intersect.
+def segmentsIntersect(a, b):
+    def cross(ox, oy, px, py, qx, qy):
+        return (px - ox) * (qy - oy) - (py - oy) * (qx - ox)
+
+    d1 = cross(b[0], b[1], b[2], b[3], a[0], a[1])
+    d2 = cross(b[0], b[1], b[2], b[3], a[2], a[3])
+    d3 = cross(a[0], a[1], a[2], a[3], b[0], b[1])
+    d4 = cross(a[0], a[1], a[2], a[3], b[2], b[3])
+    return ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0))
+
+
+# Returns whether a gear placed at (x, y) comes closer than the spacing to a
+# placed gear.  The circles of the gears answer most cases, the outlines are
+# only compared when the teeth of one gear could be between the teeth of the
+# other, and then only the segments in the ring where the teeth overlap.
+def gearsCollide(gear, x, y, other: Placement, spacing):
+    distance = math.hypot(x - other.x, y - other.y)
+    if distance >= gear.outsideRadius + other.gear.outsideRadius + spacing:
+        return False
+    if distance < gear.outsideRadius + other.gear.rootRadius + spacing or distance < gear.rootRadius + other.gear.outsideRadius + spacing:
+        # A tooth of one gear reaches the root circle of the other.
+        return True
+
+    return outlinesCollide(gear, x, y, other, spacing)
+
+
+# Returns whether the outlines of two gears whose teeth overlap come closer
+# than the spacing.
+def outlinesCollide(gear, x, y, other: Placement, spacing):
+    # Get the segments of each outline that are near the other gear.
+    segments1 = getNearSegments(gear, x, y, other.x, other.y, other.gear.outsideRadius + spacing)
+    segments2 = getNearSegments(other.gear, other.x, other.y, x, y, gear.outsideRadius + spacing)
+
+    for segment1 in segments1:
+        for segment2 in segments2:
+            if segmentsIntersect(segment1, segment2):
+                return True
+            if (pointSegmentDistance(segment1[0], segment1[1], *segment2) < spacing or
+                pointSegmentDistance(segment2[0], segment2[1], *segment1) < spacing):
+                return True
+
+    return False
+
+
+# A sheet being filled with gears.
+class Sheet():
+    def __init__(self, index, width, height, cellSize):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.placements = []
+        self.grid = GridIndex(cellSize)
+
+        # The smallest gear that didn't fit on the sheet.  Gears that aren't
+        # smaller than it won't fit either.
+        self.fullRadius = math.inf
+
+
+    # Returns whether a gear fits at (x, y).
+    def fits(self, gear, x, y, margin, spacing):
+        radius = gear.outsideRadius
+        if x - radius < margin - 1e-9 or y - radius < margin - 1e-9:
+            return False
+        if x + radius > self.width - margin + 1e-9 or y + radius > self.height - margin + 1e-9:
+            return False
+
+        # Check the circles of all of the gears near the position before
+        # comparing any outlines, which is much slower.
+        closeGears = []
+        for other in self.grid.query(x, y, radius + spacing):
+            distance = math.hypot(x - other.x, y - other.y)
+            if distance >= radius + other.gear.outsideRadius + spacing:
+                continue
+            if (distance < gear.rootRadius + other.gear.outsideRadius + spacing or
+                distance < radius + other.gear.rootRadius + spacing):
+                return False
+            closeGears.append(other)
+
+        for other in closeGears:
+            if outlinesCollide(gear, x, y, other, spacing):
+                return False
+
+        return True
+
+
+    # Returns the positions where a gear touches the edges of the sheet or
+    # the gears already placed, using the distance between centers given by
+    # the radius of each gear.  Positions that don't fit are checked later.
+    def getCandidates(self, radius, getRadius, margin, spacing):
+        left = margin + radius
+        bottom = margin + radius
+        right = self.width - margin - radius
+        top = self.height - margin - radius
+        candidates = [(left, bottom), (right, bottom), (left, top), (right, top)]
+
+        for placement in self.placements:
+            reach = getRadius(placement.gear) + radius + spacing
+
+            # Touching the gear and an edge of the sheet.
+            for wall in (left, right):
+                dx = wall - placement.x
+                if abs(dx) <= reach:
+                    dy = math.sqrt(reach * reach - dx * dx)
+                    candidates.append((wall, placement.y + dy))
+                    candidates.append((wall, placement.y - dy))
+            for wall in (bottom, top):
+                dy = wall - placement.y
+                if abs(dy) <= reach:
+                    dx = math.sqrt(reach * reach - dy * dy)
+                    candidates.append((placement.x + dx, wall))
+                    candidates.append((placement.x - dx, wall))
+
+            # Touching the gear and each gear near it.
+            for other in self.grid.query(placement.x, placement.y, reach + radius + spacing + getRadius(placement.gear)):
+                if other.order <= placement.order:
+                    continue
+
+                otherReach = getRadius(other.gear) + radius + spacing
+                dx = other.x - placement.x
+                dy = other.y - placement.y
+                distance = math.hypot(dx, dy)
+                if distance == 0 or distance > reach + otherReach or distance < abs(reach - otherReach):
+                    continue
+
+                a = (reach * reach - otherReach * otherReach + distance * distance) / (2 * distance)
+                h = math.sqrt(max(0.0, reach * reach - a * a))
+                mx = placement.x + a * dx / distance
+                my = placement.y + a * dy / distance
+                candidates.append((mx - h * dy / distance, my + h * dx / distance))
+                candidates.append((mx + h * dy / distance, my - h * dx / distance))
+
+        return candidates
+
+
+# Nests gears on as many sheets as needed.  The gears are placed largest
+# first.  A gear is put in the bore of a placed gear if it fits inside the
+# bore with the clearance, otherwise at the lowest, then leftmost, position
+# on the first sheet it fits on.  The teeth of neighboring gears can mesh
+# as long as the outlines stay the spacing apart.  Returns the placements
+# and the number of sheets, and raises a ValueError if a gear is larger
+# than a sheet.
+def nestGears(gears, sheetWidth, sheetHeight, spacing, margin, boreClearance):
+    if not gears:
+        return ([], 0)
+
+    cellSize = 2 * sum(gear.outsideRadius for gear in gears) / len(gears) + spacing
+    sheets = []
+    placements = []
+    bores = []
+
+    # Place the gears in order of decreasing size.
+    for gear in sorted(gears, key=lambda gear: -gear.outsideRadius):
+        if 2 * gear.outsideRadius > min(sheetWidth, sheetHeight) - 2 * margin:
+            raise ValueError(f'{gear.key} 比板材大')
+
+        placement = placeInBore(gear, bores, boreClearance)
+        if placement is None:
+            for sheet in sheets:
+                placement = placeOnSheet(gear, sheet, spacing, margin)
+                if placement is not None:
+                    break
+            else:
+                sheet = Sheet(len(sheets), sheetWidth, sheetHeight, cellSize)
+                sheets.append(sheet)
+                placement = placeOnSheet(gear, sheet, spacing, margin)
+
+        placements.append(placement)
+        if gear.holeRadius > 0:
+            bores.append(placement)
+
+    return (placements, len(sheets))
+
+
+# Puts a gear in the smallest unused bore it fits in, centered in the bore.
+def placeInBore(gear, bores, boreClearance):
+    best = None
+    for host in bores:
+        if not host.boreUsed and gear.outsideRadius + boreClearance <= host.gear.holeRadius:
+            if best is None or host.gear.holeRadius < best.gear.holeRadius:
+                best = host
+
+    if best is None:
+        return None
+
+    best.boreUsed = True
+    return Placement(gear, best.sheet, best.x, best.y, best)
+
+
+# Puts a gear on a sheet at the lowest, then leftmost, position it fits.
+# Candidate positions are first made with the gears meshing, by using the
+# middle of the teeth as their size, and then with the outside circles
+# touching.  Returns None if the gear doesn't fit on the sheet.
+def placeOnSheet(gear, sheet: Sheet, spacing, margin):
+    if gear.outsideRadius >= sheet.fullRadius:
+        return None
+
+    for getRadius in (lambda other: (other.rootRadius + other.outsideRadius) / 2.0, lambda other: other.outsideRadius):
+        candidates = sheet.getCandidates(getRadius(gear), getRadius, margin, spacing)
+        candidates.sort(key=lambda candidate: (round(candidate[1], 6), round(candidate[0], 6)))
+        for (x, y) in candidates:
+            if sheet.fits(gear, x, y, margin, spacing):
+                placement = Placement(gear, sheet.index, x, y)
+                placement.order = len(sheet.placements)
+                sheet.placements.append(placement)
+                sheet.grid.insert(placement)
+                return placement
+
+    sheet.fullRadius = gear.outsideRadius
+    return None
+
+
+# Writes a nest as an R12 DXF file.  Each sheet is drawn as a rectangle with
+# the sheets side by side along X, each gear as a closed polyline and each
+# bore as a circle.  The DXF is in millimeters.
+def writeNestDxf(filename, placements, sheetCount, sheetWidth, sheetHeight):
+    sheetGap = sheetWidth * 0.1
+    lines = ['0', 'SECTION', '2', 'HEADER', '9', '$INSUNITS', '70', '4', '0', 'ENDSEC',
+             '0', 'SECTION', '2', 'ENTITIES']
+
+    def addPolyline(points, layer):
+        lines.extend(['0', 'POLYLINE', '8', layer, '66', '1', '10', '0.0', '20', '0.0', '30', '0.0', '70', '1'])
+        for (x, y) in points:
+            lines.extend(['0', 'VERTEX', '8', layer, '10', format(quantities.cmToMm(x), '.5f'), '20', format(quantities.cmToMm(y), '.5f')])
+        lines.extend(['0', 'SEQEND', '8', layer])
+
+    for sheet in range(0, sheetCount):
+        offset = sheet * (sheetWidth + sheetGap)
+        addPolyline([(offset, 0), (offset + sheetWidth, 0), (offset + sheetWidth, sheetHeight), (offset, sheetHeight)], 'SHEET')
+
+    for placement in placements:
+        offset = placement.sheet * (sheetWidth + sheetGap)
+        x = placement.x + offset
+        y = placement.y
+        addPolyline([(x + px, y + py) for (px, py) in placement.gear.outline], 'GEAR')
+        if placement.gear.holeRadius > 0:
+            lines.extend(['0', 'CIRCLE', '8', 'BORE', '10', format(quantities.cmToMm(x), '.5f'), '20', format(quantities.cmToMm(y), '.5f'),
+                          '40', format(quantities.cmToMm(placement.gear.holeRadius), '.5f')])
+
+    lines.extend(['0', 'ENDSEC', '0', 'EOF'])
+    with open(filename, 'w') as dxfFile:
+        dxfFile.write('\n'.join(lines) + '\n')
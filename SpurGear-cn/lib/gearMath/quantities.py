@@ -0,0 +1,108 @@
+# Converts between the units the add-in works in.  Fusion keeps lengths in
+# centimeters, a gear is specified by a diametral pitch in teeth per inch or
+# a module in millimeters, and files use millimeters.
+
+CM_PER_INCH = 2.54
+MM_PER_INCH = 25.4
+MM_PER_CM = 10.0
+
+
+# Converts between a module in millimeters and a diametral pitch in teeth
+# per inch.
+def moduleToDiametralPitch(module):
+    return MM_PER_INCH / module
+
+
+def diametralPitchToModule(diametralPitch):
+    return MM_PER_INCH / diametralPitch
+
+
+# Returns a diametral pitch in teeth per inch as teeth per centimeter, which
+# is what the gear geometry is computed with.
+def diametralPitchPerCm(diametralPitch):
+    return diametralPitch / CM_PER_INCH
+
+
+def inchesToCm(value):
+    return value * CM_PER_INCH
+
+
+def mmToCm(value):
+    return value / MM_PER_CM
+
+
+def cmToMm(value):
+    return value * MM_PER_CM
+
+
+# The number of results of each kind a UnitsCache keeps.
+UNITS_CACHE_SIZE = 256
+
+# The number of decimals, in centimeters, a value is rounded to before its
+# formatted text is looked up.  Values that round the same format the same
+# at any precision Fusion displays.
+FORMAT_DIGITS = 10
+
+
+# The units of a design for the life of a command dialog.  The units manager
+# and the default length units are looked up once, and the text of each
+# value formatted and the result of each expression checked or evaluated are
+# kept, so a dialog that shows the same values again doesn't call Fusion again.  The
+# units manager is passed in so this doesn't depend on the Fusion API.  A
+# value dragged in the dialog is different every time, so each kind of
+# result is cleared when it reaches UNITS_CACHE_SIZE instead of growing for
+# as long as the dialog is open.
+class UnitsCache():
+    def __init__(self, unitsManager):
+        self.unitsManager = unitsManager
+        self.defaultLengthUnits = unitsManager.defaultLengthUnits
+        self.formatted = {}
+        self.validExpressions = {}
+        self.values = {}
+        self.apiCalls = 0
+
+
+    # Returns a length in centimeters formatted in the units, like the
+    # formatInternalValue method of the units manager.
+    def format(self, value, units, showUnits = True):
+        key = (round(value, FORMAT_DIGITS), units, showUnits)
+        text = self.formatted.get(key)
+        if text is None:
+            self.apiCalls += 1
+            text = self.unitsManager.formatInternalValue(value, units, showUnits)
+            self.remember(self.formatted, key, text)
+
+        return text
+
+
+    # Returns whether an expression is valid in the units, like the
+    # isValidExpression method of the units manager.
+    def isValidExpression(self, expression, units):
+        key = (expression, units)
+        isValid = self.validExpressions.get(key)
+        if isValid is None:
+            self.apiCalls += 1
+            isValid = self.unitsManager.isValidExpression(expression, units)
+            self.remember(self.validExpressions, key, isValid)
+
+        return isValid
+
+
+    # Returns the value of an expression in the units, like the
+    # evaluateExpression method of the units manager.
+    def evaluateExpression(self, expression, units):
+        key = (expression, units)
+        value = self.values.get(key)
+        if value is None:
+            self.apiCalls += 1
+            value = self.unitsManager.evaluateExpression(expression, units)
+            self.remember(self.values, key, value)
+
+        return value
+
+
+    # Adds a result to one of the caches, clearing it first if it's full.
+    def remember(self, cache, key, result):
+        if len(cache) >= UNITS_CACHE_SIZE:
+            cache.clear()
+        cache[key] = result